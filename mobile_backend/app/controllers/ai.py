@@ -1,6 +1,7 @@
 import os
+import json
+import asyncio
 import logging
-import tempfile
 import subprocess
 import uuid
 import time as _time
@@ -8,24 +9,37 @@ import threading
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Awaitable, Callable
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 VENV_PYTHON = PROJECT_ROOT / "venv" / "Scripts" / "python.exe"
 
-import aiofiles
-from fastapi import UploadFile
+import numpy as np
+from fastapi import HTTPException, UploadFile, WebSocket, WebSocketDisconnect
 from sqlalchemy import text as sql_text
 from sqlalchemy.orm import Session
 
 from app.services.voice_auth import verify_voice
+from app.services.asr import ASRBusyError, ASRTimeoutError, transcript_tag
+from app.services.asr_stream import ASR_STREAM_IDLE_SECONDS, StreamingTranscriber
+from app.services.audio import decode_audio, speech_only
+from app.services.audio_cache import audio_cache, audio_key
 from app.services.ai import (
-    transcribe,
-    extract_intent,
+    transcribe_async,
+    get_last_user_message,
+    resolve_intent,
     handle_finance_service,
     handle_task_tracker_service,
     handle_suggestion_check,
+    AI_FUSED_EXTRACTION,
 )
-from app.services.memory import get_user_memories
+from app.services.memory import get_user_memories, build_memory_context
+from app.services.memory_index import select_relevant_memories
+from app.services.intent_classifier import track_intent_source
+from app.services.pipeline import StageGraph
+from app.services.metrics import STAGE_SECONDS
+from app.services.tracing import set_attribute, traced
+from app.services.events import emit_event, event_sink
 from app.services.suggestion import handle_suggestion_response
 
 logger = logging.getLogger(__name__)
@@ -119,98 +133,421 @@ def run_droidrun_sync(command: str) -> dict:
         return {"status": "failed", "error": str(e)}
 
 
-async def process_command_controller(file: UploadFile, userID: str, db: Session):
-    temp_dir = Path(tempfile.gettempdir()) / "qareeb_audio"
-    temp_dir.mkdir(parents=True, exist_ok=True)
-
-    content_type = file.content_type or ""
-    if "mp3" in content_type.lower():
-        ext = ".mp3"
-    elif "wav" in content_type.lower():
-        ext = ".wav"
-    elif "m4a" in content_type.lower():
-        ext = ".m4a"
-    else:
-        ext = ".wav"
+class _StageTimer:
+    """Stage timings for one request: recorded as metrics and returned in metadata.timings_ms."""
 
-    temp_audio = str(temp_dir / f"command_{os.urandom(4).hex()}{ext}")
-    logger.info("process_command_controller: started, temp_audio=%s, userID=%s", temp_audio, userID)
+    def __init__(self, pipeline: str):
+        self.pipeline = pipeline
+        self.timings: dict[str, float] = {}
+        self.started = self._step = _time.perf_counter()
 
-    try:
-        async with aiofiles.open(temp_audio, "wb") as out:
-            content = await file.read()
-            logger.info("process_command_controller: received file, size=%s bytes", len(content))
-            await out.write(content)
+    def lap(self, name: str) -> None:
+        now = _time.perf_counter()
+        self.timings[name] = round((now - self._step) * 1000, 1)
+        STAGE_SECONDS.observe(now - self._step, pipeline=self.pipeline, stage=name)
+        self._step = now
 
-        text = transcribe(temp_audio)
-        logger.info("process_command_controller: transcription done text=%r", text)
+    def attach(self, response: dict) -> dict:
+        elapsed = _time.perf_counter() - self.started
+        self.timings["total"] = round(elapsed * 1000, 1)
+        STAGE_SECONDS.observe(elapsed, pipeline=self.pipeline, stage="total")
+        response["metadata"] = {"timings_ms": self.timings}
+        return response
 
-        # Check if user has enrolled voice
-        user = db.execute(
-            sql_text('SELECT voice_embedding FROM "User" WHERE "userID" = :uid'),
-            {"uid": userID}
-        ).mappings().first()
-
-        if user and user["voice_embedding"] is not None:
-            threshold = float(os.environ.get("VOICE_AUTH_THRESHOLD", 0.75))
-            is_verified, score = verify_voice(temp_audio, user["voice_embedding"], threshold=threshold)
-            if not is_verified:
-                logger.warning("Voice verification FAILED for user %s: score=%.4f (threshold=%.4f)", userID, score, threshold)
-                return {
-                    "status": "auth_failed",
-                    "transcription": text,
-                    "message": f"Biometric verification failed (score: {score:.2f})"
-                }
-            logger.info("Voice verification SUCCESS for user %s: score=%.4f", userID, score)
+
+# sequential: transcribe, then verify the speaker
+# parallel: both at once; a failed verification stops waiting for the
+#           transcription, but a decode already running in an ASR worker
+#           can't be interrupted and still costs its full CPU
+# verify_first: verify, and only transcribe a verified speaker; the mode
+#               to use when rejected speakers must not cost any decoding
+VOICE_VERIFY_MODE = os.environ.get("VOICE_VERIFY_MODE", "parallel").lower()
+
+
+class _Clip:
+    """
+    Audio of one command. From an upload it is decoded and trimmed on first
+    use, at most once, and key (the upload's hash) names its cached results;
+    a retried upload with everything cached is never decoded at all.
+    """
+
+    def __init__(self, content: bytes | None = None, speech: np.ndarray | None = None):
+        self.key = audio_key(content) if content is not None else None
+        self._content = content
+        self._speech = speech
+        self._lock = asyncio.Lock()
+
+    async def speech(self) -> np.ndarray | None:
+        """Trimmed samples, or None if the clip holds no speech."""
+        async with self._lock:
+            if self._content is not None:
+                self._speech = speech_only(await asyncio.to_thread(decode_audio, self._content))
+                self._content = None
+        return self._speech
+
+
+async def _verify_speaker(clip: _Clip, userID: str, db: Session) -> tuple[bool, float] | None:
+    """WavLM check in a worker thread; None when the user has no enrolled voice."""
+    user = db.execute(
+        sql_text('SELECT voice_embedding FROM "User" WHERE "userID" = :uid'),
+        {"uid": userID}
+    ).mappings().first()
+    if not user or user["voice_embedding"] is None:
+        logger.info("Voice verification skipped: user %s has no voice signature enrolled", userID)
+        return None
+
+    threshold = float(os.environ.get("VOICE_AUTH_THRESHOLD", 0.75))
+    # The score, not the verdict, is cached so a threshold change applies at
+    # once; re-enrolling encrypts a new ciphertext and so misses
+    cache_key = None
+    if clip.key is not None:
+        cache_key = f"speaker:{clip.key}:{userID}:{audio_key(bytes(user['voice_embedding']))}"
+    score = audio_cache.get(cache_key, kind="speaker") if cache_key else None
+    if score is not None:
+        is_verified = score >= threshold
+        set_attribute("speaker_cached", True)
+    else:
+        speech = await clip.speech()
+        if speech is None:
+            raise ValueError("No speech to verify the speaker against")
+        is_verified, score = await asyncio.to_thread(verify_voice, speech, user["voice_embedding"], threshold)
+        if cache_key and (is_verified or score != 0.0):  # (False, 0.0) is verify_voice's error result
+            audio_cache.put(cache_key, score)
+    if is_verified:
+        logger.info("Voice verification SUCCESS for user %s: score=%.4f", userID, score)
+    else:
+        logger.warning("Voice verification FAILED for user %s: score=%.4f (threshold=%.4f)", userID, score, threshold)
+    return is_verified, score
+
+
+def _discard(task: asyncio.Future) -> None:
+    """Cancel a task whose result is no longer wanted, without 'exception never retrieved' noise."""
+    task.cancel()
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+async def _transcribe_and_verify(
+    transcribe: Callable[[], Awaitable[str]],
+    clip: _Clip,
+    userID: str,
+    db: Session,
+    lap: Callable[[str], None],
+) -> tuple[str | None, dict | None]:
+    """
+    Transcription and speaker check, ordered by VOICE_VERIFY_MODE. Returns
+    (text, None) for a verified or unenrolled speaker, or (text, response)
+    with an auth_failed response; text is None if the transcription was
+    cancelled or never started.
+    """
+    set_attribute("verify_mode", VOICE_VERIFY_MODE)
+    if VOICE_VERIFY_MODE == "sequential":
+        text = await transcribe()
+        lap("transcribe")
+        verdict = await _verify_speaker(clip, userID, db)
+        lap("verify")
+    elif VOICE_VERIFY_MODE == "verify_first":
+        verdict = await _verify_speaker(clip, userID, db)
+        lap("verify")
+        text = None
+        if verdict is None or verdict[0]:
+            text = await transcribe()
+            lap("transcribe")
+    else:
+        transcription = asyncio.ensure_future(transcribe())
+        try:
+            verdict = await _verify_speaker(clip, userID, db)
+        except BaseException:
+            _discard(transcription)
+            raise
+        lap("verify")
+        if verdict is not None and not verdict[0]:
+            done = transcription.done() and not transcription.cancelled() and transcription.exception() is None
+            text = transcription.result() if done else None
+            # Frees the caller now; a decode already in a worker runs to the end
+            _discard(transcription)
         else:
-            logger.info("Voice verification skipped: user %s has no voice signature enrolled", userID)
-
-        intent = extract_intent(text)
-        logger.info("process_command_controller: extracted intent=%s", intent)
-
-        if intent == "UI_AUTOMATION":
-            job_id = str(uuid.uuid4())
-            future = executor.submit(run_droidrun_sync, text)
-            future.add_done_callback(lambda f: _cleanup_job(job_id, f))
-            automation_jobs[job_id] = {
-                "status": "running",
-                "command": text,
-                "started_at": datetime.now().isoformat(),
-                "future": future,
-            }
-            return {"status": "accepted", "intent": intent, "transcription": text, "job_id": job_id}
+            text = await transcription
+            lap("transcribe")  # only the part not hidden behind verification
+
+    if verdict is not None and not verdict[0]:
+        return text, {
+            "status": "auth_failed",
+            "transcription": text,
+            "message": f"Biometric verification failed (score: {verdict[1]:.2f})"
+        }
+    return text, None
+
+
+async def _run_command(text: str, userID: str, db: Session, lap: Callable[[str], None]) -> dict:
+    """Everything after transcription and the speaker check: intent, dispatch."""
+    memory_context = ""
+    if AI_FUSED_EXTRACTION:
+        memory_context = build_memory_context(await select_relevant_memories(db, userID, text))
+    intent, prefetched = await resolve_intent(text, memory_context)
+    lap("intent")
+    logger.info("_run_command: extracted intent=%s", intent)
+    set_attribute("intent", intent)
+
+    if intent == "UI_AUTOMATION":
+        job_id = str(uuid.uuid4())
+        future = executor.submit(run_droidrun_sync, text)
+        future.add_done_callback(lambda f: _cleanup_job(job_id, f))
+        automation_jobs[job_id] = {
+            "status": "running",
+            "command": text,
+            "started_at": datetime.now().isoformat(),
+            "future": future,
+        }
+        response = {"status": "accepted", "intent": intent, "transcription": text, "job_id": job_id}
 
-        elif intent == "FINANCE":
-            result = await handle_finance_service(text, userID, db)
-            return {
-                "status": "success" if result.get("success") else "error",
-                "intent": intent, "transcription": text, "result": result,
-            }
+    elif intent == "FINANCE":
+        result = await handle_finance_service(text, userID, db, prefetched)
+        response = {
+            "status": "success" if result.get("success") else "error",
+            "intent": intent, "transcription": text, "result": result,
+        }
+
+    elif intent == "TASK_TRACKER":
+        result = await handle_task_tracker_service(text, userID, db, prefetched)
+        response = {
+            "status": "success" if result.get("success") else "error",
+            "intent": intent, "transcription": text, "result": result,
+        }
+
+    else:
+        response = {"status": "unknown_intent", "intent": intent, "transcription": text}
+
+    lap("dispatch")
+    return response
 
-        elif intent == "TASK_TRACKER":
-            result = await handle_task_tracker_service(text, userID, db)
-            return {
-                "status": "success" if result.get("success") else "error",
-                "intent": intent, "transcription": text, "result": result,
-            }
 
+@traced()
+async def process_command_controller(file: UploadFile, userID: str, db: Session):
+    logger.info(
+        "process_command_controller: started, content_type=%s, userID=%s", file.content_type, userID
+    )
+    set_attribute("userID", userID)
+
+    timer = _StageTimer("process_command_controller")
+
+    try:
+        content = await file.read()
+        logger.info("process_command_controller: received file, size=%s bytes", len(content))
+        timer.lap("upload")
+
+        # Decoded straight from the upload's bytes and trimmed once; Whisper
+        # and WavLM both get these same samples. A retry of an upload that
+        # was already transcribed skips decoding and Whisper
+        clip = _Clip(content)
+        transcript_key = f"transcript:{transcript_tag()}:{clip.key}"
+        cached_text = audio_cache.get(transcript_key, kind="transcript")
+        if cached_text is not None:
+            set_attribute("transcript_cached", True)
+
+            async def transcribe():
+                return cached_text
         else:
-            return {"status": "unknown_intent", "intent": intent, "transcription": text}
+            speech = await clip.speech()
+            timer.lap("decode")
+            if speech is None:
+                return timer.attach({"status": "no_speech", "transcription": "", "message": "No speech detected"})
+
+            async def transcribe():
+                text = await transcribe_async(speech)
+                audio_cache.put(transcript_key, text)
+                return text
+
+        try:
+            text, rejected = await _transcribe_and_verify(transcribe, clip, userID, db, timer.lap)
+        except ASRBusyError:
+            raise HTTPException(status_code=503, detail="Transcription is busy, retry shortly", headers={"Retry-After": "2"})
+        except ASRTimeoutError as e:
+            raise HTTPException(status_code=504, detail=str(e))
+        if rejected is not None:
+            return timer.attach(rejected)
+        logger.info("process_command_controller: transcription done text=%r", text)
+        emit_event("transcription", {"text": text})
 
+        return timer.attach(await _run_command(text, userID, db, timer.lap))
+
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("process_command_controller: unexpected error")
         return {"status": "error", "message": str(e), "stage": "process_command_controller"}
 
-    finally:
-        if os.path.exists(temp_audio):
+
+async def _send(websocket: WebSocket, message: dict) -> None:
+    """Best effort: the client may already have gone away."""
+    try:
+        await websocket.send_json(message)
+    except Exception:
+        logger.info("stream_command_controller: could not send %s, client gone", message.get("type"))
+
+
+async def _close(websocket: WebSocket, code: int = 1000, reason: str | None = None) -> None:
+    try:
+        await websocket.close(code=code, reason=reason)
+    except Exception:
+        pass  # already closed
+
+
+@traced()
+async def _close_idle(websocket: WebSocket) -> None:
+    await _send(websocket, {"type": "error", "message": f"no data for {ASR_STREAM_IDLE_SECONDS:.0f}s"})
+    await _close(websocket, 1008)
+
+
+async def stream_command_controller(websocket: WebSocket, db: Session):
+    """
+    Voice command over an accepted WebSocket, transcribed while the user is
+    still talking. See the /transcribe/stream route for the protocol.
+    """
+    try:
+        start = await asyncio.wait_for(websocket.receive_json(), ASR_STREAM_IDLE_SECONDS)
+    except asyncio.TimeoutError:
+        await _close_idle(websocket)
+        return
+    except (WebSocketDisconnect, ValueError):
+        await _close(websocket, 1003)
+        return
+    if not isinstance(start, dict):
+        await _send(websocket, {"type": "error", "message": "start message must be a JSON object"})
+        await _close(websocket, 1003, "start message must be a JSON object")
+        return
+    userID = str(start.get("userID") or "").strip()
+    if not userID:
+        await _send(websocket, {"type": "error", "message": "userID is required"})
+        await _close(websocket, 1008)
+        return
+    if start.get("sample_rate", 16000) != 16000 or start.get("format", "pcm_s16le") != "pcm_s16le":
+        await _send(websocket, {"type": "error", "message": "audio must be 16 kHz mono pcm_s16le"})
+        await _close(websocket, 1003)
+        return
+
+    set_attribute("userID", userID)
+    logger.info("stream_command_controller: started, userID=%s", userID)
+    transcriber = StreamingTranscriber()
+    timer = _StageTimer("stream_command_controller")
+    await websocket.send_json({"type": "ready"})
+
+    try:
+        partial = ""
+        while not transcriber.ended:
             try:
-                os.remove(temp_audio)
-            except Exception:
-                logger.exception("process_command_controller: failed to remove temp_audio=%s", temp_audio)
+                message = await asyncio.wait_for(websocket.receive(), ASR_STREAM_IDLE_SECONDS)
+            except asyncio.TimeoutError:
+                logger.info("stream_command_controller: client idle, userID=%s", userID)
+                transcriber.cancel()
+                await _close_idle(websocket)
+                return
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes"):
+                for event in transcriber.feed(message["bytes"]):
+                    if event.kind in ("speech_start", "end"):
+                        await websocket.send_json({"type": "vad", "event": event.kind})
+            elif message.get("text") and json.loads(message["text"]).get("type") == "end":
+                break
+            if transcriber.partial_text() != partial:
+                partial = transcriber.partial_text()
+                await websocket.send_json({"type": "partial", "text": partial})
+        # Only the time after the user stopped talking is latency they feel
+        timer.lap("listen")
+
+        if not transcriber.heard_speech:
+            transcriber.cancel()
+            await websocket.send_json({"type": "result", **timer.attach({"status": "no_speech"})})
+            await websocket.close()
+            return
+        speech = speech_only(transcriber.audio)
+        if speech is None:
+            speech = transcriber.audio  # the streaming VAD heard speech; trust it
+        # Most segments are decoded by now; the speaker check overlaps the rest
+        text, rejected = await _transcribe_and_verify(transcriber.finish, _Clip(speech=speech), userID, db, timer.lap)
+        logger.info("stream_command_controller: transcription done text=%r", text)
+        if rejected is not None:
+            transcriber.cancel()
+            await websocket.send_json({"type": "result", **timer.attach(rejected)})
+            await websocket.close()
+            return
+        if not text:
+            await websocket.send_json({"type": "result", **timer.attach({"status": "no_speech"})})
+            await websocket.close()
+            return
+        await websocket.send_json({"type": "transcription", "text": text})
+
+        response = await _run_command(text, userID, db, timer.lap)
+        await websocket.send_json({"type": "result", **timer.attach(response)})
+        await websocket.close()
+
+    except WebSocketDisconnect:
+        logger.info("stream_command_controller: client disconnected, userID=%s", userID)
+        transcriber.cancel()
+    except ASRBusyError:
+        transcriber.cancel()
+        await _send(websocket, {"type": "error", "message": "Transcription is busy, retry shortly"})
+        await _close(websocket, 1013)
+    except Exception as e:
+        logger.exception("stream_command_controller: unexpected error")
+        transcriber.cancel()
+        await _send(websocket, {"type": "error", "message": str(e), "stage": "stream_command_controller"})
+        await _close(websocket, 1011)
+
+
+async def _dispatch_text_intent(
+    intent: str,
+    text: str,
+    userID: str,
+    db: Session,
+    prefetched: dict | None = None,
+) -> dict:
+    """Route a classified text command to its module and build the response."""
+    if intent == "UI_AUTOMATION":
+        job_id = str(uuid.uuid4())
+        future = executor.submit(run_droidrun_sync, text)
+        future.add_done_callback(lambda f: _cleanup_job(job_id, f))
+        automation_jobs[job_id] = {
+            "status": "running",
+            "command": text,
+            "started_at": datetime.now().isoformat(),
+            "future": future,
+        }
+        return {
+            "status": "accepted",
+            "intent": intent,
+            "text": text,
+            "job_id": job_id,
+        }
 
+    elif intent == "FINANCE":
+        result = await handle_finance_service(text, userID, db, prefetched)
+        logger.info("process_text_controller: FINANCE service result success=%s", result.get("success"))
+        return {
+            "status": "success" if result.get("success") else "error",
+            "intent": intent,
+            "text": text,
+            "result": result,
+        }
+
+    elif intent == "TASK_TRACKER":
+        result = await handle_task_tracker_service(text, userID, db, prefetched)
+        logger.info("process_text_controller: TASK_TRACKER service result success=%s", result.get("success"))
+        return {
+            "status": "success" if result.get("success") else "error",
+            "intent": intent,
+            "text": text,
+            "result": result,
+        }
+
+    logger.warning("process_text_controller: unknown intent=%s, text=%r", intent, text)
+    return {"status": "unknown_intent", "intent": intent, "text": text}
 
+
+@traced()
 async def process_text_controller(text: str, userID: str, db: Session):
     logger.info("process_text_controller: started, text=%r, userID=%s", text, userID)
+    set_attribute("userID", userID)
 
     if not userID or not userID.strip():
         return {"status": "error", "message": "userID is required"}
@@ -231,69 +568,62 @@ async def process_text_controller(text: str, userID: str, db: Session):
                 "message": "Task created from your suggestion!",
             }
 
-        # ── STEP 2: Check memories and get suggestion ─────────────────────
-        memories = get_user_memories(db, userID)
-        logger.info(
-            "process_text_controller: user has %d memories: %s",
-            len(memories), memories
+        # ── STEP 2: Fan out independent stages ───────────────────────────
+        # (memories → suggestion) | (intent → dispatch): the suggestion check
+        # needs every memory, intent/dispatch only pull the relevant ones.
+        # DB access inside the stages is synchronous, so the shared session
+        # is never used by two stages at the same time.
+        async def load_memories():
+            memories = get_user_memories(db, userID)
+            logger.info(
+                "process_text_controller: user has %d memories: %s",
+                len(memories), memories
+            )
+            return memories
+
+        async def check_suggestion(memories):
+            suggestion_result = await handle_suggestion_check(userID, db, memories)
+            logger.info("process_text_controller: suggestion_result=%s", suggestion_result)
+            if suggestion_result:
+                emit_event("suggestion", {"suggestion": suggestion_result["suggestion"]})
+            return suggestion_result
+
+        async def classify_intent():
+            logger.info("process_text_controller: extracting intent")
+            # Fused mode extracts the payload in the same call and needs memories for it
+            memory_context = ""
+            if AI_FUSED_EXTRACTION:
+                memory_context = build_memory_context(await select_relevant_memories(db, userID, get_last_user_message(text)))
+            intent, prefetched = await resolve_intent(text, memory_context)
+            logger.info("process_text_controller: extracted intent=%s", intent)
+            set_attribute("intent", intent)
+            emit_event("intent", {"intent": intent})
+            return intent, prefetched
+
+        async def dispatch(intent):
+            intent_name, prefetched = intent
+            return await _dispatch_text_intent(intent_name, text, userID, db, prefetched)
+
+        # Shared with the stage tasks, so dispatch logs where the intent came from
+        track_intent_source()
+        graph = (
+            StageGraph("process_text_controller")
+            .add("memories", load_memories)
+            .add("suggestion", check_suggestion, deps=("memories",))
+            .add("intent", classify_intent)
+            .add("dispatch", dispatch, deps=("intent",))
         )
+        results = await graph.run()
 
-        suggestion_result = await handle_suggestion_check(userID, db)
-        logger.info("process_text_controller: suggestion_result=%s", suggestion_result)
+        response = results["dispatch"]
+        suggestion_result = results["suggestion"]
 
+        # ── STEP 3: Attach suggestion and stage timings to response ───────
         if suggestion_result:
             pending_suggestions[userID] = suggestion_result["suggestion"]
-
-        # ── STEP 3: Normal intent flow ────────────────────────────────────
-        logger.info("process_text_controller: extracting intent")
-        intent = extract_intent(text)
-        logger.info("process_text_controller: extracted intent=%s", intent)
-
-        if intent == "UI_AUTOMATION":
-            job_id = str(uuid.uuid4())
-            future = executor.submit(run_droidrun_sync, text)
-            future.add_done_callback(lambda f: _cleanup_job(job_id, f))
-            automation_jobs[job_id] = {
-                "status": "running",
-                "command": text,
-                "started_at": datetime.now().isoformat(),
-                "future": future,
-            }
-            response = {
-                "status": "accepted",
-                "intent": intent,
-                "text": text,
-                "job_id": job_id,
-            }
-
-        elif intent == "FINANCE":
-            result = await handle_finance_service(text, userID, db)
-            logger.info("process_text_controller: FINANCE service result success=%s", result.get("success"))
-            response = {
-                "status": "success" if result.get("success") else "error",
-                "intent": intent,
-                "text": text,
-                "result": result,
-            }
-
-        elif intent == "TASK_TRACKER":
-            result = await handle_task_tracker_service(text, userID, db)
-            logger.info("process_text_controller: TASK_TRACKER service result success=%s", result.get("success"))
-            response = {
-                "status": "success" if result.get("success") else "error",
-                "intent": intent,
-                "text": text,
-                "result": result,
-            }
-
-        else:
-            logger.warning("process_text_controller: unknown intent=%s, text=%r", intent, text)
-            response = {"status": "unknown_intent", "intent": intent, "text": text}
-
-        # ── STEP 4: Attach suggestion to response ─────────────────────────
-        if suggestion_result:
             response["suggestion"] = suggestion_result["suggestion"]
 
+        response["metadata"] = {"timings_ms": graph.timings}
         return response
 
     except Exception as e:
@@ -302,4 +632,76 @@ async def process_text_controller(text: str, userID: str, db: Session):
             "status": "error",
             "message": str(e),
             "stage": "process_text_controller",
-        }
\ No newline at end of file
+        }
+
+
+# Progress events held for a slow SSE consumer; beyond this they are dropped
+# (the final result never is)
+STREAM_MAX_PENDING_EVENTS = int(os.environ.get("STREAM_MAX_PENDING_EVENTS", 256))
+# How often an idle SSE stream checks whether its client is still there
+STREAM_DISCONNECT_POLL = float(os.environ.get("STREAM_DISCONNECT_POLL", 1.0))
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def stream_text_controller(
+    text: str,
+    userID: str,
+    session_factory,
+    is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+):
+    """
+    Server-Sent Events variant of process_text_controller.
+    Yields an event as each stage finishes, LLM tokens as they arrive,
+    and the same JSON body as the blocking endpoint as the final 'result'.
+    The pipeline is cancelled once the client goes away.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    dropped = 0
+
+    def sink(event: str, data: dict) -> None:
+        nonlocal dropped
+        if queue.qsize() >= STREAM_MAX_PENDING_EVENTS:
+            dropped += 1
+            return
+        queue.put_nowait((event, data))
+
+    async def run():
+        # Owns its session: the request's dependency may be torn down
+        # while the stream is still being consumed
+        db = session_factory()
+        try:
+            with event_sink(sink):
+                result = await process_text_controller(text, userID, db)
+            queue.put_nowait(("result", result))
+        except Exception as e:
+            logger.exception("stream_text_controller: unexpected error")
+            queue.put_nowait(("error", {"status": "error", "message": str(e)}))
+        finally:
+            db.close()
+            queue.put_nowait(None)
+
+    task = asyncio.create_task(run())
+    try:
+        yield _sse("accepted", {"text": text})
+
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), STREAM_DISCONNECT_POLL)
+            except asyncio.TimeoutError:
+                if is_disconnected is not None and await is_disconnected():
+                    logger.info("stream_text_controller: client disconnected, userID=%s", userID)
+                    return
+                continue
+            if item is None:
+                break
+            yield _sse(*item)
+        await task
+    finally:
+        # Client gone (or the response was torn down): stop the LLM calls and writes
+        if not task.done():
+            task.cancel()
+        if dropped:
+            logger.warning("stream_text_controller: dropped %d progress events for a slow client", dropped)
@@ -0,0 +1,240 @@
+"""
+Offline stand-in for Groq's OpenAI-compatible chat completions API.
+
+Answers every prompt the backend sends with a plausible, schema-valid reply
+built from the user's text, so the real request paths (intent, extraction,
+memory learning, suggestions) run end to end without a key or network.
+Latency, streaming speed and error rates are configurable, either through
+STANDIN_* env vars or at runtime via POST /standin/config.
+
+Run with run_llm_standin.py and start the backend with
+GROQ_BASE_URL=http://localhost:8100.
+"""
+import os
+import re
+import json
+import time
+import uuid
+import random
+import asyncio
+import logging
+from dataclasses import dataclass, asdict, fields
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.services.prompts import PROMPTS
+from app.services.intent_classifier import classify_intent_locally
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StandinConfig:
+    latency_ms: float = float(os.environ.get("STANDIN_LATENCY_MS", 300))
+    jitter_ms: float = float(os.environ.get("STANDIN_JITTER_MS", 100))
+    # Delay between streamed chunks
+    token_delay_ms: float = float(os.environ.get("STANDIN_TOKEN_DELAY_MS", 5))
+    chunk_chars: int = int(os.environ.get("STANDIN_CHUNK_CHARS", 8))
+    error_rate: float = float(os.environ.get("STANDIN_ERROR_RATE", 0))
+    rate_limit_rate: float = float(os.environ.get("STANDIN_RATE_LIMIT_RATE", 0))
+    seed: int | None = int(os.environ["STANDIN_SEED"]) if os.environ.get("STANDIN_SEED") else None
+
+
+config = StandinConfig()
+_rng = random.Random(config.seed)
+
+app = FastAPI(title="Qareeb LLM stand-in")
+
+
+# ─────────────────────────────────────────────
+# SYNTHETIC ANSWERS
+# ─────────────────────────────────────────────
+
+_WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+_INCOME_WORDS = ("salary", "received", "earned", "got paid", "income", "refund")
+# Below this the keyword rules found nothing in particular
+_MIN_INTENT_CONFIDENCE = 0.5
+
+
+def _find(pattern: str, text: str, default: str = "") -> str:
+    match = re.search(pattern, text)
+    return match.group(1) if match else default
+
+
+def _due_date(user_text: str, prompt: str) -> str:
+    """Pick the date the prompt's own date table gives for the day mentioned."""
+    lowered = user_text.lower()
+    for day in _WEEKDAYS:
+        if day in lowered:
+            return _find(rf"This {day.title()}: (\d{{4}}-\d{{2}}-\d{{2}})", prompt)
+    if "tomorrow" in lowered:
+        return _find(r"Tomorrow is (\d{4}-\d{2}-\d{2})", prompt)
+    return _find(r"Today's date is (\d{4}-\d{2}-\d{2})", prompt)
+
+
+def _task(user_text: str, prompt: str) -> dict:
+    words = re.sub(r"^(please |remind me to |add |create |schedule )+", "", user_text.lower()).split()
+    return {
+        "title": " ".join(words[:3]).title() or "New Task",
+        "description": user_text,
+        "status": "pending",
+        "progressPercentage": 0,
+        "priority": "high" if "urgent" in user_text.lower() else "medium",
+        "dueDate": _due_date(user_text, prompt),
+        "is_deleted": False,
+    }
+
+
+def _finance(user_text: str, prompt: str) -> dict:
+    lowered = user_text.lower()
+    return {
+        "transactionID": None,
+        "amount": float(_find(r"(\d+(?:\.\d+)?)", user_text, "0")),
+        "date": _find(r"Today's date is (\d{4}-\d{2}-\d{2})", prompt),
+        "source": "cash",
+        "description": user_text,
+        "income": any(word in lowered for word in _INCOME_WORDS),
+        "state": "completed",
+        "category_name": "general",
+        "is_deleted": False,
+    }
+
+
+def _task_update(user_text: str, prompt: str) -> dict:
+    lowered = user_text.lower()
+    changes: dict = {}
+    if any(word in lowered for word in ("done", "complete", "finished")):
+        changes.update(status="completed", progressPercentage=100)
+    elif "delete" in lowered or "cancel" in lowered:
+        changes["is_deleted"] = True
+    else:
+        changes["dueDate"] = _due_date(user_text, prompt)
+    target = _find(r"[Cc]reated task:? '?([^'\n]+)", prompt) or " ".join(user_text.split()[:3]).title()
+    return {"target_title": target.strip(), "changes": changes}
+
+
+def _suggestions(prompt: str) -> str:
+    tomorrow = _find(r"Tomorrow is (\w+),", prompt)
+    memories = re.findall(r"^- (.+)$", prompt, re.MULTILINE)
+    lines = [
+        f"Tomorrow ({tomorrow}) the user {fact} — want me to add it to your tasks?"
+        for fact in memories
+        if tomorrow and tomorrow.lower() in fact.lower()
+    ]
+    return "\n".join(lines) or "null"
+
+
+def _intent(user_text: str) -> str:
+    intent, confidence = classify_intent_locally(user_text)
+    return intent if confidence >= _MIN_INTENT_CONFIDENCE else "UNKNOWN"
+
+
+def respond(prompt: str) -> str:
+    """A reply in the shape the backend expects for this prompt."""
+    user_text = _find(r'User(?:\'s update)? request: "(.*)"', prompt)
+    if prompt.startswith(PROMPTS["intent"].static):
+        return _intent(user_text)
+    if prompt.startswith(PROMPTS["task_extraction"].static):
+        return json.dumps(_task(user_text, prompt))
+    if prompt.startswith(PROMPTS["finance_extraction"].static):
+        return json.dumps(_finance(user_text, prompt))
+    if prompt.startswith(PROMPTS["task_update_extraction"].static):
+        return json.dumps(_task_update(user_text, prompt))
+    if prompt.startswith(PROMPTS["fused_extraction"].static):
+        intent = _intent(user_text)
+        return json.dumps({
+            "intent": intent,
+            "task": _task(user_text, prompt) if intent == "TASK_TRACKER" else None,
+            "finance": _finance(user_text, prompt) if intent == "FINANCE" else None,
+        })
+    if "memory extraction assistant" in prompt or "behavioral pattern analyzer" in prompt:
+        return "[]"
+    if "Find ALL recurring events happening tomorrow" in prompt:
+        return _suggestions(prompt)
+    return "OK"
+
+
+# ─────────────────────────────────────────────
+# API
+# ─────────────────────────────────────────────
+
+def _error(status: int, message: str, kind: str) -> JSONResponse:
+    return JSONResponse({"error": {"message": message, "type": kind}}, status_code=status)
+
+
+def _chunk(completion_id: str, model: str, delta: str | None, finish: str | None = None) -> str:
+    return "data: " + json.dumps({
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": {"content": delta} if delta else {}, "finish_reason": finish}],
+    }) + "\n\n"
+
+
+async def _stream(completion_id: str, model: str, content: str):
+    for i in range(0, len(content), config.chunk_chars):
+        yield _chunk(completion_id, model, content[i:i + config.chunk_chars])
+        await asyncio.sleep(config.token_delay_ms / 1000)
+    yield _chunk(completion_id, model, None, "stop")
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/openai/v1/chat/completions")
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "standin")
+    prompt = body["messages"][-1]["content"]
+
+    delay = max(0.0, _rng.gauss(config.latency_ms, config.jitter_ms)) / 1000
+    await asyncio.sleep(delay)
+
+    roll = _rng.random()
+    if roll < config.rate_limit_rate:
+        return _error(429, "Rate limit reached (injected)", "rate_limit_exceeded")
+    if roll < config.rate_limit_rate + config.error_rate:
+        return _error(503, "Service unavailable (injected)", "internal_server_error")
+
+    content = respond(prompt)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    if body.get("stream"):
+        return StreamingResponse(_stream(completion_id, model, content), media_type="text/event-stream")
+
+    prompt_tokens, completion_tokens = len(prompt) // 4 + 1, len(content) // 4 + 1
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+@app.get("/standin/config")
+async def get_config():
+    return asdict(config)
+
+
+@app.post("/standin/config")
+async def update_config(request: Request):
+    """Change latency/error injection mid-run, e.g. to watch the circuit breaker open."""
+    global _rng
+    updates = await request.json()
+    for field in fields(StandinConfig):
+        if field.name in updates:
+            setattr(config, field.name, updates[field.name])
+    if "seed" in updates:
+        _rng = random.Random(config.seed)
+    logger.info("llm standin: config updated to %s", asdict(config))
+    return asdict(config)
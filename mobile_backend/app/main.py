@@ -1,7 +1,13 @@
 from fastapi import FastAPI
-from app.routers import ai, sync, task, notifications,users,memory_sync  # add notifications
+from app.routers import ai, sync, task, notifications,users,memory_sync, metrics, health  # add notifications
 from app.scheduler import start_scheduler, scheduler
-from app.database import get_db
+from app.database import get_db, SessionLocal
+from app.services.llm import close_llm_client
+from app.services.jobs import start_job_workers, stop_job_workers
+from app.services.memory_index import init_memory_index
+from app.services.embeddings import warmup_embeddings
+from app.services.asr import start_asr, stop_asr
+from app.services.tracing import TraceMiddleware, install_log_correlation
 #from app.routers.memory_sync import router as memory_sync_router  # ✅ add this
 app = FastAPI()
 
@@ -9,8 +15,9 @@ import logging
 
 logging.basicConfig(
     level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    format="%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s"
 )
+install_log_correlation()  # fills %(trace_id)s from the current request's span
 
 app.include_router(users.router, prefix="/api")
 app.include_router(ai.router, prefix="/api")
@@ -18,13 +25,23 @@ app.include_router(sync.router, prefix="/api")
 app.include_router(task.router, prefix="/api")
 app.include_router(notifications.router, prefix="/api")  # add this
 app.include_router(memory_sync.router, prefix="/api")  # ✅ add this
+app.include_router(health.router, prefix="/api")
+app.include_router(metrics.router)  # Prometheus scrapes /metrics at the root
+app.add_middleware(TraceMiddleware)
 
 
 @app.on_event("startup")
 async def startup_event():
     start_scheduler(get_db)  # start background scheduler
+    init_memory_index()  # embedding table for memory retrieval
+    warmup_embeddings()  # sentence model loads in the background, off the request path
+    start_job_workers(SessionLocal)  # post-interaction work queue
+    start_asr()  # Whisper loads in the background; see /api/health/ready
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    scheduler.shutdown()
\ No newline at end of file
+    scheduler.shutdown()
+    stop_asr()
+    await stop_job_workers()
+    await close_llm_client()
\ No newline at end of file
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, String, Text, BigInteger, Integer, Index
+from app.database import Base
+
+
+class BackgroundJob(Base):
+    __tablename__ = "BackgroundJob"
+    __table_args__ = (Index("ix_backgroundjob_status_run_after", "status", "run_after"),)
+    job_id       = Column(BigInteger, primary_key=True, autoincrement=True)
+    name         = Column(String, nullable=False)
+    payload      = Column(Text, nullable=False)          # JSON
+    status       = Column(String, nullable=False, default="pending")  # pending | running
+    attempts     = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after    = Column(BigInteger, nullable=False)    # epoch ms
+    last_error   = Column(Text, nullable=True)
+    created_at   = Column(BigInteger, nullable=False)
+    updated_at   = Column(BigInteger, nullable=False)
+
+
+class JobDeadLetter(Base):
+    __tablename__ = "JobDeadLetter"
+    dead_letter_id = Column(BigInteger, primary_key=True, autoincrement=True)
+    job_id         = Column(BigInteger, nullable=False)
+    name           = Column(String, nullable=False)
+    payload        = Column(Text, nullable=False)
+    attempts       = Column(Integer, nullable=False)
+    last_error     = Column(Text, nullable=True)
+    created_at     = Column(BigInteger, nullable=False)
+    failed_at      = Column(BigInteger, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, BigInteger, Float
+from sqlalchemy import Column, String, Text, BigInteger, Float, LargeBinary
 from app.database import Base
 
 class PromptRecord(Base):
@@ -17,4 +17,13 @@ class MemoryRecord(Base):
     memory_id  = Column(BigInteger, primary_key=True, autoincrement=True)
     userId     = Column(String, nullable=False)
     fact       = Column(Text, nullable=False)
-    created_at = Column(BigInteger, nullable=False)
\ No newline at end of file
+    created_at = Column(BigInteger, nullable=False)
+
+class MemoryEmbeddingRecord(Base):
+    __tablename__ = "MemoryEmbedding"
+    memory_id  = Column(BigInteger, primary_key=True)
+    model      = Column(String, primary_key=True)   # vector space tag, see embeddings.embedding_model_tag
+    userId     = Column(String, nullable=False, index=True)
+    fact_hash  = Column(String, nullable=False)     # detects facts edited after embedding
+    vector     = Column(LargeBinary, nullable=False)  # float32 bytes
+    created_at = Column(BigInteger, nullable=False)
@@ -1,11 +1,14 @@
 import logging
-from fastapi import APIRouter, File, UploadFile, Depends, Form, HTTPException
+from fastapi import APIRouter, File, UploadFile, Depends, Form, HTTPException, Request, WebSocket
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.controllers.ai import (
     process_command_controller,
+    stream_command_controller,
     process_text_controller,
+    stream_text_controller,
     automation_jobs,
 )
 
@@ -39,6 +42,28 @@ async def process_text_message(
     return result
 
 
+@router.post("/text/stream")
+async def process_text_message_stream(request: TextMessageRequest, http_request: Request):
+    """Same as /text but streams progress as Server-Sent Events."""
+    logger.info(
+        f"POST /api/ai/text/stream - text={request.text[:50]}..., userID={request.userID}"
+    )
+
+    if not request.userID or not request.userID.strip():
+        raise HTTPException(status_code=400, detail="userID is required")
+
+    if not request.text or not request.text.strip():
+        raise HTTPException(status_code=400, detail="text is required")
+
+    return StreamingResponse(
+        stream_text_controller(
+            request.text.strip(), request.userID.strip(), SessionLocal, http_request.is_disconnected
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/transcribe")
 async def process_command(
     file: UploadFile = File(...), userID: str = Form(...), db: Session = Depends(get_db)
@@ -55,6 +80,25 @@ async def process_command(
     return result
 
 
+@router.websocket("/transcribe/stream")
+async def process_command_stream(websocket: WebSocket, db: Session = Depends(get_db)):
+    """
+    Voice command streamed while it is recorded, transcribed as it arrives.
+
+    Client: a JSON start message {"userID": ..., "sample_rate": 16000,
+    "format": "pcm_s16le"}, then binary frames of 16 kHz mono 16-bit PCM,
+    optionally {"type": "end"} to stop before the server hears silence.
+
+    Server: {"type": "ready"}, {"type": "vad", "event": "speech_start"|"end"},
+    {"type": "partial", "text"}, {"type": "transcription", "text"}, and
+    finally {"type": "result", ...} with the same body as /transcribe,
+    or {"type": "error", "message"}.
+    """
+    await websocket.accept()
+    logger.info("WS /api/ai/transcribe/stream - connected")
+    await stream_command_controller(websocket, db)
+
+
 @router.get("/status/{job_id}")
 async def get_automation_status(job_id: str):
     """Poll for automation job status. Auto-deletes after result fetched."""
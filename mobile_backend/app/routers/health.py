@@ -0,0 +1,33 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.services import asr
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("")
+async def liveness():
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def readiness():
+    """
+    Instance readiness. Text, tasks and sync don't need Whisper, so a model
+    still loading is reported in the asr field rather than failing the check.
+    """
+    return {"status": "ready", "asr": asr.asr_status()}
+
+
+@router.get("/ready/asr")
+async def asr_readiness():
+    """
+    503 until a Whisper model is loaded, for routing voice traffic only to
+    instances that can serve it without a cold load. In lazy mode the model
+    loads on the first transcription, so there is nothing to wait for.
+    """
+    status = {"asr": asr.asr_status()}
+    if asr.ASR_LOAD_MODE != "lazy" and not asr.asr_ready():
+        return JSONResponse({"status": "starting", **status}, status_code=503)
+    return {"status": "ready", **status}
@@ -84,7 +84,7 @@ def register_fcm_token(
 # =========================
 
 @router.post("/test-notify/{userID}")
-def test_notification(
+async def test_notification(
     userID: str,
     db: Session = Depends(get_db)
 ):
@@ -133,7 +133,7 @@ def test_notification(
     # GET SUGGESTIONS
     # =========================
 
-    suggestions = get_upcoming_suggestions(
+    suggestions = await get_upcoming_suggestions(
         db,
         userID,
         memories
@@ -2,15 +2,13 @@ from fastapi import APIRouter, Body, Depends, File, UploadFile, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import List
-import tempfile
-import os
-import shutil
 import logging
 
 logger = logging.getLogger(__name__)
 
 from app.database import get_db
 from app.models.user import LoginRequest, RegisterRequest
+from app.services.audio import decode_audio, speech_only
 from app.services.voice_auth import extract_voice_embedding, average_embeddings, encrypt_embedding
 from app.controllers.user import (
     list_users_controller,
@@ -76,18 +74,16 @@ async def register_voice(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    temp_files = []
     embeddings = []
     try:
-        temp_dir = tempfile.gettempdir()
-        for idx, upload_file in enumerate(wav_files):
-            temp_path = os.path.join(temp_dir, f"enroll_{userID}_{idx}_{os.urandom(4).hex()}.wav")
-            with open(temp_path, "wb") as buffer:
-                shutil.copyfileobj(upload_file.file, buffer)
-            temp_files.append(temp_path)
-            
+        for upload_file in wav_files:
+            # Decoded from the upload's bytes, trimmed like command audio
+            speech = speech_only(decode_audio(await upload_file.read()))
+            if speech is None:
+                raise HTTPException(status_code=400, detail=f"No speech in {upload_file.filename}")
+
             # Extract embedding
-            emb = extract_voice_embedding(temp_path)
+            emb = extract_voice_embedding(speech)
             embeddings.append(emb)
         
         # Average and unit-normalize
@@ -103,15 +99,9 @@ async def register_voice(
         db.commit()
         
         return {"voice_embedding": "success"}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.exception("register_voice failed for userID=%s", userID)
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        # Clean up temp files
-        for temp_path in temp_files:
-            if os.path.exists(temp_path):
-                try:
-                    os.remove(temp_path)
-                except Exception:
-                    pass
\ No newline at end of file
@@ -1,5 +1,8 @@
+import asyncio
+from datetime import datetime
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,6 +26,13 @@ def start_scheduler(get_db_func):
         """
 
         from app.services.notification import check_and_notify_all_users
+        from app.services.llm import close_llm_client
+
+        async def run_check(db):
+            try:
+                await check_and_notify_all_users(db)
+            finally:
+                await close_llm_client()
 
         logger.info("daily_notification_job: triggered")
 
@@ -31,7 +41,8 @@ def start_scheduler(get_db_func):
 
         try:
 
-            check_and_notify_all_users(db)
+            # Runs on the scheduler's worker thread, so it gets its own loop
+            asyncio.run(run_check(db))
 
         except Exception as e:
 
@@ -45,7 +56,38 @@ def start_scheduler(get_db_func):
                 pass
 
     # =========================
-    # REGISTER JOB
+    # INTENT CLASSIFIER RETRAIN JOB
+    # =========================
+
+    def intent_classifier_job():
+        """
+        Retrains the local intent classifier from the Prompts table.
+        Runs once at startup and then every few hours.
+        """
+
+        from app.services.intent_classifier import train_intent_classifier
+
+        db_gen = get_db_func()
+        db = next(db_gen)
+
+        try:
+
+            rows = train_intent_classifier(db)
+            logger.info(f"intent_classifier_job: trained on {rows} prompts")
+
+        except Exception as e:
+
+            logger.error(f"Intent classifier training failed: {e}", exc_info=True)
+
+        finally:
+
+            try:
+                next(db_gen)
+            except StopIteration:
+                pass
+
+    # =========================
+    # REGISTER JOBS
     # =========================
 
     scheduler.add_job(
@@ -55,6 +97,14 @@ def start_scheduler(get_db_func):
         replace_existing=True,
     )
 
+    scheduler.add_job(
+        intent_classifier_job,
+        trigger=IntervalTrigger(hours=6),
+        next_run_time=datetime.now(),
+        id="intent_classifier_retrain",
+        replace_existing=True,
+    )
+
     # =========================
     # START SCHEDULER
     # =========================
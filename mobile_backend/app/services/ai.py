@@ -1,13 +1,8 @@
 import os
 import uuid
 import logging
-import time
-import json
-from datetime import datetime, timedelta, timezone
-import whisper
+from datetime import datetime, timezone
 from dotenv import load_dotenv
-from groq import Groq
-from llama_index.llms.groq import Groq as LlamaGroq
 from sqlalchemy.orm import Session
 
 from app.models.task import TaskRecord
@@ -21,119 +16,46 @@ from app.services.memory import (
     extract_memory_facts,
     save_memory_facts,
 )
+from app.services.memory_index import select_relevant_memories
 from app.services.prompt_logger import save_interaction
 from app.services.behavior import run_behavioral_analysis_if_needed
+from app.services.llm import chat_completion, chat_completion_json, DEFAULT_MODEL, FALLBACK_MODEL
+from app.services.jobs import enqueue_job, job_handler
+from app.services.events import emit_event
+from app.services.hedging import hedged_request
+from app.services.metrics import LLM_FALLBACKS, STAGE_SECONDS
+from app.services.tracing import set_attribute, span, traced
+from app.services import asr
+from app.services.resilience import CircuitOpenError
+from app.services.prompts import render_prompt, get_date_context
+from app.services.intent_classifier import (
+    classify_intent_locally, current_intent_source, note_intent_source, INTENT_LOCAL_THRESHOLD, LABELS,
+)
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
-groq_client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
-
-llm = LlamaGroq(
-    model="openai/gpt-oss-120b",
-    api_key=os.environ.get("GROQ_API_KEY"),
-    temperature=0,
-)
-
-automation_llm = LlamaGroq(
-    model="openai/gpt-oss-120b",
-    api_key=os.environ.get("GROQ_API_KEY"),
-    temperature=0,
-)
-
-try:
-    whisper_model = whisper.load_model("base")
-    logger.info("Whisper model loaded successfully")
-except Exception as e:
-    logger.exception("Failed to load whisper model: %s", e)
-    whisper_model = None
+# One completion returns intent + extracted payload instead of two serial calls
+AI_FUSED_EXTRACTION = os.environ.get("AI_FUSED_EXTRACTION", "false").lower() in ("1", "true", "yes")
 
 
 # ─────────────────────────────────────────────
 # UTILITIES
 # ─────────────────────────────────────────────
 
+@traced()
 def transcribe(audio_path: str) -> str:
-    if not whisper_model:
-        raise RuntimeError("Whisper model not loaded")
-    result = whisper_model.transcribe(audio_path, fp16=False, language="en")
-    return result["text"].strip()
-
-
-def get_date_context() -> str:
-    today = datetime.now()
-    today_weekday = today.weekday()
-    day_names = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
-    upcoming = {}
-    for i, name in enumerate(day_names):
-        delta = (i - today_weekday) % 7
-        if delta == 0:
-            delta = 7
-        upcoming[name] = (today + timedelta(days=delta)).strftime("%Y-%m-%d")
-    tomorrow = (today + timedelta(days=1)).strftime("%Y-%m-%d")
-    return f"""
-Today's date is {today.strftime("%Y-%m-%d")} ({day_names[today_weekday]}).
-Tomorrow is {tomorrow}.
-Upcoming weekdays (use these exact dates, do NOT calculate yourself):
-This Monday: {upcoming['Monday']}
-This Tuesday: {upcoming['Tuesday']}
-This Wednesday: {upcoming['Wednesday']}
-This Thursday: {upcoming['Thursday']}
-This Friday: {upcoming['Friday']}
-This Saturday: {upcoming['Saturday']}
-This Sunday: {upcoming['Sunday']}
-""".strip()
-
-
-def _strip_code_fences(text: str) -> str:
-    if "```json" in text:
-        text = text.split("```json")[1].split("```")[0].strip()
-    elif "```" in text:
-        text = text.split("```")[1].split("```")[0].strip()
-    return text
-
-
-def _safe_json_loads(text: str) -> dict:
-    """Parse JSON with repair for common LLM output issues."""
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        pass
-
-    import re
-    repaired = text
-    repaired = re.sub(r',\s*([}\]])', r'\1', repaired)
-
-    open_braces = repaired.count('{') - repaired.count('}')
-    open_brackets = repaired.count('[') - repaired.count(']')
-
-    if open_braces > 0 or open_brackets > 0:
-        in_string = False
-        escape = False
-        last_good = len(repaired)
-        for i, ch in enumerate(repaired):
-            if escape:
-                escape = False
-                continue
-            if ch == '\\':
-                escape = True
-                continue
-            if ch == '"':
-                in_string = not in_string
-            if not in_string:
-                last_good = i + 1
-
-        if in_string:
-            repaired = repaired[:last_good] + '"'
-            in_string = False
-
-        open_braces = repaired.count('{') - repaired.count('}')
-        open_brackets = repaired.count('[') - repaired.count(']')
-        repaired = re.sub(r',\s*$', '', repaired)
-        repaired += ']' * max(0, open_brackets)
-        repaired += '}' * max(0, open_braces)
-
-    return json.loads(repaired)
+    """Speech to text with the shared Whisper model (see app.services.asr)."""
+    return asr.transcribe(audio_path)
+
+
+@traced()
+async def transcribe_async(audio_path: str) -> str:
+    """
+    Like transcribe, but decoded in an ASR worker process so the event loop
+    keeps serving other requests. Raises ASRBusyError when the queue is full.
+    """
+    return await asr.transcribe_async(audio_path)
 
 
 def get_last_user_message(text: str) -> str:
@@ -208,140 +130,185 @@ def _is_update_request(text: str) -> bool:
     return any(keyword in text.lower() for keyword in update_keywords)
 
 
+async def _extract_with_fallback(name: str, prompt: str, validate, schema=None) -> dict:
+    """
+    Run a JSON extraction prompt on the primary model, hedged with the
+    fallback model. validate(data) must return the cleaned payload or raise,
+    so an empty or malformed answer never wins the race. With a schema,
+    fields are checked while the answer streams in.
+    """
+    async def attempt(model_name: str) -> dict:
+        data = await chat_completion_json(prompt, model=model_name, schema=schema)
+        if not isinstance(data, dict):
+            raise ValueError(f"{name}: expected a JSON object from {model_name}")
+        return validate(data)
+
+    with span(name):
+        return await hedged_request(attempt, DEFAULT_MODEL, FALLBACK_MODEL, name=name)
+
+
 # ─────────────────────────────────────────────
 # INTENT
 # ─────────────────────────────────────────────
 
-def extract_intent(user_input: str) -> str:
+@traced()
+async def extract_intent(user_input: str) -> str:
     logger.info("extract_intent: starting, user_input=%r", user_input)
-    prompt = f"""
-You are a STRICT intent classifier.
-
-Rules:
-If the user mentions an event, plan, reminder, or schedule → TASK_TRACKER
-If the user mentions money → FINANCE
-If the user wants to control apps → UI_AUTOMATION
-Otherwise → UNKNOWN
-
-User request: "{user_input}"
-
-Output ONLY one:
-TASK_TRACKER, FINANCE, UI_AUTOMATION, UNKNOWN
-"""
-    attempts, backoff, last_err = 0, 0.6, None
-    while attempts < 3:
-        try:
-            completion = groq_client.chat.completions.create(
-                model="openai/gpt-oss-120b",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0,
-                max_completion_tokens=256,
-                top_p=1,
-                stream=False,
-            )
-            intent = completion.choices[0].message.content.strip()
-            logger.info("extract_intent: finished, intent=%s", intent)
-            return intent
-        except Exception as e:
-            last_err = e
-            attempts += 1
-            if attempts >= 3:
-                break
-            time.sleep(backoff)
-            backoff *= 2
-    raise last_err
+
+    # Fast path: confident local classification skips the LLM round trip
+    local_intent, confidence = classify_intent_locally(user_input)
+    if confidence >= INTENT_LOCAL_THRESHOLD:
+        logger.info(
+            "extract_intent: local fast-path intent=%s, confidence=%.2f",
+            local_intent, confidence
+        )
+        set_attribute("intent", local_intent)
+        set_attribute("intent.source", "local")
+        note_intent_source("local")
+        return local_intent
+    logger.info(
+        "extract_intent: local guess=%s, confidence=%.2f below %.2f, asking LLM",
+        local_intent, confidence, INTENT_LOCAL_THRESHOLD
+    )
+
+    prompt = render_prompt("intent", text=user_input)
+    try:
+        intent = (await chat_completion(
+            prompt,
+            model=DEFAULT_MODEL,
+            max_completion_tokens=256,
+        )).strip()
+    except CircuitOpenError:
+        # Groq is known to be down: a best-effort local label beats a hung request
+        logger.warning("extract_intent: LLM circuit open, using local guess=%s", local_intent)
+        LLM_FALLBACKS.inc(operation="extract_intent", reason="circuit_open")
+        set_attribute("intent", local_intent)
+        set_attribute("intent.source", "circuit_open")
+        note_intent_source("local")
+        return local_intent
+    logger.info("extract_intent: finished, intent=%s", intent)
+    set_attribute("intent", intent)
+    set_attribute("intent.source", "llm")
+    note_intent_source("llm")
+    return intent
+
+
+# ─────────────────────────────────────────────
+# POST-INTERACTION JOBS
+# ─────────────────────────────────────────────
+
+def queue_post_interaction(
+    db: Session,
+    userID: str,
+    user_message: str,
+    ai_response: str,
+    module: str,
+) -> None:
+    """Hand logging and learning off to the job queue so the reply isn't delayed."""
+    try:
+        enqueue_job(db, "save_interaction", {
+            "userID": userID,
+            "user_message": user_message,
+            "qareeb_response": ai_response,
+            "module": module,
+            "intent_source": current_intent_source(),
+        })
+    except Exception as e:
+        # The command itself succeeded; losing its history is not worth failing the reply
+        logger.exception("queue_post_interaction: could not queue for userID=%s, error=%s", userID, e)
+
+
+@job_handler("save_interaction")
+async def _save_interaction_job(db: Session, payload: dict) -> None:
+    # Chained rather than combined so a retry of the learning step never
+    # inserts the Prompts row twice. Queued in the same transaction as that
+    # row (save_interaction commits both): a failure rolls back the pair and
+    # this job retries, so the learning step is never lost
+    enqueue_job(db, "learn_from_interaction", payload, commit=False)
+    save_interaction(
+        db=db,
+        userID=payload["userID"],
+        user_message=payload["user_message"],
+        qareeb_response=payload["qareeb_response"],
+        intent=payload["module"],
+        module=payload["module"],
+        raise_errors=True,
+        intent_source=payload.get("intent_source"),
+    )
+
+
+@job_handler("learn_from_interaction")
+async def _learn_from_interaction_job(db: Session, payload: dict) -> None:
+    userID = payload["userID"]
+    memories = get_user_memories(db, userID)
+    with STAGE_SECONDS.time(pipeline="learn_from_interaction", stage="memory_extraction"):
+        new_facts = await extract_memory_facts(
+            f"User: {payload['user_message']}\nQareeb: {payload['qareeb_response']}",
+            memories,
+            raise_errors=True,
+        )
+    with STAGE_SECONDS.time(pipeline="learn_from_interaction", stage="memory_save"):
+        await save_memory_facts(db, userID, new_facts)
+
+    # Run behavioral analysis every 10 interactions
+    with STAGE_SECONDS.time(pipeline="learn_from_interaction", stage="behavior_analysis"):
+        await run_behavioral_analysis_if_needed(db, userID)
 
 
 # ─────────────────────────────────────────────
 # FINANCE
 # ─────────────────────────────────────────────
 
-def extract_finance_data(text: str, memory_context: str = "") -> dict:
-    schema_json = FinanceRecord.model_json_schema()
-    prompt = f"""
-You are a financial data extraction assistant.
-{memory_context}
-
-User request: "{text}"
-
-Extract:
-- transactionID: null for new transactions
-- amount: numeric float
-- date: YYYY-MM-DD (today if not specified)
-- source: where money came from/went
-- description: what the transaction is about
-- income: true if income, false if expense
-- state: "pending", "completed", or "cancelled"
-- category_name: category
-- is_deleted: false
-
-Output ONLY valid JSON matching this schema:
-{json.dumps(schema_json, indent=2)}
-"""
-    models = ["openai/gpt-oss-120b", FALLBACK_MODEL]
-    last_err = None
-    for model_name in models:
-        try:
-            completion = groq_client.chat.completions.create(
-                model=model_name,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0,
-                max_completion_tokens=512,
-                top_p=1,
-                stream=False,
-            )
-            raw = completion.choices[0].message.content
-            if not raw or not raw.strip():
-                logger.warning("extract_finance_data: empty response from %s, trying fallback", model_name)
-                continue
-            response_text = _strip_code_fences(raw.strip())
-            data = _safe_json_loads(response_text)
-            validated = FinanceRecord(**data)
-            return validated.model_dump(exclude_none=True)
-        except Exception as e:
-            logger.warning("extract_finance_data: %s failed: %s", model_name, e)
-            last_err = e
-    raise last_err or ValueError("All models returned empty responses for finance extraction")
-
-
-async def handle_finance_service(text: str, userID: str, db: Session) -> dict:
+async def extract_finance_data(text: str, memory_context: str = "") -> dict:
+    prompt = render_prompt(
+        "finance_extraction",
+        date_context=get_date_context(),
+        memory_context=memory_context,
+        text=text,
+    )
+    return await _extract_with_fallback(
+        "extract_finance_data",
+        prompt,
+        lambda data: FinanceRecord(**data).model_dump(exclude_none=True),
+        schema=FinanceRecord,
+    )
+
+
+@traced()
+async def handle_finance_service(
+    text: str,
+    userID: str,
+    db: Session,
+    prefetched: dict | None = None,
+) -> dict:
     logger.info("handle_finance_service: starting, userID=%s", userID)
+    set_attribute("userID", userID)
     if not userID or not userID.strip():
         return {"success": False, "error": "userID is required"}
     try:
-        memories = get_user_memories(db, userID)
+        memories = await select_relevant_memories(db, userID, get_last_user_message(text))
         memory_context = build_memory_context(memories)
-        logger.info("handle_finance_service: loaded %d memories", len(memories))
+        logger.info("handle_finance_service: loaded %d relevant memories", len(memories))
 
-        finance_data = extract_finance_data(text, memory_context)
+        if prefetched:
+            finance_data = dict(prefetched)
+        else:
+            with STAGE_SECONDS.time(pipeline="handle_finance_service", stage="extraction"):
+                finance_data = await extract_finance_data(text, memory_context)
+        emit_event("extraction", {"module": "FINANCE", "data": dict(finance_data)})
         if not finance_data.get("transactionID"):
             finance_data["transactionID"] = str(uuid.uuid4())
         finance_data["userID"] = userID.strip()
 
-        controller_result = create_transaction_controller(finance_data, db)
+        with STAGE_SECONDS.time(pipeline="handle_finance_service", stage="db_insert"):
+            controller_result = create_transaction_controller(finance_data, db)
+        emit_event("db_write", {"table": "Transaction", "transactionID": finance_data["transactionID"]})
 
         clean_text = get_last_user_message(text)
         ai_response = f"Recorded transaction: {finance_data.get('description', '')}"
 
-        # Save interaction to prompts table
-        save_interaction(
-            db=db,
-            userID=userID,
-            user_message=clean_text,
-            qareeb_response=ai_response,
-            intent="FINANCE",
-            module="FINANCE",
-        )
-
-        # Extract explicit memories
-        new_facts = extract_memory_facts(
-            f"User: {clean_text}\nQareeb: {ai_response}",
-            memories
-        )
-        save_memory_facts(db, userID, new_facts)
-
-        # Run behavioral analysis every 5 interactions
-        await run_behavioral_analysis_if_needed(db, userID)
+        # Logging, memory extraction and behavioral analysis run after the reply
+        queue_post_interaction(db, userID, clean_text, ai_response, "FINANCE")
 
         return {"success": True, "data": controller_result}
     except Exception as e:
@@ -353,131 +320,127 @@ async def handle_finance_service(text: str, userID: str, db: Session) -> dict:
 # TASK TRACKER
 # ─────────────────────────────────────────────
 
-FALLBACK_MODEL = "llama-3.3-70b-versatile"
-
-
-def extract_task_data(text: str, memory_context: str = "") -> dict:
-    schema_json = TaskRecord.model_json_schema()
-    date_context = get_date_context()
-    prompt = f"""
-You are a task extraction assistant.
-{date_context}
-{memory_context}
-
-IMPORTANT: Use ONLY the exact dates listed above. Do NOT calculate dates yourself.
-User request: "{text}"
-
-Extract:
-- title: short 2-4 words
-- description: one natural sentence
-- status: default "pending"
-- progressPercentage: default 0
-- priority: default "medium"
-- dueDate: exact date from above only
-- is_deleted: false
-
-If memory says user has a recurring schedule for this task type,
-use that day's date automatically even if user didn't specify.
-
-Output ONLY valid JSON matching this schema:
-{json.dumps(schema_json, indent=2)}
-"""
-    models = ["openai/gpt-oss-120b", FALLBACK_MODEL]
-    last_err = None
-    for model_name in models:
-        try:
-            completion = groq_client.chat.completions.create(
-                model=model_name,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0,
-                max_completion_tokens=512,
-                top_p=1,
-                stream=False,
-            )
-            raw = completion.choices[0].message.content
-            if not raw or not raw.strip():
-                logger.warning("extract_task_data: empty response from %s, trying fallback", model_name)
-                continue
-            response_text = _strip_code_fences(raw.strip())
-            data = _safe_json_loads(response_text)
-            validated = TaskRecord(**data)
-            return validated.model_dump(exclude_none=True)
-        except Exception as e:
-            logger.warning("extract_task_data: %s failed: %s", model_name, e)
-            last_err = e
-    raise last_err or ValueError("All models returned empty responses for task extraction")
-
-
-def extract_task_update_data(
+
+async def extract_task_data(text: str, memory_context: str = "") -> dict:
+    prompt = render_prompt(
+        "task_extraction",
+        date_context=get_date_context(),
+        memory_context=memory_context,
+        text=text,
+    )
+    return await _extract_with_fallback(
+        "extract_task_data",
+        prompt,
+        lambda data: TaskRecord(**data).model_dump(exclude_none=True),
+        schema=TaskRecord,
+    )
+
+
+async def extract_task_update_data(
     text: str,
     conversation_history: str,
     memory_context: str = ""
 ) -> dict:
-    date_context = get_date_context()
-    prompt = f"""
-You are a task update assistant.
-{date_context}
-{memory_context}
-
-Recent conversation:
-{conversation_history}
-
-User's update request: "{text}"
-
-1. Identify which task title they mean from conversation
-2. Extract ONLY the fields they want to change
-
-Rules:
-- Only include explicitly changed fields
-- "mark as done" → status="completed", progressPercentage=100
-- "delete it" → is_deleted=true
-- target_title: infer from conversation
-
-Output ONLY:
-{{
-  "target_title": "Task Title Here",
-  "changes": {{
-    "dueDate": "2026-05-21"
-  }}
-}}
-"""
-    models = ["openai/gpt-oss-120b", FALLBACK_MODEL]
-    last_err = None
-    for model_name in models:
-        try:
-            completion = groq_client.chat.completions.create(
-                model=model_name,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0,
-                max_completion_tokens=512,
-                top_p=1,
-                stream=False,
-            )
-            raw = completion.choices[0].message.content
-            if not raw or not raw.strip():
-                logger.warning("extract_task_update_data: empty response from %s, trying fallback", model_name)
-                continue
-            response_text = _strip_code_fences(raw.strip())
-            return _safe_json_loads(response_text)
-        except Exception as e:
-            logger.warning("extract_task_update_data: %s failed: %s", model_name, e)
-            last_err = e
-    raise last_err or ValueError("All models returned empty responses for task update extraction")
-
-async def handle_suggestion_check(userID: str, db: Session) -> dict | None:
+    prompt = render_prompt(
+        "task_update_extraction",
+        date_context=get_date_context(),
+        memory_context=memory_context,
+        conversation_history=conversation_history,
+        text=text,
+    )
+    return await _extract_with_fallback("extract_task_update_data", prompt, lambda data: data)
+
+
+# ─────────────────────────────────────────────
+# FUSED INTENT + EXTRACTION
+# ─────────────────────────────────────────────
+
+@traced()
+async def extract_intent_and_data(text: str, memory_context: str = "") -> tuple[str, dict | None] | None:
+    """
+    Classify the request and extract its TaskRecord/FinanceRecord in one call.
+    Returns (intent, payload) where payload is None if it did not validate,
+    or None when the completion itself is unusable.
+    """
+    prompt = render_prompt(
+        "fused_extraction",
+        date_context=get_date_context(),
+        memory_context=memory_context,
+        text=text,
+    )
+    try:
+        data = await chat_completion_json(prompt, model=DEFAULT_MODEL, max_completion_tokens=768)
+        if not isinstance(data, dict):
+            raise ValueError("expected a JSON object")
+    except Exception as e:
+        logger.warning("extract_intent_and_data: fused call failed: %s", e)
+        return None
+
+    intent = str(data.get("intent", "")).strip().upper()
+    if intent not in LABELS:
+        logger.warning("extract_intent_and_data: invalid intent=%r", intent)
+        return None
+
+    try:
+        if intent == "TASK_TRACKER" and data.get("task"):
+            task = TaskRecord(**data["task"])
+            if task.title:
+                return intent, task.model_dump(exclude_none=True)
+        elif intent == "FINANCE" and data.get("finance"):
+            finance = FinanceRecord(**data["finance"])
+            if finance.amount is not None:
+                return intent, finance.model_dump(exclude_none=True)
+    except Exception as e:
+        logger.warning("extract_intent_and_data: payload failed validation: %s", e)
+
+    # Intent is still usable; the service extracts the payload itself
+    return intent, None
+
+
+@traced()
+async def resolve_intent(text: str, memory_context: str = "") -> tuple[str, dict | None]:
+    """
+    Return (intent, prefetched payload). The payload is only filled in fused
+    mode; otherwise, or when the fused result is unusable, it is the plain
+    two-step path and services extract their own data.
+    """
+    if AI_FUSED_EXTRACTION:
+        _, confidence = classify_intent_locally(text)
+        # A confident local label is cheaper than any LLM call, fused or not
+        if confidence < INTENT_LOCAL_THRESHOLD:
+            fused = await extract_intent_and_data(text, memory_context)
+            if fused is not None:
+                logger.info(
+                    "resolve_intent: fused intent=%s, prefetched=%s",
+                    fused[0], fused[1] is not None
+                )
+                note_intent_source("llm")
+                return fused
+            logger.info("resolve_intent: fused mode failed, falling back to two-step")
+    return await extract_intent(text), None
+
+
+@traced()
+async def handle_suggestion_check(
+    userID: str,
+    db: Session,
+    memories: list[str] | None = None,
+) -> dict | None:
     """
     Called on every interaction to check if Qareeb should
     proactively suggest a task based on user memories.
+    Pass already-loaded memories to skip the extra query.
     Returns suggestion dict if there's something to suggest, None otherwise.
     """
     try:
         from app.services.suggestion import get_upcoming_suggestions
-        memories = get_user_memories(db, userID)
+        if memories is None:
+            memories = get_user_memories(db, userID)
         if not memories:
             logger.info("handle_suggestion_check: no memories for userID=%s", userID)
             return None
 
-        suggestion = get_upcoming_suggestions(db, userID, memories)
+        suggestion = await get_upcoming_suggestions(db, userID, memories)
         if suggestion:
             logger.info(
                 "handle_suggestion_check: suggestion found for userID=%s: %r",
@@ -492,8 +455,15 @@ async def handle_suggestion_check(userID: str, db: Session) -> dict | None:
     except Exception as e:
         logger.exception("handle_suggestion_check: error=%s", e)
         return None
-async def handle_task_tracker_service(text: str, userID: str, db: Session) -> dict:
+@traced()
+async def handle_task_tracker_service(
+    text: str,
+    userID: str,
+    db: Session,
+    prefetched: dict | None = None,
+) -> dict:
     logger.info("handle_task_tracker_service: starting, userID=%s", userID)
+    set_attribute("userID", userID)
     if not userID or not userID.strip():
         return {"success": False, "error": "userID is required"}
 
@@ -502,22 +472,24 @@ async def handle_task_tracker_service(text: str, userID: str, db: Session) -> di
         conversation_history = get_conversation_history(text)
         is_update = _is_update_request(clean_text)
 
-        memories = get_user_memories(db, userID)
+        memories = await select_relevant_memories(db, userID, clean_text)
         memory_context = build_memory_context(memories)
         logger.info(
-            "handle_task_tracker_service: loaded %d memories: %s",
+            "handle_task_tracker_service: loaded %d relevant memories: %s",
             len(memories), memories
         )
 
         # ── UPDATE ───────────────────────────────────────────────────────
         if is_update:
             logger.info("handle_task_tracker_service: routing to UPDATE flow")
-            update_data = extract_task_update_data(
-                clean_text, conversation_history, memory_context
-            )
+            with STAGE_SECONDS.time(pipeline="handle_task_tracker_service", stage="update_extraction"):
+                update_data = await extract_task_update_data(
+                    clean_text, conversation_history, memory_context
+                )
             target_title = update_data.get("target_title")
             changes = update_data.get("changes", {})
 
+            emit_event("extraction", {"module": "TASK_TRACKER", "data": dict(update_data)})
             if not changes:
                 return {"success": False, "error": "No changes detected"}
 
@@ -550,14 +522,12 @@ async def handle_task_tracker_service(text: str, userID: str, db: Session) -> di
 
             task_id = str(task_row["taskID"])
             changes["updated_at"] = datetime.now(timezone.utc).isoformat()
-            updated_task = update_task_service(db, task_id, changes)
+            with STAGE_SECONDS.time(pipeline="handle_task_tracker_service", stage="db_update"):
+                updated_task = update_task_service(db, task_id, changes)
+            emit_event("db_write", {"table": "Task", "taskID": task_id})
 
             ai_response = f"Updated task '{task_row['title']}': {changes}"
-            save_interaction(db=db, userID=userID, user_message=clean_text,
-                           qareeb_response=ai_response, intent="TASK_TRACKER", module="TASK_TRACKER")
-            new_facts = extract_memory_facts(f"User: {clean_text}\nQareeb: {ai_response}", memories)
-            save_memory_facts(db, userID, new_facts)
-            await run_behavioral_analysis_if_needed(db, userID)
+            queue_post_interaction(db, userID, clean_text, ai_response, "TASK_TRACKER")
 
             return {"success": True, "data": {"task": updated_task}}
 
@@ -576,20 +546,23 @@ async def handle_task_tracker_service(text: str, userID: str, db: Session) -> di
                 )
                 return {"success": False, "error": "No task context provided"}
 
-            task_data = extract_task_data(clean_text, memory_context)
+            if prefetched:
+                task_data = dict(prefetched)
+            else:
+                with STAGE_SECONDS.time(pipeline="handle_task_tracker_service", stage="extraction"):
+                    task_data = await extract_task_data(clean_text, memory_context)
+            emit_event("extraction", {"module": "TASK_TRACKER", "data": dict(task_data)})
             task_data["userID"] = userID.strip()
             task_data["created_at"] = datetime.now(timezone.utc).isoformat()
             task_data["updated_at"] = datetime.now(timezone.utc).isoformat()
 
-            controller_result = create_task_controller(task_data, db)
+            with STAGE_SECONDS.time(pipeline="handle_task_tracker_service", stage="db_insert"):
+                controller_result = create_task_controller(task_data, db)
+            emit_event("db_write", {"table": "Task", "title": task_data.get("title")})
             task_title = task_data.get("title", "")
             ai_response = f"Created task: {task_title}"
 
-            save_interaction(db=db, userID=userID, user_message=clean_text,
-                           qareeb_response=ai_response, intent="TASK_TRACKER", module="TASK_TRACKER")
-            new_facts = extract_memory_facts(f"User: {clean_text}\nQareeb: {ai_response}", memories)
-            save_memory_facts(db, userID, new_facts)
-            await run_behavioral_analysis_if_needed(db, userID)
+            queue_post_interaction(db, userID, clean_text, ai_response, "TASK_TRACKER")
 
             return {"success": True, "data": controller_result}
 
@@ -0,0 +1,462 @@
+"""
+ASR model manager and transcription workers.
+
+The engine (ASR_ENGINE, see app.services.asr_engines) is loaded once per
+process, on first use or by a background warmup started after the app is
+up, so importing the app (and every --reload restart) no longer pays for
+torch and the weights.
+
+With ASR_WORKERS > 0, decoding runs in a pool of worker processes that each
+hold a preloaded model, so a transcription uses another core instead of
+blocking the event loop. ASR_WORKERS=0 decodes in a thread of this process.
+
+Requests arriving within ASR_BATCH_WINDOW_MS of each other are decoded
+together; the whisper engine does one log-mel computation and one
+encoder/decoder pass per batch.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Awaitable, Callable
+
+import numpy as np
+
+from app.services.asr_engines import ASREngine, create_engine
+from app.services.metrics import ASR_BATCH_SIZE, ASR_REJECTED
+
+logger = logging.getLogger(__name__)
+
+# whisper (openai-whisper, fp32) or faster-whisper (CTranslate2, quantized)
+ASR_ENGINE = os.environ.get("ASR_ENGINE", "whisper").lower()
+ASR_MODEL = os.environ.get("ASR_MODEL", "base")
+# faster-whisper weight precision: int8, int8_float32, float32, ...
+ASR_COMPUTE_TYPE = os.environ.get("ASR_COMPUTE_TYPE", "int8")
+# Shared weights directory, so workers and hosts don't each download a copy
+ASR_MODEL_DIR = os.environ.get("ASR_MODEL_DIR") or None
+# lazy: load on the first transcription
+# background: start loading in a thread at app startup (default)
+# preload: load while app.main is imported; forked children (gunicorn
+#          --preload, or ASR_START_METHOD=fork) share the parent's copy
+ASR_LOAD_MODE = os.environ.get("ASR_LOAD_MODE", "background").lower()
+# Run one short decode after loading so the first real request is not the slow one
+ASR_WARMUP_DECODE = os.environ.get("ASR_WARMUP_DECODE", "true").lower() in ("1", "true", "yes")
+ASR_LANGUAGE = os.environ.get("ASR_LANGUAGE", "en")
+
+ASR_WORKERS = int(os.environ.get("ASR_WORKERS", min(2, os.cpu_count() or 1)))
+# Requests allowed in flight (running + waiting) before new ones get a 503
+ASR_QUEUE_SIZE = int(os.environ.get("ASR_QUEUE_SIZE", 4 * max(ASR_WORKERS, 1)))
+ASR_TIMEOUT = float(os.environ.get("ASR_TIMEOUT", 60.0))
+# torch / CTranslate2 threads per worker; 0 splits the cores evenly between workers
+ASR_THREADS_PER_WORKER = int(os.environ.get("ASR_THREADS_PER_WORKER", 0))
+# spawn avoids forking a parent that already has torch threads running
+ASR_START_METHOD = os.environ.get("ASR_START_METHOD", "spawn")
+# Most requests decoded in one forward pass; 1 turns batching off
+ASR_BATCH_MAX = int(os.environ.get("ASR_BATCH_MAX", 4))
+# How long the first request of a batch waits for others to join it
+ASR_BATCH_WINDOW_MS = float(os.environ.get("ASR_BATCH_WINDOW_MS", 30))
+
+
+def load_engine(name: str, download_root: str | None = None) -> ASREngine:
+    engine = create_engine(ASR_ENGINE, name, download_root, ASR_LANGUAGE, ASR_COMPUTE_TYPE)
+    if ASR_WARMUP_DECODE:
+        engine.transcribe(np.zeros(16000, dtype=np.float32))
+    return engine
+
+
+class ASRModelManager:
+    """
+    Owns the process's ASR engine. Concurrent callers during a load all
+    wait for the same load instead of starting their own.
+    """
+
+    def __init__(
+        self,
+        name: str = ASR_MODEL,
+        download_root: str | None = ASR_MODEL_DIR,
+        loader: Callable[[str, str | None], Any] = load_engine,
+    ):
+        self.name = name
+        self.download_root = download_root
+        self._loader = loader
+        self.state = "unloaded"  # unloaded | loading | ready | failed
+        self.error: str | None = None
+        self.load_seconds: float | None = None
+        self._model: Any = None
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def get(self) -> Any:
+        """The loaded engine, loading it now if needed. Raises if loading failed."""
+        if self._model is not None:
+            return self._model
+        with self._lock:
+            if self._model is None:
+                self._load()
+        return self._model
+
+    def _load(self) -> None:
+        self.state = "loading"
+        started = time.perf_counter()
+        logger.info("asr: loading %s model=%s", ASR_ENGINE, self.name)
+        try:
+            model = self._loader(self.name, self.download_root)
+        except Exception as e:
+            self.state = "failed"
+            self.error = f"{type(e).__name__}: {e}"
+            logger.exception("asr: failed to load %s model=%s", ASR_ENGINE, self.name)
+            raise RuntimeError(f"ASR model failed to load: {e}") from e
+        self._model = model
+        self.load_seconds = round(time.perf_counter() - started, 2)
+        self.state = "ready"
+        self.error = None
+        logger.info("asr: %s model=%s ready in %.2fs", ASR_ENGINE, self.name, self.load_seconds)
+
+    def warmup(self) -> None:
+        """Load in a daemon thread; returns immediately. Safe to call repeatedly."""
+        if self._model is not None or (self._thread is not None and self._thread.is_alive()):
+            return
+
+        def load():
+            try:
+                self.get()
+            except RuntimeError:
+                pass  # already logged; the next request retries
+
+        self._thread = threading.Thread(target=load, name="asr-warmup", daemon=True)
+        self._thread.start()
+
+    def status(self) -> dict:
+        return {
+            "engine": ASR_ENGINE,
+            "model": self.name,
+            "state": self.state,
+            "load_seconds": self.load_seconds,
+            "error": self.error,
+        }
+
+
+asr_model = ASRModelManager()
+
+
+def transcribe(audio: str | np.ndarray) -> str:
+    """Blocking transcription of a file or 16 kHz float32 samples with this process's engine."""
+    return asr_model.get().transcribe(audio)
+
+
+def transcribe_batch(items: list[str | np.ndarray]) -> list:
+    """
+    Blocking transcription of several files or sample arrays with this
+    process's engine. Returns one entry per item: the text, or the
+    exception for a file that could not be read.
+    """
+    engine = asr_model.get()
+    if len(items) == 1:
+        return [engine.transcribe(items[0])]
+
+    results: list = [None] * len(items)
+    clips: dict[int, np.ndarray] = {}
+    for i, item in enumerate(items):
+        try:
+            clips[i] = item if isinstance(item, np.ndarray) else engine.load_audio(item)
+        except Exception as e:
+            results[i] = e
+    if clips:
+        for i, text in zip(clips, engine.transcribe_batch(list(clips.values()))):
+            results[i] = text
+    return results
+
+
+# ─────────────────────────────────────────────
+# WORKER PROCESSES
+# ─────────────────────────────────────────────
+
+class ASRBusyError(RuntimeError):
+    """Every worker is busy and the queue is full; the caller should retry later."""
+
+
+class ASRTimeoutError(TimeoutError):
+    """A transcription did not finish within ASR_TIMEOUT."""
+
+
+def _init_worker(name: str, download_root: str | None, threads: int) -> None:
+    """Runs once in each worker process: pin threads, load the model."""
+    if threads > 0:
+        os.environ["OMP_NUM_THREADS"] = str(threads)  # read by CTranslate2
+        if ASR_ENGINE == "whisper":
+            import torch
+            torch.set_num_threads(threads)
+    global asr_model
+    if not asr_model.ready:
+        # Spawned, or forked before a preload: load our own copy
+        asr_model = ASRModelManager(name, download_root)
+    try:
+        asr_model.get()
+    except RuntimeError:
+        pass  # an exception here would break the whole pool; jobs retry the load
+
+
+def _worker_ready() -> int:
+    asr_model.get()
+    return os.getpid()
+
+
+class ASRWorkerPool:
+    """
+    Process pool with a bounded queue. Requests beyond queue_size are
+    rejected with ASRBusyError instead of piling up behind a slow decode.
+    A request that times out stops being awaited, but a decode that has
+    already started keeps its worker until it finishes.
+    """
+
+    def __init__(
+        self,
+        workers: int = ASR_WORKERS,
+        queue_size: int = ASR_QUEUE_SIZE,
+        timeout: float = ASR_TIMEOUT,
+        start_method: str = ASR_START_METHOD,
+        initializer: Callable[..., None] = _init_worker,
+        initargs: tuple | None = None,
+        ready_check: Callable[[], int] = _worker_ready,
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.start_method = start_method
+        self._initializer = initializer
+        threads = ASR_THREADS_PER_WORKER or max(1, (os.cpu_count() or 1) // max(workers, 1))
+        self._initargs = initargs if initargs is not None else (ASR_MODEL, ASR_MODEL_DIR, threads)
+        self._ready_check = ready_check
+        self._executor: ProcessPoolExecutor | None = None
+        self._in_flight = 0
+        self._ready_pids: set[int] = set()
+        self.error: str | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._ready_pids)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=self._initializer,
+                initargs=self._initargs,
+            )
+            executor = self._executor
+        logger.info("asr: starting %d worker processes (%s)", self.workers, self.start_method)
+        # One ping per worker spawns them now and marks them ready once loaded
+        for _ in range(self.workers):
+            executor.submit(self._ready_check).add_done_callback(self._on_ready)
+
+    def _on_ready(self, future) -> None:
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.error = f"{type(future.exception()).__name__}: {future.exception()}"
+            logger.error("asr: worker failed to load the model: %s", self.error)
+            return
+        self.error = None
+        self._ready_pids.add(future.result())
+        logger.info("asr: worker pid=%s ready (%d/%d)", future.result(), len(self._ready_pids), self.workers)
+
+    async def run(self, func: Callable[..., Any], *args: Any, weight: int = 1) -> Any:
+        """
+        Run func(*args) in a worker, subject to the queue bound and timeout.
+        weight is how many transcriptions the call carries (a batch counts
+        each of its requests); a call on an idle pool is never rejected.
+        """
+        with self._lock:
+            if self._in_flight and self._in_flight + weight > self.queue_size:
+                ASR_REJECTED.inc(weight, reason="busy")
+                raise ASRBusyError(f"{self._in_flight} transcriptions in flight")
+            self._in_flight += weight
+        try:
+            if self._executor is None:
+                self.start()
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._release(weight)
+            raise
+        # The slot is held until the worker is actually done, not until this
+        # caller stops waiting: a timed-out or cancelled decode keeps running
+        future.add_done_callback(lambda _: self._release(weight))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()  # only helps if it hasn't started yet
+            ASR_REJECTED.inc(weight, reason="timeout")
+            raise ASRTimeoutError(f"transcription exceeded {self.timeout:.0f}s") from None
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); replace the pool for the next request
+            logger.exception("asr: worker pool broken, restarting")
+            self._restart()
+            raise
+
+    def _release(self, weight: int) -> None:
+        with self._lock:
+            self._in_flight -= weight
+
+    def _restart(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._ready_pids.clear()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self.start()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def status(self) -> dict:
+        return {
+            "mode": "process",
+            "workers": self.workers,
+            "ready_workers": len(self._ready_pids),
+            "in_flight": self._in_flight,
+            "queue_size": self.queue_size,
+            "error": self.error,
+        }
+
+
+asr_pool = ASRWorkerPool() if ASR_WORKERS > 0 else None
+
+
+class ASRBatcher:
+    """
+    Collects transcriptions that arrive within window_ms of the first one,
+    up to max_batch, hands them to run_batch in one call and gives each
+    caller its own result. Several batches may be in flight at once.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[list], Awaitable[list]],
+        max_batch: int = ASR_BATCH_MAX,
+        window_ms: float = ASR_BATCH_WINDOW_MS,
+    ):
+        self._run_batch = run_batch
+        self.max_batch = max_batch
+        self.window = window_ms / 1000
+        self._pending: list[tuple[str | np.ndarray, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, audio: str | np.ndarray) -> str:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((audio, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # Callers that gave up while waiting don't take a slot in the batch
+        batch = [(audio, future) for audio, future in self._pending if not future.done()]
+        self._pending = []
+        if batch:
+            task = asyncio.ensure_future(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: list[tuple[str | np.ndarray, asyncio.Future]]) -> None:
+        ASR_BATCH_SIZE.observe(len(batch))
+        try:
+            results = await self._run_batch([audio for audio, _ in batch])
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+async def _run_batch(items: list[str | np.ndarray]) -> list:
+    if asr_pool is not None:
+        return await asr_pool.run(transcribe_batch, items, weight=len(items))
+    return await asyncio.to_thread(transcribe_batch, items)
+
+
+asr_batcher = ASRBatcher(_run_batch) if ASR_BATCH_MAX > 1 else None
+
+
+async def transcribe_async(audio: str | np.ndarray) -> str:
+    """
+    Transcribe a file or 16 kHz float32 samples without blocking the event
+    loop: in a worker process, or in a thread when ASR_WORKERS=0, batched
+    with concurrent requests.
+    """
+    if asr_batcher is not None:
+        return await asr_batcher.submit(audio)
+    if asr_pool is not None:
+        return await asr_pool.run(transcribe, audio)
+    return await asyncio.to_thread(transcribe, audio)
+
+
+def transcript_tag() -> str:
+    """
+    What the configured engine would produce, for keying cached transcripts;
+    same format as ASREngine.tag plus the language. Workers load the engine,
+    so this is built from the settings rather than the loaded model.
+    """
+    compute = f":{ASR_COMPUTE_TYPE}" if ASR_ENGINE == "faster-whisper" else ""
+    return f"{ASR_ENGINE}:{ASR_MODEL}{compute}:{ASR_LANGUAGE}"
+
+
+def asr_ready() -> bool:
+    return asr_pool.ready if asr_pool is not None else asr_model.ready
+
+
+def asr_status() -> dict:
+    return asr_pool.status() if asr_pool is not None else {"mode": "thread", **asr_model.status()}
+
+
+def start_asr() -> None:
+    """Called at app startup; honours ASR_LOAD_MODE."""
+    if asr_pool is not None:
+        if ASR_LOAD_MODE != "lazy":
+            asr_pool.start()
+    elif ASR_LOAD_MODE in ("background", "preload"):
+        asr_model.warmup()
+
+
+def stop_asr() -> None:
+    if asr_pool is not None:
+        asr_pool.shutdown()
+
+
+if ASR_LOAD_MODE == "preload" and multiprocessing.parent_process() is None:
+    try:
+        asr_model.get()
+    except RuntimeError:
+        pass
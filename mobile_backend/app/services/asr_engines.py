@@ -0,0 +1,174 @@
+"""
+Speech-to-text engines behind app.services.asr, chosen with ASR_ENGINE.
+Each wraps one loaded model and turns 16 kHz mono audio (or a file path)
+into text.
+
+    whisper          openai-whisper in fp32 (default, the reference output)
+    faster-whisper   CTranslate2 with int8 weights on CPU; needs the
+                     faster-whisper package, ASR_MODEL may name a converted
+                     model directory
+"""
+import logging
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ASREngine:
+    """One loaded model. Subclasses implement load_audio and transcribe."""
+
+    name = ""
+
+    def __init__(self, model_name: str, language: str):
+        self.model_name = model_name
+        self.language = language
+
+    @property
+    def tag(self) -> str:
+        """Identifies what produced a transcript, e.g. for caching."""
+        return f"{self.name}:{self.model_name}"
+
+    def load_audio(self, path: str) -> np.ndarray:
+        raise NotImplementedError
+
+    def transcribe(self, audio: str | np.ndarray) -> str:
+        raise NotImplementedError
+
+    def transcribe_batch(self, clips: list[np.ndarray]) -> list[str]:
+        """Engines without batched decoding run the clips one after another."""
+        return [self.transcribe(clip) for clip in clips]
+
+
+# ─────────────────────────────────────────────
+# OPENAI WHISPER
+# ─────────────────────────────────────────────
+
+def log_mel_batch(audio: "torch.Tensor", n_mels: int = 80) -> "torch.Tensor":
+    """
+    whisper.log_mel_spectrogram for a (batch, N_SAMPLES) tensor of 30 s
+    windows, in one STFT. Whisper's version clamps against the max of its
+    whole input, which would couple the clips; here each clip uses its own.
+    """
+    import torch
+    from whisper.audio import HOP_LENGTH, N_FFT, mel_filters
+
+    window = torch.hann_window(N_FFT, device=audio.device)
+    stft = torch.stft(audio, N_FFT, HOP_LENGTH, window=window, return_complex=True)
+    magnitudes = stft[..., :-1].abs() ** 2
+    log_spec = torch.clamp(mel_filters(audio.device, n_mels) @ magnitudes, min=1e-10).log10()
+    log_spec = torch.maximum(log_spec, log_spec.amax(dim=(-2, -1), keepdim=True) - 8.0)
+    return (log_spec + 4.0) / 4.0
+
+
+class WhisperEngine(ASREngine):
+    name = "whisper"
+
+    def __init__(self, model_name: str, download_root: str | None, language: str):
+        super().__init__(model_name, language)
+        import whisper
+
+        self.model = whisper.load_model(model_name, device="cpu", download_root=download_root)
+
+    def load_audio(self, path: str) -> np.ndarray:
+        import whisper
+
+        return whisper.load_audio(path)
+
+    def transcribe(self, audio: str | np.ndarray) -> str:
+        result = self.model.transcribe(audio, fp16=False, language=self.language)
+        return result["text"].strip()
+
+    def transcribe_batch(self, clips: list[np.ndarray]) -> list[str]:
+        """
+        One padded forward pass for the clips that fit in a 30 s window;
+        longer ones are transcribed alone.
+        """
+        from whisper.audio import N_SAMPLES
+
+        texts: list[str | None] = [None] * len(clips)
+        short = {}
+        for i, clip in enumerate(clips):
+            if len(clip) > N_SAMPLES:
+                texts[i] = self.transcribe(clip)
+            else:
+                short[i] = clip
+        if len(short) == 1:
+            [(i, clip)] = short.items()
+            texts[i] = self.transcribe(clip)
+        elif short:
+            for i, text in zip(short, self._decode_batch(list(short.values()))):
+                texts[i] = text
+        return texts
+
+    def _decode_batch(self, clips: list[np.ndarray]) -> list[str]:
+        import torch
+        import whisper
+
+        audio = torch.stack([whisper.pad_or_trim(torch.from_numpy(clip)) for clip in clips])
+        mel = log_mel_batch(audio, self.model.dims.n_mels)
+        options = whisper.DecodingOptions(language=self.language, fp16=False, without_timestamps=True)
+        texts = []
+        for clip, result in zip(clips, whisper.decode(self.model, mel, options)):
+            if result.no_speech_prob > 0.6 and result.avg_logprob < -1.0:
+                texts.append("")  # silence; model.transcribe drops these segments too
+            elif result.compression_ratio > 2.4 or result.avg_logprob < -1.0:
+                # Greedy decode looks degenerate: redo it with transcribe's temperature fallback
+                texts.append(self.transcribe(clip))
+            else:
+                texts.append(result.text.strip())
+        return texts
+
+
+# ─────────────────────────────────────────────
+# FASTER-WHISPER (CTRANSLATE2)
+# ─────────────────────────────────────────────
+
+class FasterWhisperEngine(ASREngine):
+    name = "faster-whisper"
+
+    def __init__(self, model_name: str, download_root: str | None, language: str, compute_type: str = "int8"):
+        super().__init__(model_name, language)
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise RuntimeError("ASR_ENGINE=faster-whisper needs the faster-whisper package") from e
+
+        self.compute_type = compute_type
+        # Threads come from OMP_NUM_THREADS, set per worker by app.services.asr
+        self.model = WhisperModel(model_name, device="cpu", compute_type=compute_type, download_root=download_root)
+
+    @property
+    def tag(self) -> str:
+        return f"{self.name}:{self.model_name}:{self.compute_type}"
+
+    def load_audio(self, path: str) -> np.ndarray:
+        from faster_whisper import decode_audio
+
+        return decode_audio(path, sampling_rate=16000)
+
+    def transcribe(self, audio: str | np.ndarray) -> str:
+        # Greedy like openai-whisper's transcribe(), with the same temperature fallback
+        segments, _ = self.model.transcribe(audio, language=self.language, beam_size=1)
+        return "".join(segment.text for segment in segments).strip()
+
+
+ENGINES: dict[str, type[ASREngine]] = {
+    WhisperEngine.name: WhisperEngine,
+    FasterWhisperEngine.name: FasterWhisperEngine,
+}
+
+
+def create_engine(
+    engine: str,
+    model_name: str,
+    download_root: str | None,
+    language: str,
+    compute_type: str = "int8",
+) -> ASREngine:
+    if engine not in ENGINES:
+        raise ValueError(f"unknown ASR engine {engine!r}, expected one of {sorted(ENGINES)}")
+    kwargs: dict[str, Any] = {"compute_type": compute_type} if engine == FasterWhisperEngine.name else {}
+    logger.info("asr_engines: creating engine=%s model=%s", engine, model_name)
+    return ENGINES[engine](model_name, download_root, language, **kwargs)
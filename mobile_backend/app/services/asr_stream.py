@@ -0,0 +1,133 @@
+"""
+Incremental transcription of audio that is still being recorded.
+
+Audio is cut at the pauses the VAD finds and each finished segment is sent
+to the ASR workers straight away, so when the speaker stops only the last
+segment is left to decode.
+"""
+import os
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+import numpy as np
+
+from app.services import asr
+from app.services.vad import SAMPLE_RATE, VADEvent, VoiceActivityDetector, pcm16_to_float
+
+logger = logging.getLogger(__name__)
+
+# Shorter segments decode sooner but give Whisper less context
+ASR_STREAM_MIN_SEGMENT_MS = int(os.environ.get("ASR_STREAM_MIN_SEGMENT_MS", 2000))
+# An utterance is closed after this long even if nobody stops talking
+ASR_STREAM_MAX_SECONDS = float(os.environ.get("ASR_STREAM_MAX_SECONDS", 30))
+# Audio kept around speech so words aren't clipped at a cut
+ASR_STREAM_PAD_MS = int(os.environ.get("ASR_STREAM_PAD_MS", 200))
+# A client that sends nothing for this long is dropped, so a stalled
+# connection doesn't hold a socket and a transcriber forever
+ASR_STREAM_IDLE_SECONDS = float(os.environ.get("ASR_STREAM_IDLE_SECONDS", 15))
+
+
+class StreamingTranscriber:
+    """
+    Takes 16 kHz 16-bit mono PCM chunks from feed() and transcribes them
+    segment by segment in the background. ended turns true when the VAD
+    hears the end of the utterance; finish() then returns the full text.
+    """
+
+    def __init__(
+        self,
+        transcribe: Callable[[np.ndarray], Awaitable[str]] | None = None,
+        vad: VoiceActivityDetector | None = None,
+        min_segment_ms: int = ASR_STREAM_MIN_SEGMENT_MS,
+        max_seconds: float = ASR_STREAM_MAX_SECONDS,
+        pad_ms: int = ASR_STREAM_PAD_MS,
+    ):
+        self._transcribe = transcribe or asr.transcribe_async
+        self.vad = vad or VoiceActivityDetector()
+        self._min_segment = SAMPLE_RATE * min_segment_ms // 1000
+        self._max_samples = int(SAMPLE_RATE * max_seconds)
+        self._pad = SAMPLE_RATE * pad_ms // 1000
+        self._chunks: list[np.ndarray] = []
+        self._audio: np.ndarray | None = np.zeros(0, dtype=np.float32)
+        self._odd_byte = b""
+        self.samples = 0
+        self._cut = 0  # start of the audio not yet sent for decoding
+        self._speech_end: int | None = None
+        self._segments: list[asyncio.Task] = []
+        self.ended = False
+
+    @property
+    def audio(self) -> np.ndarray:
+        """Everything received so far, as float32 samples."""
+        if self._audio is None:
+            self._audio = np.concatenate(self._chunks)
+            self._chunks = [self._audio]
+        return self._audio
+
+    @property
+    def heard_speech(self) -> bool:
+        return self.vad.heard_speech
+
+    def feed(self, pcm: bytes) -> list[VADEvent]:
+        pcm = self._odd_byte + pcm
+        # A chunk may split a sample; keep the stray byte for the next one
+        even = len(pcm) - len(pcm) % 2
+        self._odd_byte = pcm[even:]
+        chunk = pcm16_to_float(pcm[:even])
+        if not len(chunk):
+            return []
+        self._chunks.append(chunk)
+        self._audio = None
+        self.samples += len(chunk)
+
+        events = self.vad.feed(chunk)
+        for event in events:
+            if event.kind == "speech_start" and not self._segments:
+                # Skip the silence before the first word
+                self._cut = max(self._cut, event.sample - self._pad)
+            elif event.kind == "pause" and event.sample - self._cut >= self._min_segment:
+                self._submit(event.sample)
+            elif event.kind == "end":
+                self._speech_end = event.sample
+                self.ended = True
+        if self.samples >= self._max_samples:
+            self.ended = True
+        return events
+
+    def _submit(self, end: int) -> None:
+        segment = self.audio[self._cut:end]
+        self._cut = end
+        logger.info("asr_stream: decoding segment of %.2fs", len(segment) / SAMPLE_RATE)
+        self._segments.append(asyncio.ensure_future(self._transcribe(segment)))
+
+    def partial_text(self) -> str:
+        """Text of the segments decoded so far, up to the first one still running."""
+        texts = []
+        for task in self._segments:
+            if not task.done() or task.cancelled() or task.exception() is not None:
+                break
+            texts.append(task.result())
+        return " ".join(t for t in texts if t)
+
+    async def finish(self) -> str:
+        """Decode what's left after the last cut and return the whole transcript."""
+        if not self.heard_speech:
+            self.cancel()
+            return ""
+        if self._speech_end is None:
+            if self.samples > self._cut:
+                self._submit(self.samples)
+        elif self._speech_end > self._cut:
+            self._submit(min(self.samples, self._speech_end + self._pad))
+        # else: already sent at the pause that began the final silence
+        try:
+            texts = await asyncio.gather(*self._segments)
+        except BaseException:
+            self.cancel()
+            raise
+        return " ".join(t for t in texts if t).strip()
+
+    def cancel(self) -> None:
+        for task in self._segments:
+            task.cancel()
@@ -0,0 +1,65 @@
+"""
+Decoding uploaded audio to the 16 kHz mono float32 samples that Whisper and
+WavLM both take. Needs the ffmpeg CLI on PATH.
+"""
+import os
+import logging
+import tempfile
+import subprocess
+
+import numpy as np
+
+from app.services.tracing import set_attribute, traced
+from app.services.vad import SAMPLE_RATE, pcm16_to_float, trim_silence
+
+logger = logging.getLogger(__name__)
+
+
+def _ffmpeg(source: str, data: bytes | None, sample_rate: int) -> bytes:
+    cmd = [
+        "ffmpeg", *(["-nostdin"] if data is None else []), "-threads", "0", "-i", source,
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sample_rate), "-",
+    ]
+    try:
+        return subprocess.run(cmd, input=data, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise ValueError(f"Failed to decode audio: {e.stderr.decode(errors='replace')[-500:]}") from e
+
+
+@traced()
+def decode_audio(source: str | bytes, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode a file, or an upload's bytes, in any format ffmpeg reads,
+    down-mixed and resampled (same as whisper.load_audio). Bytes are piped
+    through ffmpeg's stdin. MP4/M4A files with their index at the end can't
+    be read from a pipe; those fall back to a temp file.
+    """
+    if isinstance(source, str):
+        return pcm16_to_float(_ffmpeg(source, None, sample_rate))
+    try:
+        return pcm16_to_float(_ffmpeg("pipe:0", source, sample_rate))
+    except ValueError:
+        logger.info("decode_audio: could not decode %d bytes from a pipe, retrying from a file", len(source))
+    fd, path = tempfile.mkstemp(prefix="qareeb_audio_")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(source)
+        return pcm16_to_float(_ffmpeg(path, None, sample_rate))
+    finally:
+        os.remove(path)
+
+
+def speech_only(audio: np.ndarray) -> np.ndarray | None:
+    """
+    The clip with leading and trailing silence cut off (a view, not a copy),
+    or None when it holds no speech at all.
+    """
+    speech = trim_silence(audio)
+    seconds = len(audio) / SAMPLE_RATE
+    set_attribute("audio_seconds", round(seconds, 2))
+    if speech is None:
+        logger.info("speech_only: no speech in %.2fs of audio", seconds)
+        return None
+    set_attribute("speech_seconds", round(len(speech) / SAMPLE_RATE, 2))
+    logger.info("speech_only: kept %.2fs of %.2fs", len(speech) / SAMPLE_RATE, seconds)
+    return speech
@@ -0,0 +1,163 @@
+"""
+Results computed from uploaded audio (transcripts, speaker scores), keyed
+by a hash of the upload's bytes. Phones retrying on a flaky network send
+the exact same clip again, and the retry shouldn't pay for Whisper and
+WavLM twice.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+
+from app.services.metrics import AUDIO_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+# Entries kept in memory; 0 turns the cache off
+AUDIO_CACHE_SIZE = int(os.environ.get("AUDIO_CACHE_SIZE", 1024))
+AUDIO_CACHE_TTL = float(os.environ.get("AUDIO_CACHE_TTL", 600))
+# Optional second tier on disk, shared by the workers of a host and kept across restarts
+AUDIO_CACHE_DIR = os.environ.get("AUDIO_CACHE_DIR") or None
+
+
+def audio_key(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class AudioResultCache:
+    """
+    In-memory LRU with a TTL, optionally backed by one JSON file per entry
+    under directory. Values must be JSON-serialisable. Disk entries are
+    removed when read after expiry, and by a sweep at most once per TTL.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = AUDIO_CACHE_SIZE,
+        ttl: float = AUDIO_CACHE_TTL,
+        directory: str | None = AUDIO_CACHE_DIR,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = directory
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = clock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: str, kind: str = "audio") -> Any | None:
+        if not self.enabled:
+            return None
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    AUDIO_CACHE_LOOKUPS.inc(kind=kind, outcome="hit")
+                    return entry[1]
+                del self._entries[key]
+
+        entry = self._read(key, now)
+        if entry is None:
+            AUDIO_CACHE_LOOKUPS.inc(kind=kind, outcome="miss")
+            return None
+        self._remember(key, entry)
+        AUDIO_CACHE_LOOKUPS.inc(kind=kind, outcome="disk_hit")
+        return entry[1]
+
+    def put(self, key: str, value: Any) -> None:
+        if not self.enabled:
+            return
+        entry = (self._clock() + self.ttl, value)
+        self._remember(key, entry)
+        self._write(key, entry)
+
+    def _remember(self, key: str, entry: tuple[float, Any]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # ── disk tier ──
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _read(self, key: str, now: float) -> tuple[float, Any] | None:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("audio_cache: unreadable entry %s, error=%s", path, e)
+            return None
+        if stored["expires"] <= now:
+            self._remove(path)
+            return None
+        return stored["expires"], stored["value"]
+
+    def _write(self, key: str, entry: tuple[float, Any]) -> None:
+        if self.directory is None:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Written aside and renamed, so other workers never read half a file
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"expires": entry[0], "value": entry[1]}, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning("audio_cache: could not write %s, error=%s", path, e)
+            return
+        written = entry[0] - self.ttl
+        if written - self._last_sweep > self.ttl:
+            self._last_sweep = written
+            threading.Thread(target=self.sweep, name="audio-cache-sweep", daemon=True).start()
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def sweep(self) -> int:
+        """Delete expired disk entries; returns how many."""
+        if self.directory is None:
+            return 0
+        now, removed = self._clock(), 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        expired = json.load(f)["expires"] <= now
+                except (OSError, ValueError, KeyError):
+                    expired = True
+                if expired:
+                    self._remove(path)
+                    removed += 1
+        if removed:
+            logger.info("audio_cache: swept %d expired entries from %s", removed, self.directory)
+        return removed
+
+
+audio_cache = AudioResultCache()
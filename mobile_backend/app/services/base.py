@@ -2,6 +2,8 @@ from typing import Any
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from app.services.tracing import set_attribute, traced
+
 
 def get_table_columns(db: Session, table_name: str) -> set[str]:
     # ✅ uses :table_name (colon style), NOT %(table_name)s (percent style)
@@ -24,8 +26,10 @@ def filter_payload(payload: dict[str, Any], allowed_columns: set[str]) -> dict[s
     return {k: v for k, v in payload.items() if k in allowed_columns}
 
 
+@traced()
 def insert_row(db: Session, table_name: str, payload: dict[str, Any]) -> dict[str, Any]:
     try:
+        set_attribute("db.table", table_name)
         columns = get_table_columns(db, table_name)
         columns.discard("id")
         data = filter_payload(payload, columns)
@@ -49,6 +53,7 @@ def insert_row(db: Session, table_name: str, payload: dict[str, Any]) -> dict[st
         raise
 
 
+@traced()
 def update_row(db: Session, table_name: str, task_id: str, payload: dict[str, Any]) -> dict[str, Any] | None:
     try:
         columns = get_table_columns(db, table_name)
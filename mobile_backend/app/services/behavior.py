@@ -1,13 +1,10 @@
-import json
 import logging
-from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 from sqlalchemy import text as sql_text
-from groq import Groq
-import os
+from app.services.llm import chat_completion_json, DEFAULT_MODEL
+from app.services.memory_index import insert_facts
 
 logger = logging.getLogger(__name__)
-groq_client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
 
 
 def get_recent_interactions(db: Session, userID: str, limit: int = 50) -> list[dict]:
@@ -130,7 +127,7 @@ def _serialize_for_prompt(data: list[dict]) -> str:
     return "\n".join(lines)
 
 
-def analyze_behavior_patterns(
+async def analyze_behavior_patterns(
     db: Session,
     userID: str,
 ) -> list[str]:
@@ -204,22 +201,11 @@ Example of GOOD output (seen 3+ times): ["User consistently has lectures on Mond
 """
 
     try:
-        completion = groq_client.chat.completions.create(
-            model="openai/gpt-oss-120b",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0,
+        facts = await chat_completion_json(
+            prompt,
+            model=DEFAULT_MODEL,
             max_completion_tokens=1024,
-            top_p=1,
-            stream=False,
         )
-        response_text = completion.choices[0].message.content.strip()
-
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].split("```")[0].strip()
-
-        facts = json.loads(response_text)
         if isinstance(facts, list):
             new_facts = [str(f) for f in facts if f]
             logger.info(
@@ -233,30 +219,12 @@ Example of GOOD output (seen 3+ times): ["User consistently has lectures on Mond
         return []
 
 
-def save_behavioral_facts(db: Session, userID: str, facts: list[str]) -> None:
-    """Save behavioral facts to Memory table, avoiding duplicates."""
+async def save_behavioral_facts(db: Session, userID: str, facts: list[str]) -> None:
+    """Save behavioral facts to Memory table, skipping near-duplicates."""
     if not facts:
         return
     try:
-        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
-        saved = 0
-        for fact in facts:
-            existing = db.execute(
-                sql_text('SELECT memory_id FROM "Memory" WHERE "userId" = :userID AND fact = :fact'),
-                {"userID": userID, "fact": fact}
-            ).mappings().first()
-
-            if not existing:
-                db.execute(
-                    sql_text(
-                        'INSERT INTO "Memory" ("userId", fact, "createdAt") '
-                        'VALUES (:userID, :fact, :createdAt)'
-                    ),
-                    {"userID": userID, "fact": fact, "createdAt": now_ms}
-                )
-                saved += 1
-
-        db.commit()
+        saved = await insert_facts(db, userID, facts)
         logger.info(
             "save_behavioral_facts: saved %d/%d facts for userID=%s",
             saved, len(facts), userID
@@ -293,8 +261,8 @@ async def run_behavioral_analysis_if_needed(db: Session, userID: str) -> None:
                 return
 
             logger.info("run_behavioral_analysis_if_needed: running analysis for userID=%s", userID)
-            facts = analyze_behavior_patterns(db, userID)
+            facts = await analyze_behavior_patterns(db, userID)
             if facts:
-                save_behavioral_facts(db, userID, facts)
+                await save_behavioral_facts(db, userID, facts)
     except Exception as e:
         logger.exception("run_behavioral_analysis_if_needed: error=%s", e)
\ No newline at end of file
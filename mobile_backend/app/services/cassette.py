@@ -0,0 +1,82 @@
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# off | record | replay | replay_or_record
+LLM_CASSETTE_MODE = os.environ.get("LLM_CASSETTE_MODE", "off").lower()
+LLM_CASSETTE_PATH = os.environ.get("LLM_CASSETTE_PATH", "cassettes/llm.jsonl")
+# Prompts embed today's date table; masking dates keeps a recording replayable tomorrow
+LLM_CASSETTE_MASK_DATES = os.environ.get("LLM_CASSETTE_MASK_DATES", "true").lower() in ("1", "true", "yes")
+
+_DAY = "(?:Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)"
+# A date plus the weekday written next to it ("Sunday, 2026-10-18", "2026-10-18 (Sunday)")
+_DATE_RE = re.compile(rf"(?:\b{_DAY},\s*)?\d{{4}}-\d{{2}}-\d{{2}}(?:\s*\({_DAY}\))?")
+
+
+class CassetteMissError(RuntimeError):
+    """Replay mode found no recording for a prompt."""
+
+
+def cassette_key(model: str, prompt: str, **params) -> str:
+    if LLM_CASSETTE_MASK_DATES:
+        prompt = _DATE_RE.sub("<date>", prompt)
+    payload = json.dumps({"model": model, "prompt": prompt, **params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    Append-only JSONL file of LLM answers keyed by prompt hash. Recording runs
+    the real code paths against Groq once; replaying serves the same answers
+    offline, so CI and benchmarks don't need a key or the network.
+    """
+
+    def __init__(self, path: str, mode: str):
+        self.path = path
+        self.mode = mode
+        self._entries: dict[str, str] = {}
+        self._lock = threading.Lock()
+        if mode != "off" and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = entry["content"]
+            logger.info("cassette: loaded %d recordings from %s", len(self._entries), path)
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode in ("replay", "replay_or_record")
+
+    @property
+    def recording(self) -> bool:
+        return self.mode in ("record", "replay_or_record")
+
+    def lookup(self, key: str) -> str | None:
+        """Recorded answer, None to go live, or CassetteMissError in strict replay."""
+        if not self.replaying:
+            return None
+        with self._lock:
+            content = self._entries.get(key)
+        if content is None and self.mode == "replay":
+            raise CassetteMissError(f"no recording for prompt key {key[:12]} in {self.path}")
+        return content
+
+    def record(self, key: str, model: str, content: str) -> None:
+        if not self.recording:
+            return
+        with self._lock:
+            if self._entries.get(key) == content:
+                return
+            self._entries[key] = content
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "model": model, "content": content}) + "\n")
+
+
+cassette = Cassette(LLM_CASSETTE_PATH, LLM_CASSETTE_MODE)
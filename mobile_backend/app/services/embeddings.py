@@ -0,0 +1,125 @@
+import os
+import re
+import asyncio
+import hashlib
+import logging
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# "auto" uses sentence-transformers (a requirement), falling back to hashing
+# only if the model can't be loaded; "hash" forces the fallback (tests, small
+# deployments). Hashed vectors measure word overlap, so near-duplicate
+# detection on them only catches near-verbatim repeats, not paraphrases.
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "auto").lower()
+EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_HASH_DIM = int(os.environ.get("EMBEDDING_HASH_DIM", 384))
+
+_STOPWORDS = frozenset(
+    "a an and are at be by for from has have i in is it my of on or the to "
+    "was with user".split()
+)
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_model = None
+_model_tag: str | None = None
+_model_lock = threading.Lock()
+
+
+# ─────────────────────────────────────────────
+# HASHING FALLBACK
+# ─────────────────────────────────────────────
+
+def _features(text: str) -> list[tuple[str, float]]:
+    """Words, word bigrams and character trigrams (so "gym" still matches "gyms")."""
+    words = [w for w in _TOKEN_RE.findall(text.lower()) if w not in _STOPWORDS]
+    features = [(w, 1.0) for w in words]
+    features += [(f"{a} {b}", 0.5) for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"#{w}#"
+        features += [(padded[i:i + 3], 0.25) for i in range(len(padded) - 2)]
+    return features
+
+
+def hash_embed(texts: list[str], dim: int = EMBEDDING_HASH_DIM) -> np.ndarray:
+    """
+    Signed feature hashing into `dim` buckets. blake2b rather than hash() so the
+    vectors are identical across processes and can be stored.
+    """
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for feature, weight in _features(text):
+            h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            matrix[row, h % dim] += weight if h >> 63 else -weight
+    return matrix
+
+
+# ─────────────────────────────────────────────
+# PUBLIC API
+# ─────────────────────────────────────────────
+
+def _load_model():
+    global _model, _model_tag
+    if _model_tag is not None:
+        return _model
+    with _model_lock:
+        if _model_tag is not None:
+            return _model
+        if EMBEDDING_BACKEND != "hash":
+            try:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(EMBEDDING_MODEL)
+                _model_tag = f"st:{EMBEDDING_MODEL}"
+                logger.info("embeddings: loaded sentence-transformers model=%s", EMBEDDING_MODEL)
+                return _model
+            except Exception as e:
+                logger.error(
+                    "embeddings: sentence-transformers unavailable (%s), using hashing; "
+                    "paraphrased memories will not be deduplicated", e
+                )
+        _model_tag = f"hash:{EMBEDDING_HASH_DIM}"
+    return _model
+
+
+def embedding_model_tag() -> str:
+    """Identifies the vector space, so stored vectors from another model are ignored."""
+    _load_model()
+    return _model_tag
+
+
+async def embedding_model_tag_async() -> str:
+    """embedding_model_tag without blocking the event loop while the model loads."""
+    if _model_tag is not None:
+        return _model_tag
+    return await asyncio.to_thread(embedding_model_tag)
+
+
+def warmup_embeddings() -> None:
+    """Load the model in a daemon thread at startup so no request waits for it."""
+    if _model_tag is None:
+        threading.Thread(target=_load_model, name="embeddings-warmup", daemon=True).start()
+
+
+def embed_texts(texts: list[str]) -> np.ndarray:
+    """
+    Embed texts into an (n, dim) float32 matrix of L2-normalised rows.
+    Blocking; from async code use embed_texts_async.
+    """
+    model = _load_model()
+    if not texts:
+        return np.zeros((0, EMBEDDING_HASH_DIM if model is None else model.get_sentence_embedding_dimension()), dtype=np.float32)
+    if model is not None:
+        matrix = np.asarray(model.encode(texts, convert_to_numpy=True), dtype=np.float32)
+    else:
+        matrix = hash_embed(texts)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+async def embed_texts_async(texts: list[str]) -> np.ndarray:
+    """embed_texts without blocking the event loop on a model load or encode."""
+    if _model_tag is not None and _model is None:
+        return embed_texts(texts)  # hashing takes microseconds; not worth a thread
+    return await asyncio.to_thread(embed_texts, texts)
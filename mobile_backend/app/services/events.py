@@ -0,0 +1,41 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+EventSink = Callable[[str, dict[str, Any]], None]
+
+# Set by a streaming endpoint for the duration of one request. Tasks created
+# inside the request copy the context, so concurrent stages publish to it too.
+_event_sink: ContextVar[EventSink | None] = ContextVar("event_sink", default=None)
+current_stage: ContextVar[str | None] = ContextVar("current_stage", default=None)
+
+
+@contextmanager
+def event_sink(sink: EventSink) -> Iterator[None]:
+    token = _event_sink.set(sink)
+    try:
+        yield
+    finally:
+        _event_sink.reset(token)
+
+
+def has_event_sink() -> bool:
+    return _event_sink.get() is not None
+
+
+def emit_event(event: str, data: dict[str, Any] | None = None) -> None:
+    """Publish a progress event to the current request's sink, if any."""
+    sink = _event_sink.get()
+    if sink is None:
+        return
+    payload = dict(data or {})
+    stage = current_stage.get()
+    if stage is not None:
+        payload.setdefault("stage", stage)
+    try:
+        sink(event, payload)
+    except Exception:
+        logger.exception("emit_event: sink failed for event=%s", event)
@@ -0,0 +1,146 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from contextvars import ContextVar
+from typing import Awaitable, Callable, TypeVar
+
+from app.services.metrics import LLM_FALLBACKS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+HEDGE_ENABLED = os.environ.get("HEDGE_ENABLED", "true").lower() in ("1", "true", "yes")
+# Fire the backup once the primary is slower than this percentile of its history
+HEDGE_PERCENTILE = float(os.environ.get("HEDGE_PERCENTILE", 0.95))
+# Until a model has this many samples its percentile is not trusted
+HEDGE_MIN_SAMPLES = int(os.environ.get("HEDGE_MIN_SAMPLES", 20))
+HEDGE_DEFAULT_DELAY = float(os.environ.get("HEDGE_DEFAULT_DELAY", 4.0))
+LATENCY_WINDOW = int(os.environ.get("LATENCY_WINDOW", 200))
+
+
+# The kind of call a completion's latency is filed under. hedged_request sets
+# it for its attempts, so a hedge delay comes from calls of the same shape
+# rather than from every prompt the model serves
+latency_operation: ContextVar[str] = ContextVar("latency_operation", default="completion")
+
+
+class LatencyTracker:
+    """Rolling window of call latencies (seconds) per (model, operation)."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._window = window
+        self._samples: dict[tuple[str, str], deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model: str, seconds: float, operation: str = "completion") -> None:
+        with self._lock:
+            self._samples.setdefault((model, operation), deque(maxlen=self._window)).append(seconds)
+
+    def record_lower_bound(self, model: str, seconds: float, operation: str = "completion") -> None:
+        """
+        A call cancelled after `seconds` (a hedge's losing primary) would have
+        taken at least that long. Leaving it out would drop exactly the slow
+        tail, so it is kept when it reaches the median; a call cancelled
+        sooner says nothing about how slow the model is.
+        """
+        median = self.percentile(model, 0.5, operation, min_samples=1)
+        if median is None or seconds >= median:
+            self.record(model, seconds, operation)
+
+    def percentile(
+        self, model: str, q: float, operation: str = "completion", min_samples: int | None = None
+    ) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples.get((model, operation), ()))
+        if not samples or len(samples) < (HEDGE_MIN_SAMPLES if min_samples is None else min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def snapshot(self) -> dict[str, dict[str, float | int | None]]:
+        with self._lock:
+            keys = list(self._samples)
+        return {
+            f"{model} {operation}": {
+                "count": len(self._samples[(model, operation)]),
+                "p50": self.percentile(model, 0.5, operation),
+                "p95": self.percentile(model, 0.95, operation),
+            }
+            for model, operation in keys
+        }
+
+
+latency_tracker = LatencyTracker()
+
+
+async def _first_success(tasks: list[asyncio.Task]) -> asyncio.Task:
+    """Return the first task that finished without raising, cancelling the rest."""
+    pending = set(tasks)
+    last_err: BaseException | None = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task
+                last_err = task.exception()
+        raise last_err
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def hedged_request(
+    attempt: Callable[[str], Awaitable[T]],
+    primary: str,
+    fallback: str,
+    name: str = "hedged_request",
+) -> T:
+    """
+    Run attempt(primary). If it hasn't produced a valid result by the primary
+    model's p95 latency, also start attempt(fallback) and return whichever
+    succeeds first. A primary failure starts the fallback immediately.
+    attempt() must raise on empty or invalid output so it isn't taken as a win.
+    """
+    # Tasks copy the context when created, so both attempts record under name
+    token = latency_operation.set(name)
+    try:
+        return await _hedge(attempt, primary, fallback, name)
+    finally:
+        latency_operation.reset(token)
+
+
+async def _hedge(attempt: Callable[[str], Awaitable[T]], primary: str, fallback: str, name: str) -> T:
+    primary_task = asyncio.ensure_future(attempt(primary))
+    if not HEDGE_ENABLED:
+        delay = None
+    else:
+        delay = latency_tracker.percentile(primary, HEDGE_PERCENTILE, name) or HEDGE_DEFAULT_DELAY
+
+    try:
+        done, _ = await asyncio.wait({primary_task}, timeout=delay)
+    except asyncio.CancelledError:
+        primary_task.cancel()
+        raise
+
+    if done and primary_task.exception() is None:
+        return primary_task.result()
+
+    if done:
+        LLM_FALLBACKS.inc(operation=name, reason="primary_failed")
+        logger.warning("%s: %s failed: %s, trying %s", name, primary, primary_task.exception(), fallback)
+        return await attempt(fallback)
+
+    logger.info("%s: %s slower than %.2fs, hedging with %s", name, primary, delay, fallback)
+    LLM_FALLBACKS.inc(operation=name, reason="hedged")
+    started = time.perf_counter()
+    backup_task = asyncio.ensure_future(attempt(fallback))
+    winner = await _first_success([primary_task, backup_task])
+    logger.info(
+        "%s: hedge won by %s after %.2fs",
+        name, fallback if winner is backup_task else primary, time.perf_counter() - started
+    )
+    return winner.result()
@@ -0,0 +1,241 @@
+import os
+import re
+import json
+import math
+import logging
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from sqlalchemy.orm import Session
+from sqlalchemy import text as sql_text
+
+logger = logging.getLogger(__name__)
+
+LABELS = ("TASK_TRACKER", "FINANCE", "UI_AUTOMATION", "UNKNOWN")
+
+# Below this confidence extract_intent falls through to the LLM
+INTENT_LOCAL_THRESHOLD = float(os.environ.get("INTENT_LOCAL_THRESHOLD", 0.8))
+# Minimum labelled prompts before the statistical model is trusted at all
+INTENT_MIN_TRAINING_ROWS = int(os.environ.get("INTENT_MIN_TRAINING_ROWS", 30))
+# Weight of the trained model vs. the keyword rules once it is ready
+INTENT_MODEL_WEIGHT = float(os.environ.get("INTENT_MODEL_WEIGHT", 0.6))
+
+_DAYS = r"(monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+
+# Each pattern that matches counts as one piece of evidence for its label
+INTENT_RULES: dict[str, list[re.Pattern]] = {
+    "TASK_TRACKER": [re.compile(p) for p in (
+        r"\bremind(er|s)?\b",
+        r"\b(schedule|reschedule|appointment|meeting|deadline|exam|lecture|event)\b",
+        r"\b(task|todo|to-do|plan)s?\b",
+        r"\b(tomorrow|tonight|next week)\b",
+        rf"\b(on|next|this|every) {_DAYS}\b",
+        r"\bat \d{1,2}(:\d{2})?\s*(am|pm)?\b",
+        r"\b(mark|set) .* as (done|completed)\b",
+        r"\b(gym|class|dentist|doctor|study|homework)\b",
+    )],
+    "FINANCE": [re.compile(p) for p in (
+        r"[$€£]\s?\d|\d\s?[$€£]",
+        r"\b\d+(\.\d+)?\s?(egp|le|usd|eur|sar|aed|pounds?|dollars?|bucks)\b",
+        r"\b(paid|pay|spent|spend|bought|buy|cost|costs|price)\b",
+        r"\b(salary|income|expense|expenses|budget|refund|bill|invoice|rent)\b",
+        r"\b(money|cash|transaction|transfer(red)?|received)\b",
+    )],
+    "UI_AUTOMATION": [re.compile(p) for p in (
+        r"^(please )?(open|launch|start|close)\b",
+        r"\bturn (on|off)\b",
+        r"\b(wifi|wi-fi|bluetooth|flashlight|brightness|volume|settings)\b",
+        r"\b(whatsapp|youtube|instagram|spotify|chrome|gmail|maps|camera)\b",
+        r"\b(send|text) (a )?message\b",
+        r"^(call|play|search|scroll|tap|click)\b",
+    )],
+}
+
+# Where the current request's intent came from: "llm", or "local" when the
+# fast path (or a circuit-open fallback) used this classifier's own guess.
+# Logged with the prompt so retraining only learns LLM-confirmed labels.
+# A dict holder, so a label set in the intent stage is seen by the dispatch
+# stage running in a sibling task
+_intent_source: ContextVar[dict | None] = ContextVar("intent_source", default=None)
+
+_TOKEN_RE = re.compile(r"[a-z0-9؀-ۿ]+")
+
+
+def _tokenize(text: str) -> list[str]:
+    words = _TOKEN_RE.findall(text.lower())
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+def _last_user_line(text: str) -> str:
+    lines = [l.strip() for l in str(text).strip().splitlines() if l.strip()]
+    if not lines:
+        return ""
+    line = lines[-1]
+    if line.lower().startswith("user:"):
+        line = line[5:].strip()
+    return line
+
+
+def _rule_scores(text: str) -> dict[str, float]:
+    """Turn keyword hits into a rough probability distribution."""
+    lowered = text.lower()
+    hits = {
+        label: sum(1 for pattern in patterns if pattern.search(lowered))
+        for label, patterns in INTENT_RULES.items()
+    }
+    total = sum(hits.values())
+    if total == 0:
+        return {label: 1 / len(LABELS) for label in LABELS}
+
+    best_label, best_hits = max(hits.items(), key=lambda kv: kv[1])
+    # One hit is a hint, two agreeing hits is a decision, competing labels dilute it
+    confidence = min(0.95, 0.65 + 0.1 * best_hits) * (best_hits / total)
+    rest = (1 - confidence) / (len(LABELS) - 1)
+    return {label: confidence if label == best_label else rest for label in LABELS}
+
+
+class IntentClassifier:
+    """
+    Keyword rules blended with a multinomial Naive Bayes model trained from
+    the intents already logged in the Prompts table.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._class_counts: Counter = Counter()
+        self._token_counts: dict[str, Counter] = {}
+        self._token_totals: dict[str, int] = {}
+        self._vocab_size = 0
+        self.trained_rows = 0
+
+    @property
+    def is_trained(self) -> bool:
+        return self.trained_rows >= INTENT_MIN_TRAINING_ROWS
+
+    def fit(self, samples: list[tuple[str, str]]) -> None:
+        """Train from (user_message, intent) pairs, replacing the previous model."""
+        class_counts: Counter = Counter()
+        token_counts: dict[str, Counter] = {label: Counter() for label in LABELS}
+        for message, intent in samples:
+            if intent not in LABELS or not message:
+                continue
+            class_counts[intent] += 1
+            token_counts[intent].update(_tokenize(message))
+
+        vocab = set()
+        for counts in token_counts.values():
+            vocab.update(counts)
+
+        with self._lock:
+            self._class_counts = class_counts
+            self._token_counts = token_counts
+            self._token_totals = {label: sum(c.values()) for label, c in token_counts.items()}
+            self._vocab_size = len(vocab)
+            self.trained_rows = sum(class_counts.values())
+        logger.info(
+            "IntentClassifier.fit: trained on %d rows, vocab=%d, classes=%s",
+            self.trained_rows, self._vocab_size, dict(class_counts)
+        )
+
+    def _model_scores(self, text: str) -> dict[str, float]:
+        tokens = _tokenize(text)
+        with self._lock:
+            total_rows = sum(self._class_counts.values())
+            log_probs = {}
+            for label in LABELS:
+                # Laplace smoothing on both the prior and the token likelihoods
+                log_p = math.log((self._class_counts[label] + 1) / (total_rows + len(LABELS)))
+                counts = self._token_counts.get(label, Counter())
+                denom = self._token_totals.get(label, 0) + self._vocab_size + 1
+                for token in tokens:
+                    log_p += math.log((counts[token] + 1) / denom)
+                log_probs[label] = log_p
+
+        peak = max(log_probs.values())
+        exp = {label: math.exp(lp - peak) for label, lp in log_probs.items()}
+        norm = sum(exp.values())
+        return {label: v / norm for label, v in exp.items()}
+
+    def predict(self, text: str) -> tuple[str, float]:
+        """Return (label, confidence) for the latest user line in text."""
+        line = _last_user_line(text)
+        if not line:
+            return "UNKNOWN", 0.0
+
+        scores = _rule_scores(line)
+        if self.is_trained:
+            model = self._model_scores(line)
+            with self._lock:
+                seen = {label for label in LABELS if self._class_counts[label]}
+            # A class with no training rows only has the smoothed prior, which
+            # would drown a clear rule match ("open whatsapp"); keep the rules there
+            scores = {
+                label: INTENT_MODEL_WEIGHT * model[label] + (1 - INTENT_MODEL_WEIGHT) * scores[label]
+                if label in seen else scores[label]
+                for label in LABELS
+            }
+        label, confidence = max(scores.items(), key=lambda kv: kv[1])
+        return label, confidence
+
+
+intent_classifier = IntentClassifier()
+
+
+def classify_intent_locally(text: str) -> tuple[str, float]:
+    return intent_classifier.predict(text)
+
+
+def track_intent_source() -> None:
+    """Start recording the intent source for this request, before its stages fan out."""
+    _intent_source.set({})
+
+
+def note_intent_source(source: str) -> None:
+    holder = _intent_source.get()
+    if holder is None:
+        _intent_source.set({"source": source})
+    else:
+        holder["source"] = source
+
+
+def current_intent_source() -> str | None:
+    holder = _intent_source.get()
+    return holder.get("source") if holder is not None else None
+
+
+def _llm_labelled(metadata: str | None) -> bool:
+    try:
+        return json.loads(metadata).get("intent_source") == "llm"
+    except (TypeError, ValueError, AttributeError):
+        return False
+
+
+def train_intent_classifier(db: Session, limit: int = 5000) -> int:
+    """
+    Retrain the shared classifier from logged prompts whose intent the LLM
+    decided. Labels from the classifier itself are skipped, so it never
+    learns from its own mistakes. Returns rows used.
+    """
+    try:
+        rows = db.execute(
+            sql_text('''
+                SELECT user_message, intent_detected, metadata
+                FROM "Prompts"
+                WHERE intent_detected IS NOT NULL AND metadata IS NOT NULL
+                ORDER BY created_at DESC
+                LIMIT :limit
+            '''),
+            {"limit": limit}
+        ).mappings().all()
+    except Exception as e:
+        logger.exception("train_intent_classifier: failed to load prompts, error=%s", e)
+        db.rollback()
+        return 0
+
+    samples = [
+        (row["user_message"], str(row["intent_detected"]).strip().upper())
+        for row in rows
+        if _llm_labelled(row["metadata"])
+    ]
+    intent_classifier.fit(samples)
+    return intent_classifier.trained_rows
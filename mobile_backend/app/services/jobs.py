@@ -0,0 +1,311 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+from sqlalchemy.orm import Session
+from sqlalchemy import text as sql_text
+
+from app.services.metrics import JOB_RUNS, STAGE_SECONDS
+from app.services.tracing import current_trace_id, span
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 4))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 5))
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", 5.0))
+JOB_RETRY_BASE = float(os.environ.get("JOB_RETRY_BASE", 2.0))
+JOB_RETRY_MAX = float(os.environ.get("JOB_RETRY_MAX", 300.0))
+# A job still 'running' after this long belongs to a worker that died;
+# live jobs refresh their row well within it
+JOB_STALE_AFTER = float(os.environ.get("JOB_STALE_AFTER", 600.0))
+# How often workers look for such jobs and requeue them
+JOB_RECOVERY_INTERVAL = float(os.environ.get("JOB_RECOVERY_INTERVAL", 60.0))
+
+JobHandler = Callable[[Session, dict], Awaitable[None]]
+
+JOB_HANDLERS: dict[str, JobHandler] = {}
+
+_workers: list[asyncio.Task] = []
+_wakeup: asyncio.Event | None = None
+_loop: asyncio.AbstractEventLoop | None = None
+_last_recovery = 0.0
+
+
+def _now_ms() -> int:
+    return int(datetime.now(timezone.utc).timestamp() * 1000)
+
+
+def job_handler(name: str):
+    """Register an async handler(db, payload) for jobs with this name."""
+    def decorator(func: JobHandler) -> JobHandler:
+        JOB_HANDLERS[name] = func
+        return func
+    return decorator
+
+
+# ─────────────────────────────────────────────
+# ENQUEUE
+# ─────────────────────────────────────────────
+
+def enqueue_job(
+    db: Session,
+    name: str,
+    payload: dict[str, Any],
+    max_attempts: int = JOB_MAX_ATTEMPTS,
+    commit: bool = True,
+) -> int:
+    """
+    Persist a job and wake a worker. The row is committed before returning,
+    so the work survives a restart even if no worker picks it up right away.
+    With commit=False the job joins the caller's transaction and is picked
+    up on the next poll after the caller commits. Errors are raised.
+    """
+    now_ms = _now_ms()
+    try:
+        row = db.execute(
+            sql_text('''
+                INSERT INTO "BackgroundJob"
+                (name, payload, status, attempts, max_attempts,
+                 run_after, created_at, updated_at)
+                VALUES
+                (:name, :payload, 'pending', 0, :max_attempts,
+                 :now, :now, :now)
+                RETURNING job_id
+            '''),
+            {
+                "name": name,
+                # Carried along so the job's spans join the request's trace
+                "payload": json.dumps({**payload, "_trace_id": current_trace_id()}, default=str),
+                "max_attempts": max_attempts,
+                "now": now_ms,
+            }
+        ).mappings().first()
+        if commit:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    if commit and _loop is not None and _wakeup is not None:
+        _loop.call_soon_threadsafe(_wakeup.set)
+    logger.info("enqueue_job: queued job_id=%s, name=%s", row["job_id"], name)
+    return row["job_id"]
+
+
+# ─────────────────────────────────────────────
+# WORKERS
+# ─────────────────────────────────────────────
+
+def _claim_job(db: Session) -> dict | None:
+    # SKIP LOCKED lets several workers (and several uvicorn processes) poll safely
+    row = db.execute(
+        sql_text('''
+            UPDATE "BackgroundJob"
+            SET status = 'running', attempts = attempts + 1, updated_at = :now
+            WHERE job_id = (
+                SELECT job_id FROM "BackgroundJob"
+                WHERE status = 'pending' AND run_after <= :now
+                ORDER BY job_id
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING *
+        '''),
+        {"now": _now_ms()}
+    ).mappings().first()
+    db.commit()
+    return dict(row) if row else None
+
+
+def _complete_job(db: Session, job: dict) -> None:
+    db.execute(
+        sql_text('DELETE FROM "BackgroundJob" WHERE job_id = :job_id'),
+        {"job_id": job["job_id"]}
+    )
+    db.commit()
+
+
+def _fail_job(db: Session, job: dict, error: str) -> None:
+    now_ms = _now_ms()
+    if job["attempts"] >= job["max_attempts"]:
+        db.execute(
+            sql_text('''
+                INSERT INTO "JobDeadLetter"
+                (job_id, name, payload, attempts, last_error, created_at, failed_at)
+                VALUES (:job_id, :name, :payload, :attempts, :last_error, :created_at, :now)
+            '''),
+            {**job, "last_error": error, "now": now_ms}
+        )
+        db.execute(
+            sql_text('DELETE FROM "BackgroundJob" WHERE job_id = :job_id'),
+            {"job_id": job["job_id"]}
+        )
+        logger.error(
+            "job %s (%s) moved to dead letter after %d attempts: %s",
+            job["job_id"], job["name"], job["attempts"], error
+        )
+    else:
+        delay = min(JOB_RETRY_MAX, JOB_RETRY_BASE * 2 ** (job["attempts"] - 1))
+        db.execute(
+            sql_text('''
+                UPDATE "BackgroundJob"
+                SET status = 'pending', run_after = :run_after,
+                    last_error = :last_error, updated_at = :now
+                WHERE job_id = :job_id
+            '''),
+            {
+                "job_id": job["job_id"],
+                "run_after": now_ms + int(delay * 1000),
+                "last_error": error,
+                "now": now_ms,
+            }
+        )
+        logger.warning(
+            "job %s (%s) failed attempt %d/%d, retrying in %.0fs: %s",
+            job["job_id"], job["name"], job["attempts"], job["max_attempts"], delay, error
+        )
+    db.commit()
+
+
+def _release_job(db: Session, job: dict) -> None:
+    """Put back a job that was interrupted rather than failed; the attempt doesn't count."""
+    db.execute(
+        sql_text('''
+            UPDATE "BackgroundJob"
+            SET status = 'pending', attempts = attempts - 1, updated_at = :now
+            WHERE job_id = :job_id AND status = 'running'
+        '''),
+        {"job_id": job["job_id"], "now": _now_ms()}
+    )
+    db.commit()
+
+
+async def _heartbeat(session_factory: Callable[[], Session], job: dict) -> None:
+    """Keep a running job's updated_at fresh so recovery never takes it from a live worker."""
+    while True:
+        await asyncio.sleep(JOB_STALE_AFTER / 4)
+        db = session_factory()
+        try:
+            db.execute(
+                sql_text('''
+                    UPDATE "BackgroundJob" SET updated_at = :now
+                    WHERE job_id = :job_id AND status = 'running'
+                '''),
+                {"job_id": job["job_id"], "now": _now_ms()}
+            )
+            db.commit()
+        except Exception as e:
+            logger.warning("job %s: heartbeat failed, error=%s", job["job_id"], e)
+        finally:
+            db.close()
+
+
+async def _run_job(session_factory: Callable[[], Session], job: dict) -> None:
+    handler = JOB_HANDLERS.get(job["name"])
+    db = session_factory()
+    heartbeat = asyncio.create_task(_heartbeat(session_factory, job))
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job {job['name']!r}")
+        payload = json.loads(job["payload"])
+        with span(
+            f"job {job['name']}",
+            trace_id=payload.pop("_trace_id", None),
+            job_id=job["job_id"],
+            attempt=job["attempts"],
+        ), STAGE_SECONDS.time(pipeline="job", stage=job["name"]):
+            await handler(db, payload)
+        _complete_job(db, job)
+        JOB_RUNS.inc(job=job["name"], outcome="ok")
+    except Exception as e:
+        JOB_RUNS.inc(job=job["name"], outcome="error")
+        logger.exception("job %s (%s) raised", job["job_id"], job["name"])
+        db.rollback()
+        _fail_job(db, job, f"{type(e).__name__}: {e}")
+    except asyncio.CancelledError:
+        # Shutdown: hand the job back now instead of leaving it to recovery
+        logger.warning("job %s (%s) interrupted, returning it to the queue", job["job_id"], job["name"])
+        try:
+            db.rollback()
+            _release_job(db, job)
+        except Exception as e:
+            logger.error("job %s: could not release it, recovery will requeue it, error=%s", job["job_id"], e)
+        raise
+    finally:
+        heartbeat.cancel()
+        db.close()
+
+
+async def _worker(session_factory: Callable[[], Session], worker_id: int) -> None:
+    global _last_recovery
+    logger.info("job worker %d: started", worker_id)
+    while True:
+        try:
+            # Clear before claiming so an enqueue during the claim is not missed
+            _wakeup.clear()
+            db = session_factory()
+            try:
+                # Jobs left 'running' by a crash, or by a failure to record
+                # their outcome, go back in the queue once they are stale
+                if time.monotonic() - _last_recovery >= JOB_RECOVERY_INTERVAL:
+                    _last_recovery = time.monotonic()
+                    _recover_stale_jobs(db)
+                job = _claim_job(db)
+            finally:
+                db.close()
+
+            if job is not None:
+                await _run_job(session_factory, job)
+                continue
+
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("job worker %d: poll failed, error=%s", worker_id, e)
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+
+
+def _recover_stale_jobs(db: Session) -> None:
+    result = db.execute(
+        sql_text('''
+            UPDATE "BackgroundJob"
+            SET status = 'pending', updated_at = :now
+            WHERE status = 'running' AND updated_at < :cutoff
+        '''),
+        {"now": _now_ms(), "cutoff": _now_ms() - int(JOB_STALE_AFTER * 1000)}
+    )
+    db.commit()
+    if result.rowcount:
+        logger.warning("job queue: requeued %d stale running jobs", result.rowcount)
+
+
+def start_job_workers(session_factory: Callable[[], Session], workers: int = JOB_WORKERS) -> None:
+    """Create the queue tables if needed and start the worker tasks on this loop."""
+    global _wakeup, _loop
+    from app.database import Base, engine
+    from app.models.job import BackgroundJob, JobDeadLetter
+
+    try:
+        Base.metadata.create_all(bind=engine, tables=[BackgroundJob.__table__, JobDeadLetter.__table__])
+    except Exception as e:
+        logger.exception("start_job_workers: failed to prepare job tables, error=%s", e)
+
+    _loop = asyncio.get_running_loop()
+    _wakeup = asyncio.Event()
+    for worker_id in range(workers):
+        _workers.append(asyncio.create_task(_worker(session_factory, worker_id)))
+    logger.info("start_job_workers: started %d workers", workers)
+
+
+async def stop_job_workers() -> None:
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
@@ -0,0 +1,154 @@
+import json
+import logging
+from functools import lru_cache
+from typing import Annotated, Any
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+logger = logging.getLogger(__name__)
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+@lru_cache(maxsize=None)
+def _field_adapter(schema: type[BaseModel], key: str) -> TypeAdapter | None:
+    field = schema.model_fields.get(key)
+    if field is None:
+        return None
+    # Constraints such as ge/le live in the field metadata, not the annotation
+    return TypeAdapter(Annotated[(field.annotation, *field.metadata)] if field.metadata else field.annotation)
+
+
+class JSONStreamParser:
+    """
+    Single-pass, incremental parser for a JSON answer arriving as LLM tokens.
+
+    Text before the first { or [ (prose, a ```json fence) is skipped and the
+    value is complete the moment its outermost bracket closes, so the caller
+    can stop generation there. Trailing commas are dropped as they're seen,
+    and a truncated answer is closed from the tracked nesting state.
+
+    With a pydantic schema, each top-level field is validated as soon as its
+    value closes, so a wrong value fails the attempt before the rest arrives.
+    """
+
+    def __init__(self, schema: type[BaseModel] | None = None):
+        self._schema = schema
+        self._out: list[str] = []
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self.done = False
+        # Index in _out of a comma that turns out to be trailing if a closer follows
+        self._comma_at: int | None = None
+        # Where the current top-level member starts, for per-field validation
+        self._member_start = 0
+        # Last position where cutting and closing the open brackets gives valid JSON
+        self._safe_point: tuple[int, tuple[str, ...]] | None = None
+        self.fields: dict[str, Any] = {}
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk; returns True once the top-level value is complete."""
+        for ch in chunk:
+            if self.done:
+                break
+            self._consume(ch)
+        return self.done
+
+    def _consume(self, ch: str) -> None:
+        out = self._out
+        if not self._started:
+            if ch in _CLOSERS:
+                self._started = True
+                self._stack.append(_CLOSERS[ch])
+                out.append(ch)
+                self._member_start = len(out)
+                self._safe_point = (len(out), tuple(self._stack))
+            return
+
+        if self._in_string:
+            out.append(ch)
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+            return
+
+        if ch in _CLOSERS:
+            self._comma_at = None
+            self._stack.append(_CLOSERS[ch])
+            out.append(ch)
+            self._safe_point = (len(out), tuple(self._stack))
+        elif ch in "}]":
+            if self._comma_at is not None:
+                del out[self._comma_at]
+                self._comma_at = None
+            if len(self._stack) == 1:
+                self._close_member()
+            self._stack.pop()
+            out.append(ch)
+            if not self._stack:
+                self.done = True
+        elif ch == ",":
+            if len(self._stack) == 1:
+                self._close_member()
+                self._member_start = len(out) + 1
+            self._safe_point = (len(out), tuple(self._stack))
+            self._comma_at = len(out)
+            out.append(ch)
+        else:
+            if ch == '"':
+                self._in_string = True
+            if not ch.isspace():
+                self._comma_at = None
+            out.append(ch)
+
+    def _close_member(self) -> None:
+        """A top-level object member just ended: record and validate it."""
+        if self._stack[0] != "}":
+            return
+        member = "".join(self._out[self._member_start:]).strip()
+        if not member:
+            return
+        try:
+            (key, value), = json.loads("{" + member + "}").items()
+        except (ValueError, TypeError):
+            # Malformed member; leave it to the final parse to decide
+            return
+        self.fields[key] = value
+        adapter = _field_adapter(self._schema, key) if self._schema else None
+        if adapter is not None:
+            try:
+                adapter.validate_python(value)
+            except ValidationError as e:
+                raise ValueError(f"field {key!r} failed validation: {e.errors()[0]['msg']}") from e
+
+    def result(self) -> Any:
+        """Parse what has been consumed, closing anything a truncated answer left open."""
+        if not self._started:
+            raise ValueError("no JSON value in output")
+        text = "".join(self._out)
+        if self.done:
+            return json.loads(text)
+
+        closing = text
+        if self._in_string:
+            closing = closing[:-1] if self._escape else closing
+            closing += '"'
+        closing = closing.rstrip().rstrip(",") + "".join(reversed(self._stack))
+        try:
+            return json.loads(closing)
+        except json.JSONDecodeError:
+            # Cut mid-key or mid-literal: fall back to the last complete member
+            index, stack = self._safe_point
+            return json.loads(text[:index].rstrip().rstrip(",") + "".join(reversed(stack)))
+
+
+def parse_json(text: str, schema: type[BaseModel] | None = None) -> Any:
+    """Parse a complete LLM answer in one pass (fences, prose, trailing commas tolerated)."""
+    parser = JSONStreamParser(schema)
+    parser.feed(text)
+    return parser.result()
@@ -0,0 +1,209 @@
+import os
+import time
+import asyncio
+import logging
+import weakref
+from typing import Any
+
+import httpx
+from dotenv import load_dotenv
+from groq import AsyncGroq
+from pydantic import BaseModel
+from app.services.json_stream import JSONStreamParser
+from app.services.cassette import cassette, cassette_key
+from app.services.events import emit_event, has_event_sink
+from app.services.hedging import latency_operation, latency_tracker
+from app.services.metrics import LLM_CIRCUIT_REJECTIONS, LLM_REQUEST_SECONDS, LLM_RETRIES
+from app.services.resilience import CircuitOpenError, call_with_resilience
+from app.services.tracing import set_attribute, span
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "openai/gpt-oss-120b"
+FALLBACK_MODEL = "llama-3.3-70b-versatile"
+
+# Per-process limits. Every Groq call in the backend goes through this module,
+# so these bound how many completions a single uvicorn worker keeps in flight.
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", 32))
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", 64))
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", 30.0))
+LLM_CONNECT_TIMEOUT = float(os.environ.get("LLM_CONNECT_TIMEOUT", 5.0))
+# Point at app/dev/llm_standin.py (e.g. http://localhost:8100) to run without Groq
+GROQ_BASE_URL = os.environ.get("GROQ_BASE_URL") or None
+
+# One pooled client + semaphore per event loop. The API runs on uvicorn's loop,
+# but the notification scheduler drives its own loop from a worker thread and
+# httpx connections cannot be shared across loops.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple[AsyncGroq, asyncio.Semaphore]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _get_client() -> tuple[AsyncGroq, asyncio.Semaphore]:
+    loop = asyncio.get_running_loop()
+    entry = _clients.get(loop)
+    if entry is None:
+        timeout = httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+        http_client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_CONNECTIONS,
+            ),
+        )
+        client = AsyncGroq(
+            api_key=os.environ.get("GROQ_API_KEY"),
+            base_url=GROQ_BASE_URL,
+            http_client=http_client,
+            timeout=timeout,
+            max_retries=0,  # retries are owned by app.services.resilience
+        )
+        entry = (client, asyncio.Semaphore(LLM_MAX_CONCURRENCY))
+        _clients[loop] = entry
+        logger.info(
+            "llm: created AsyncGroq client, base_url=%s, max_concurrency=%d, timeout=%.1fs",
+            GROQ_BASE_URL or "default", LLM_MAX_CONCURRENCY, LLM_TIMEOUT
+        )
+    return entry
+
+
+async def _complete(
+    prompt: str,
+    model: str,
+    temperature: float,
+    max_completion_tokens: int,
+    top_p: float,
+    schema: type[BaseModel] | None = None,
+    parse_json: bool = False,
+) -> tuple[str, JSONStreamParser | None]:
+    key = cassette_key(
+        model, prompt,
+        temperature=temperature, max_completion_tokens=max_completion_tokens, top_p=top_p,
+    )
+    recorded = cassette.lookup(key)
+    if recorded is not None:
+        set_attribute("llm.cassette_hit", True)
+        parser = JSONStreamParser(schema) if parse_json else None
+        if has_event_sink():
+            emit_event("token", {"model": model, "delta": recorded})
+        if parser is not None:
+            parser.feed(recorded)
+        return recorded, parser
+
+    client, semaphore = _get_client()
+
+    async def attempt() -> tuple[str, JSONStreamParser | None]:
+        # Fresh per attempt so a retry doesn't inherit a half-parsed answer
+        parser = JSONStreamParser(schema) if parse_json else None
+        stream = parser is not None or has_event_sink()
+        forward = has_event_sink()
+        # The slot is held per attempt, so backoff sleeps don't block other calls
+        with span("llm.completion", model=model, stream=stream, prompt_chars=len(prompt)) as llm_span:
+            queued = time.perf_counter()
+            async with semaphore:
+                # Timed inside the semaphore so queueing doesn't skew the model's latency
+                started = time.perf_counter()
+                llm_span.set_attribute("queue_ms", round((started - queued) * 1000, 1))
+                outcome = "error"
+                try:
+                    completion = await client.chat.completions.create(
+                        model=model,
+                        messages=[{"role": "user", "content": prompt}],
+                        temperature=temperature,
+                        max_completion_tokens=max_completion_tokens,
+                        top_p=top_p,
+                        stream=stream,
+                    )
+                    if not stream:
+                        content = completion.choices[0].message.content or ""
+                    else:
+                        parts = []
+                        try:
+                            async for chunk in completion:
+                                delta = chunk.choices[0].delta.content if chunk.choices else None
+                                if not delta:
+                                    continue
+                                parts.append(delta)
+                                if forward:
+                                    emit_event("token", {"model": model, "delta": delta})
+                                if parser is not None and parser.feed(delta):
+                                    # The JSON answer is complete; anything after it is waste
+                                    break
+                        finally:
+                            # Dropping the connection early stops generation upstream
+                            await completion.close()
+                        content = "".join(parts)
+                    outcome = "ok"
+                except asyncio.CancelledError:
+                    # The losing side of a hedge, or the client went away
+                    outcome = "cancelled"
+                    latency_tracker.record_lower_bound(
+                        model, time.perf_counter() - started, latency_operation.get()
+                    )
+                    raise
+                finally:
+                    elapsed = time.perf_counter() - started
+                    LLM_REQUEST_SECONDS.observe(elapsed, model=model, outcome=outcome)
+                latency_tracker.record(model, elapsed, latency_operation.get())
+                llm_span.set_attribute("completion_chars", len(content))
+        return content, parser
+
+    def on_retry(attempt_no: int, error: BaseException) -> None:
+        # Streaming clients should drop tokens from the failed attempt
+        LLM_RETRIES.inc(model=model)
+        emit_event("llm_retry", {"model": model, "attempt": attempt_no, "error": str(error)})
+
+    try:
+        content, parser = await call_with_resilience(model, attempt, on_retry=on_retry)
+    except CircuitOpenError:
+        LLM_CIRCUIT_REJECTIONS.inc(model=model)
+        raise
+    cassette.record(key, model, content)
+    return content, parser
+
+
+async def chat_completion(
+    prompt: str,
+    model: str = DEFAULT_MODEL,
+    temperature: float = 0,
+    max_completion_tokens: int = 512,
+    top_p: float = 1,
+) -> str:
+    """
+    Send a single-turn prompt to Groq and return the message content.
+    Waits for a free concurrency slot instead of blocking the event loop.
+    Transient failures are retried with backoff behind a per-model circuit
+    breaker, which fails fast with CircuitOpenError while Groq is degraded.
+    When a streaming endpoint is listening, tokens are forwarded as they arrive.
+    """
+    content, _ = await _complete(prompt, model, temperature, max_completion_tokens, top_p)
+    return content
+
+
+async def chat_completion_json(
+    prompt: str,
+    model: str = DEFAULT_MODEL,
+    schema: type[BaseModel] | None = None,
+    temperature: float = 0,
+    max_completion_tokens: int = 512,
+    top_p: float = 1,
+) -> Any:
+    """
+    Like chat_completion, but for prompts that answer in JSON. The answer is
+    always streamed through JSONStreamParser, generation stops as soon as the
+    top-level value closes, and with a schema each field is checked as it
+    arrives. Raises ValueError on output that isn't usable JSON.
+    """
+    _, parser = await _complete(
+        prompt, model, temperature, max_completion_tokens, top_p,
+        schema=schema, parse_json=True,
+    )
+    return parser.result()
+
+
+async def close_llm_client() -> None:
+    """Close the pooled client bound to the running loop (app shutdown)."""
+    entry = _clients.pop(asyncio.get_running_loop(), None)
+    if entry is not None:
+        await entry[0].close()
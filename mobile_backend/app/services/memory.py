@@ -1,19 +1,21 @@
-import json
 import logging
-from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 from sqlalchemy import text as sql_text
-from groq import Groq
-import os
+from app.services.llm import chat_completion_json, DEFAULT_MODEL
+from app.services.memory_index import insert_facts
 
 logger = logging.getLogger(__name__)
-groq_client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
 
 
-def extract_memory_facts(conversation: str, existing_memories: list[str]) -> list[str]:
+async def extract_memory_facts(
+    conversation: str,
+    existing_memories: list[str],
+    raise_errors: bool = False,
+) -> list[str]:
     """
     Extract explicit facts from a single conversation snippet.
     These are facts the user directly told Qareeb.
+    With raise_errors a failed LLM call is re-raised so a job can retry it.
     """
     existing_str = (
         "\n".join(f"- {m}" for m in existing_memories)
@@ -47,25 +49,12 @@ Output ONLY a JSON array of strings. Each string is one fact.
 If nothing new is worth remembering, output: []
 """
     try:
-        completion = groq_client.chat.completions.create(
-            model="openai/gpt-oss-120b",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0,
-            max_completion_tokens=512,
-            top_p=1,
-            stream=False,
-        )
-        response_text = completion.choices[0].message.content.strip()
-
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].split("```")[0].strip()
-
-        facts = json.loads(response_text)
+        facts = await chat_completion_json(prompt, model=DEFAULT_MODEL)
         return [str(f) for f in facts if f] if isinstance(facts, list) else []
     except Exception as e:
         logger.exception("extract_memory_facts: failed, error=%s", e)
+        if raise_errors:
+            raise
         return []
 
 
@@ -86,33 +75,12 @@ def get_user_memories(db: Session, userID: str) -> list[str]:
         return []
 
 
-def save_memory_facts(db: Session, userID: str, facts: list[str]) -> None:
-    """Save new memory facts, avoiding exact duplicates."""
+async def save_memory_facts(db: Session, userID: str, facts: list[str]) -> None:
+    """Save new memory facts, skipping restatements of ones already known."""
     if not facts:
         return
     try:
-        now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
-        saved = 0
-        for fact in facts:
-            existing = db.execute(
-                sql_text(
-                    'SELECT memory_id FROM "Memory" '
-                    'WHERE "userId" = :userID AND fact = :fact'
-                ),
-                {"userID": userID, "fact": fact}
-            ).mappings().first()
-
-            if not existing:
-                db.execute(
-                    sql_text(
-                        'INSERT INTO "Memory" ("userId", fact, "createdAt") '
-                        'VALUES (:userID, :fact, :createdAt)'
-                    ),
-                    {"userID": userID, "fact": fact, "createdAt": now_ms}
-                )
-                saved += 1
-
-        db.commit()
+        saved = await insert_facts(db, userID, facts)
         logger.info(
             "save_memory_facts: saved %d new facts for userID=%s",
             saved, userID
@@ -0,0 +1,365 @@
+import os
+import re
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy import text as sql_text
+from app.services.embeddings import embed_texts_async, embedding_model_tag, embedding_model_tag_async
+from app.services.prompts import estimate_tokens
+from app.services.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+MEMORY_TOP_K = int(os.environ.get("MEMORY_TOP_K", 8))
+# Rough cap on how much of an extraction prompt memories may take
+MEMORY_TOKEN_BUDGET = int(os.environ.get("MEMORY_TOKEN_BUDGET", 300))
+MEMORY_INDEX_CACHE_USERS = int(os.environ.get("MEMORY_INDEX_CACHE_USERS", 512))
+# Cosine similarity at which a new fact counts as a restatement of a known one.
+# Unset means a default suited to the embedding backend, see duplicate_threshold().
+MEMORY_DUPLICATE_THRESHOLD = os.environ.get("MEMORY_DUPLICATE_THRESHOLD")
+
+
+def _fact_hash(fact: str) -> str:
+    return hashlib.sha1(fact.encode("utf-8")).hexdigest()
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    top = np.argpartition(-scores, k)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def take_within_budget(facts: list[str], token_budget: int) -> list[str]:
+    """Keep facts in order while they fit the budget; skip ones that don't."""
+    chosen, used = [], 0
+    for fact in facts:
+        cost = estimate_tokens(fact) + 1  # "- " bullet and newline
+        if used + cost > token_budget:
+            continue
+        chosen.append(fact)
+        used += cost
+    return chosen
+
+
+# ─────────────────────────────────────────────
+# PER-USER INDEX
+# ─────────────────────────────────────────────
+
+class MemoryIndex:
+    """
+    Per-user matrix of fact embeddings, cached in-process (LRU) and persisted
+    in "MemoryEmbedding" so each fact is embedded once. A cache entry is only
+    reused while the user's (memory_id, fact) set is unchanged, which also
+    picks up rows written by other workers or the memory sync endpoint.
+    """
+
+    def __init__(self, max_users: int = MEMORY_INDEX_CACHE_USERS):
+        self._max_users = max_users
+        self._cache: "OrderedDict[str, tuple[tuple, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def matrix(self, db: Session, userID: str, rows: list[tuple[int, str]]) -> np.ndarray:
+        """Embedding matrix aligned with rows [(memory_id, fact), ...]."""
+        key = tuple((memory_id, _fact_hash(fact)) for memory_id, fact in rows)
+        with self._lock:
+            cached = self._cache.get(userID)
+            if cached is not None and cached[0] == key:
+                self._cache.move_to_end(userID)
+                return cached[1]
+
+        matrix = await _load_vectors(db, userID, rows, [h for _, h in key])
+        with self._lock:
+            self._cache[userID] = (key, matrix)
+            self._cache.move_to_end(userID)
+            while len(self._cache) > self._max_users:
+                self._cache.popitem(last=False)
+        return matrix
+
+    def invalidate(self, userID: str) -> None:
+        with self._lock:
+            self._cache.pop(userID, None)
+
+
+memory_index = MemoryIndex()
+
+
+async def _load_vectors(db: Session, userID: str, rows: list[tuple[int, str]], hashes: list[str]) -> np.ndarray:
+    """
+    Read stored vectors for the user's facts, embedding and storing any that
+    are missing or stale. Only the encoding leaves the event loop: the
+    session stays on it, where request stages never use it concurrently.
+    """
+    # While the startup warmup is still loading the model the tag isn't known yet
+    tag = await embedding_model_tag_async()
+    stored = {}
+    try:
+        for r in db.execute(
+            sql_text(
+                'SELECT memory_id, fact_hash, vector FROM "MemoryEmbedding" '
+                'WHERE "userId" = :userID AND model = :model'
+            ),
+            {"userID": userID, "model": tag}
+        ).mappings().all():
+            stored[r["memory_id"]] = (r["fact_hash"], bytes(r["vector"]))
+    except Exception as e:
+        logger.warning("memory_index: could not read stored embeddings, error=%s", e)
+        db.rollback()
+
+    vectors: list[np.ndarray | None] = []
+    missing = []
+    for i, ((memory_id, _), fact_hash) in enumerate(zip(rows, hashes)):
+        hit = stored.get(memory_id)
+        if hit is not None and hit[0] == fact_hash:
+            vectors.append(np.frombuffer(hit[1], dtype=np.float32))
+        else:
+            vectors.append(None)
+            missing.append(i)
+
+    if missing:
+        fresh = await embed_texts_async([rows[i][1] for i in missing])
+        for i, vector in zip(missing, fresh):
+            vectors[i] = vector
+        await store_fact_vectors(db, userID, [rows[i][0] for i in missing], [rows[i][1] for i in missing], fresh)
+
+    if not vectors:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.vstack(vectors)
+
+
+async def store_fact_vectors(
+    db: Session,
+    userID: str,
+    memory_ids: list[int],
+    facts: list[str],
+    vectors: np.ndarray,
+) -> None:
+    """Persist embeddings for Memory rows so retrieval doesn't recompute them."""
+    if not memory_ids:
+        return
+    tag = await embedding_model_tag_async()
+    now_ms = int(time.time() * 1000)
+    try:
+        db.execute(
+            sql_text('''
+                INSERT INTO "MemoryEmbedding" (memory_id, model, "userId", fact_hash, vector, created_at)
+                VALUES (:memory_id, :model, :userID, :fact_hash, :vector, :created_at)
+                ON CONFLICT (memory_id, model)
+                DO UPDATE SET fact_hash = EXCLUDED.fact_hash, vector = EXCLUDED.vector
+            '''),
+            [
+                {
+                    "memory_id": memory_id, "model": tag, "userID": userID, "fact_hash": fact_hash,
+                    "vector": vector.astype(np.float32).tobytes(), "created_at": now_ms,
+                }
+                for memory_id, fact_hash, vector in zip(memory_ids, map(_fact_hash, facts), vectors)
+            ]
+        )
+        db.commit()
+        logger.info("memory_index: stored %d embeddings for userID=%s", len(memory_ids), userID)
+    except Exception as e:
+        # Still usable from the in-process cache; they'll be re-stored next time
+        logger.warning("memory_index: could not store embeddings, error=%s", e)
+        db.rollback()
+
+
+# ─────────────────────────────────────────────
+# RETRIEVAL
+# ─────────────────────────────────────────────
+
+def _memory_rows(db: Session, userID: str) -> list[tuple[int, str]]:
+    return [
+        (r["memory_id"], r["fact"])
+        for r in db.execute(
+            sql_text(
+                'SELECT memory_id, fact FROM "Memory" WHERE "userId" = :userID '
+                'ORDER BY "createdAt" ASC'
+            ),
+            {"userID": userID}
+        ).mappings().all()
+    ]
+
+
+@traced()
+async def select_relevant_memories(
+    db: Session,
+    userID: str,
+    query: str,
+    k: int = MEMORY_TOP_K,
+    token_budget: int = MEMORY_TOKEN_BUDGET,
+) -> list[str]:
+    """
+    Return the user's memory facts most relevant to `query`, best first,
+    at most k of them and within token_budget. Users whose whole memory
+    already fits get every fact, in the usual chronological order.
+    """
+    try:
+        rows = _memory_rows(db, userID)
+    except Exception as e:
+        logger.exception("select_relevant_memories: failed to load memories, error=%s", e)
+        db.rollback()
+        return []
+
+    facts = [fact for _, fact in rows]
+    if len(facts) <= k and sum(estimate_tokens(f) + 1 for f in facts) <= token_budget:
+        return facts
+
+    try:
+        matrix = await memory_index.matrix(db, userID, rows)
+        scores = matrix @ (await embed_texts_async([query]))[0]
+        ranked = [facts[i] for i in top_k_indices(scores, k)]
+    except Exception as e:
+        logger.exception("select_relevant_memories: ranking failed, using most recent, error=%s", e)
+        ranked = facts[::-1][:k]
+
+    selected = take_within_budget(ranked, token_budget)
+    logger.info(
+        "select_relevant_memories: picked %d of %d memories for userID=%s",
+        len(selected), len(facts), userID
+    )
+    return selected
+
+
+# ─────────────────────────────────────────────
+# NEAR-DUPLICATE DETECTION
+# ─────────────────────────────────────────────
+
+def duplicate_threshold(tag: str | None = None) -> float:
+    """Pass the embedding tag from async code; looking it up may wait for the model to load."""
+    if MEMORY_DUPLICATE_THRESHOLD:
+        return float(MEMORY_DUPLICATE_THRESHOLD)
+    # Hashed vectors only measure word overlap, so on that fallback only
+    # near-verbatim repeats are dropped; paraphrases need the sentence model
+    tag = tag or embedding_model_tag()
+    return 0.92 if tag.startswith("hash:") else 0.80
+
+
+_DAYS = "monday tuesday wednesday thursday friday saturday sunday".split()
+_MONTHS = "january february march april may june july august september october november december".split()
+_SPECIFIC_RE = re.compile(r"\d+(?:[.:,]\d+)?(?:am|pm)?|[a-z]+")
+
+
+def fact_specifics(fact: str) -> frozenset[str]:
+    """
+    Days, months and numbers in a fact. Sentence vectors place "tennis on
+    Wednesday" right next to "tennis on Thursday"; facts whose specifics
+    differ are never duplicates, however close their vectors.
+    """
+    specifics = set()
+    for token in _SPECIFIC_RE.findall(fact.lower()):
+        word = token[:-1] if token.endswith("s") and token[:-1] in _DAYS else token
+        if word[0].isdigit() or word in _DAYS or word in _MONTHS:
+            specifics.add(word)
+    return frozenset(specifics)
+
+
+def near_duplicate_mask(
+    candidates: np.ndarray,
+    existing: np.ndarray,
+    threshold: float,
+    candidate_facts: list[str] | None = None,
+    existing_facts: list[str] | None = None,
+) -> np.ndarray:
+    """
+    True for each candidate row that restates an existing row or an earlier
+    candidate. Rows must be L2-normalised; one matmul per comparison. With
+    the facts' texts, pairs whose fact_specifics differ are not compared.
+    """
+    duplicate = np.zeros(len(candidates), dtype=bool)
+    if len(candidates) == 0:
+        return duplicate
+    same_c = same_e = None
+    if candidate_facts is not None:
+        ids: dict[frozenset, int] = {}
+        c_ids = np.array([ids.setdefault(fact_specifics(f), len(ids)) for f in candidate_facts])
+        e_ids = np.array([ids.setdefault(fact_specifics(f), len(ids)) for f in existing_facts or []])
+        same_c = c_ids[:, None] == c_ids[None, :]
+        same_e = c_ids[:, None] == e_ids[None, :]
+    if existing.size:
+        similarity = candidates @ existing.T
+        if same_e is not None:
+            similarity = np.where(same_e, similarity, -1.0)
+        duplicate |= similarity.max(axis=1) >= threshold
+    # Within the batch, a fact is dropped if an earlier one says the same thing
+    within = candidates @ candidates.T
+    if same_c is not None:
+        within = np.where(same_c, within, -1.0)
+    duplicate |= np.triu(within, k=1).max(axis=0) >= threshold
+    return duplicate
+
+
+async def filter_new_facts(db: Session, userID: str, facts: list[str]) -> tuple[list[str], np.ndarray | None]:
+    """
+    Drop facts that restate something the user's memory already holds (or
+    each other). Returns the kept facts and their embeddings, which callers
+    pass to store_fact_vectors after inserting. Falls back to exact matching
+    if embedding fails, in which case the embeddings are None.
+    """
+    facts = [f.strip() for f in facts if f and f.strip()]
+    rows = _memory_rows(db, userID)
+    if not facts:
+        return [], None
+    try:
+        existing = await memory_index.matrix(db, userID, rows) if rows else np.zeros((0, 0), dtype=np.float32)
+        candidates = await embed_texts_async(facts)
+        duplicate = near_duplicate_mask(
+            candidates, existing, duplicate_threshold(await embedding_model_tag_async()),
+            facts, [fact for _, fact in rows]
+        )
+    except Exception as e:
+        logger.exception("filter_new_facts: embedding failed, using exact matching, error=%s", e)
+        known = {fact for _, fact in rows}
+        kept = []
+        for fact in facts:
+            if fact not in known:
+                known.add(fact)
+                kept.append(fact)
+        return kept, None
+
+    if duplicate.any():
+        logger.info(
+            "filter_new_facts: dropped %d near-duplicate facts for userID=%s: %s",
+            int(duplicate.sum()), userID, [f for f, d in zip(facts, duplicate) if d]
+        )
+    keep = ~duplicate
+    return [f for f, k in zip(facts, keep) if k], candidates[keep]
+
+
+async def insert_facts(db: Session, userID: str, facts: list[str]) -> int:
+    """
+    Insert the facts that aren't near-duplicates into "Memory" and store
+    their embeddings. Returns how many were saved. Raises on DB errors.
+    """
+    new_facts, vectors = await filter_new_facts(db, userID, facts)
+    now_ms = int(time.time() * 1000)
+    memory_ids = [
+        db.execute(
+            sql_text(
+                'INSERT INTO "Memory" ("userId", fact, "createdAt") '
+                'VALUES (:userID, :fact, :createdAt) RETURNING memory_id'
+            ),
+            {"userID": userID, "fact": fact, "createdAt": now_ms}
+        ).scalar()
+        for fact in new_facts
+    ]
+    db.commit()
+    if vectors is not None:
+        await store_fact_vectors(db, userID, memory_ids, new_facts, vectors)
+    return len(memory_ids)
+
+
+def init_memory_index() -> None:
+    """Create the embedding table if needed (app startup)."""
+    from app.database import Base, engine
+    from app.models.memory import MemoryEmbeddingRecord
+
+    try:
+        Base.metadata.create_all(bind=engine, tables=[MemoryEmbeddingRecord.__table__])
+    except Exception as e:
+        logger.exception("init_memory_index: failed to create embedding table, error=%s", e)
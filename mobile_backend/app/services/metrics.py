@@ -0,0 +1,193 @@
+"""
+Process-local metrics in the Prometheus text exposition format, served at
+GET /metrics. Kept dependency-free: the backend only needs counters and
+histograms, and a scrape renders them straight from memory.
+"""
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+# Seconds; spans a cached intent lookup up to a long whisper transcription
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry: list["_Metric"] = []
+_registry_lock = threading.Lock()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_float(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        with _registry_lock:
+            if any(m.name == name for m in _registry):
+                raise ValueError(f"metric {name!r} is already registered")
+            _registry.append(self)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n"
+        return header + "".join(line + "\n" for line in self._samples())
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_label_str(self.labelnames, key)} {_format_float(v)}" for key, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> (per-bucket counts incl. +Inf, sum, count)
+        self._series: dict[tuple[str, ...], list] = {}
+
+    def observe(self, seconds: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the with-block, including when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series[2] if series else 0
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((key, ([*s[0]], s[1], s[2])) for key, s in self._series.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_float(bound)}"'
+                lines.append(f"{self.name}_bucket{_label_str(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_str(self.labelnames, key)} {_format_float(total)}")
+            lines.append(f"{self.name}_count{_label_str(self.labelnames, key)} {count}")
+        return lines
+
+
+def render_metrics() -> str:
+    with _registry_lock:
+        metrics = list(_registry)
+    return "".join(metric.render() for metric in metrics)
+
+
+# ─────────────────────────────────────────────
+# BACKEND METRICS
+# ─────────────────────────────────────────────
+
+STAGE_SECONDS = Histogram(
+    "qareeb_stage_duration_seconds",
+    "Duration of one stage of a request or background job.",
+    ("pipeline", "stage"),
+)
+LLM_REQUEST_SECONDS = Histogram(
+    "qareeb_llm_request_duration_seconds",
+    "Duration of a single Groq completion attempt.",
+    ("model", "outcome"),
+)
+LLM_RETRIES = Counter(
+    "qareeb_llm_retries_total",
+    "Groq attempts that failed transiently and were retried.",
+    ("model",),
+)
+LLM_CIRCUIT_REJECTIONS = Counter(
+    "qareeb_llm_circuit_rejections_total",
+    "Groq calls refused because the model's circuit breaker was open.",
+    ("model",),
+)
+LLM_FALLBACKS = Counter(
+    "qareeb_llm_fallbacks_total",
+    "Calls answered by a fallback: the backup model or the local intent classifier.",
+    ("operation", "reason"),
+)
+JOB_RUNS = Counter(
+    "qareeb_jobs_total",
+    "Background job attempts by outcome.",
+    ("job", "outcome"),
+)
+ASR_REJECTED = Counter(
+    "qareeb_asr_rejected_total",
+    "Transcriptions refused because the worker queue was full, or abandoned after the timeout.",
+    ("reason",),
+)
+ASR_BATCH_SIZE = Histogram(
+    "qareeb_asr_batch_size",
+    "Transcriptions decoded together in one Whisper forward pass.",
+    buckets=(1, 2, 4, 8, 16),
+)
+AUDIO_CACHE_LOOKUPS = Counter(
+    "qareeb_audio_cache_lookups_total",
+    "Lookups of results cached by upload hash: hit in memory, hit on disk, or miss.",
+    ("kind", "outcome"),
+)
@@ -214,7 +214,7 @@ def get_user_memories_for_notification(
 # MAIN DAILY CHECK
 # =========================
 
-def check_and_notify_all_users(db: Session) -> None:
+async def check_and_notify_all_users(db: Session) -> None:
     """
     Runs daily.
 
@@ -259,7 +259,7 @@ def check_and_notify_all_users(db: Session) -> None:
                 continue
 
             # ✅ NOW RETURNS LIST[str]
-            suggestions = get_upcoming_suggestions(
+            suggestions = await get_upcoming_suggestions(
                 db,
                 userID,
                 memories
@@ -1,11 +1,15 @@
+import json
 import logging
 from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 from sqlalchemy import text as sql_text
 
+from app.services.tracing import traced
+
 logger = logging.getLogger(__name__)
 
 
+@traced()
 def save_interaction(
     db: Session,
     userID: str,
@@ -14,10 +18,14 @@ def save_interaction(
     intent: str = "UNKNOWN",
     module: str = "CHATBOT",
     prompt_type: str = "TEXT",
+    raise_errors: bool = False,
+    intent_source: str | None = None,
 ) -> None:
     """
     Save every AI interaction to Prompts table automatically.
     This builds the history that behavioral analysis reads from.
+    With raise_errors the failure is re-raised so a job can retry it.
+    intent_source ("llm" or "local") goes into metadata for classifier training.
     """
     try:
         now_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
@@ -25,10 +33,10 @@ def save_interaction(
             sql_text('''
                 INSERT INTO "Prompts"
                 ("userId", user_message, qareeb_response,
-                 prompt_type, module, intent_detected, created_at)
+                 prompt_type, module, intent_detected, created_at, metadata)
                 VALUES
                 (:userId, :user_message, :qareeb_response,
-                 :prompt_type, :module, :intent_detected, :created_at)
+                 :prompt_type, :module, :intent_detected, :created_at, :metadata)
             '''),
             {
                 "userId": userID,
@@ -38,6 +46,7 @@ def save_interaction(
                 "module": module,
                 "intent_detected": intent,
                 "created_at": now_ms,
+                "metadata": json.dumps({"intent_source": intent_source}) if intent_source else None,
             }
         )
         db.commit()
@@ -47,4 +56,6 @@ def save_interaction(
         )
     except Exception as e:
         logger.exception("save_interaction: failed, error=%s", e)
-        db.rollback()
\ No newline at end of file
+        db.rollback()
+        if raise_errors:
+            raise
\ No newline at end of file
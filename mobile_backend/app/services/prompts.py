@@ -0,0 +1,270 @@
+import json
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from app.models.task import TaskRecord
+from app.models.transaction import FinanceRecord
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token, good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+# ─────────────────────────────────────────────
+# DATE CONTEXT
+# ─────────────────────────────────────────────
+
+@lru_cache(maxsize=2)
+def _date_context_for(today: date) -> str:
+    today_weekday = today.weekday()
+    day_names = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
+    upcoming = {}
+    for i, name in enumerate(day_names):
+        delta = (i - today_weekday) % 7
+        if delta == 0:
+            delta = 7
+        upcoming[name] = (today + timedelta(days=delta)).strftime("%Y-%m-%d")
+    tomorrow = (today + timedelta(days=1)).strftime("%Y-%m-%d")
+    return f"""
+Today's date is {today.strftime("%Y-%m-%d")} ({day_names[today_weekday]}).
+Tomorrow is {tomorrow}.
+Upcoming weekdays (use these exact dates, do NOT calculate yourself):
+This Monday: {upcoming['Monday']}
+This Tuesday: {upcoming['Tuesday']}
+This Wednesday: {upcoming['Wednesday']}
+This Thursday: {upcoming['Thursday']}
+This Friday: {upcoming['Friday']}
+This Saturday: {upcoming['Saturday']}
+This Sunday: {upcoming['Sunday']}
+""".strip()
+
+
+def get_date_context() -> str:
+    """The weekday table only changes at midnight, so it is built once per day."""
+    return _date_context_for(datetime.now().date())
+
+
+# ─────────────────────────────────────────────
+# REGISTRY
+# ─────────────────────────────────────────────
+
+class PromptTemplate:
+    """
+    A prompt split into a static prefix (instructions, schemas) that is
+    identical across requests and a dynamic suffix filled in per request.
+    Keeping everything that varies at the end lets Groq reuse the cached
+    prefix. Only the suffix goes through str.format, so the prefix can hold
+    JSON braces unescaped.
+    """
+
+    def __init__(self, name: str, static: str, dynamic: str):
+        self.name = name
+        self.static = static.strip() + "\n\n"
+        self.dynamic = dynamic.strip() + "\n"
+        self.static_tokens = estimate_tokens(self.static)
+        self.renders = 0
+        self.total_tokens = 0
+        self.last_tokens = 0
+        self._lock = threading.Lock()
+
+    def render(self, **values) -> str:
+        prompt = self.static + self.dynamic.format(**values)
+        tokens = estimate_tokens(prompt)
+        with self._lock:
+            self.renders += 1
+            self.total_tokens += tokens
+            self.last_tokens = tokens
+        logger.info(
+            "prompt %s: ~%d tokens (static prefix ~%d)",
+            self.name, tokens, self.static_tokens
+        )
+        return prompt
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            return {
+                "renders": self.renders,
+                "static_tokens": self.static_tokens,
+                "last_tokens": self.last_tokens,
+                "avg_tokens": round(self.total_tokens / self.renders, 1) if self.renders else 0,
+            }
+
+
+PROMPTS: dict[str, PromptTemplate] = {}
+
+
+def register_prompt(name: str, static: str, dynamic: str) -> PromptTemplate:
+    PROMPTS[name] = PromptTemplate(name, static, dynamic)
+    return PROMPTS[name]
+
+
+def render_prompt(name: str, **values) -> str:
+    return PROMPTS[name].render(**values)
+
+
+def prompt_stats() -> dict[str, dict[str, int | float]]:
+    return {name: template.stats() for name, template in PROMPTS.items()}
+
+
+# Serialised once at import instead of on every extraction call
+TASK_SCHEMA_JSON = json.dumps(TaskRecord.model_json_schema(), indent=2)
+FINANCE_SCHEMA_JSON = json.dumps(FinanceRecord.model_json_schema(), indent=2)
+
+
+# ─────────────────────────────────────────────
+# TEMPLATES
+# ─────────────────────────────────────────────
+
+register_prompt(
+    "intent",
+    static="""
+You are a STRICT intent classifier.
+
+Rules:
+If the user mentions an event, plan, reminder, or schedule → TASK_TRACKER
+If the user mentions money → FINANCE
+If the user wants to control apps → UI_AUTOMATION
+Otherwise → UNKNOWN
+
+Output ONLY one:
+TASK_TRACKER, FINANCE, UI_AUTOMATION, UNKNOWN
+""",
+    dynamic="""
+User request: "{text}"
+""",
+)
+
+register_prompt(
+    "finance_extraction",
+    static=f"""
+You are a financial data extraction assistant.
+
+Extract:
+- transactionID: null for new transactions
+- amount: numeric float
+- date: YYYY-MM-DD (today if not specified)
+- source: where money came from/went
+- description: what the transaction is about
+- income: true if income, false if expense
+- state: "pending", "completed", or "cancelled"
+- category_name: category
+- is_deleted: false
+
+Output ONLY valid JSON matching this schema:
+{FINANCE_SCHEMA_JSON}
+""",
+    dynamic="""
+{date_context}
+{memory_context}
+
+User request: "{text}"
+""",
+)
+
+register_prompt(
+    "task_extraction",
+    static=f"""
+You are a task extraction assistant.
+
+IMPORTANT: Use ONLY the exact dates listed below. Do NOT calculate dates yourself.
+
+Extract:
+- title: short 2-4 words
+- description: one natural sentence
+- status: default "pending"
+- progressPercentage: default 0
+- priority: default "medium"
+- dueDate: exact date from below only
+- is_deleted: false
+
+If memory says user has a recurring schedule for this task type,
+use that day's date automatically even if user didn't specify.
+
+Output ONLY valid JSON matching this schema:
+{TASK_SCHEMA_JSON}
+""",
+    dynamic="""
+{date_context}
+{memory_context}
+
+User request: "{text}"
+""",
+)
+
+register_prompt(
+    "task_update_extraction",
+    static="""
+You are a task update assistant.
+
+1. Identify which task title they mean from conversation
+2. Extract ONLY the fields they want to change
+
+Rules:
+- Only include explicitly changed fields
+- "mark as done" → status="completed", progressPercentage=100
+- "delete it" → is_deleted=true
+- target_title: infer from conversation
+
+Output ONLY:
+{
+  "target_title": "Task Title Here",
+  "changes": {
+    "dueDate": "2026-05-21"
+  }
+}
+""",
+    dynamic="""
+{date_context}
+{memory_context}
+
+Recent conversation:
+{conversation_history}
+
+User's update request: "{text}"
+""",
+)
+
+register_prompt(
+    "fused_extraction",
+    static=f"""
+You are the command router and data extractor for a personal assistant.
+
+IMPORTANT: Use ONLY the exact dates listed below. Do NOT calculate dates yourself.
+
+Step 1 - classify the request:
+If the user mentions an event, plan, reminder, or schedule → TASK_TRACKER
+If the user mentions money → FINANCE
+If the user wants to control apps → UI_AUTOMATION
+Otherwise → UNKNOWN
+
+Step 2 - extract data:
+If TASK_TRACKER, fill "task" (title: short 2-4 words, description: one sentence,
+status default "pending", progressPercentage default 0, priority default "medium",
+dueDate from the dates below, is_deleted false). If memory says the user has a
+recurring schedule for this task type, use that day's date.
+If FINANCE, fill "finance" (transactionID null, amount float, date YYYY-MM-DD
+(today if not specified), source, description, income true/false,
+state "pending"/"completed"/"cancelled", category_name, is_deleted false).
+Leave the other field null.
+
+Task schema:
+{TASK_SCHEMA_JSON}
+
+Finance schema:
+{FINANCE_SCHEMA_JSON}
+
+Output ONLY valid JSON:
+{{"intent": "TASK_TRACKER", "task": {{...}} or null, "finance": {{...}} or null}}
+""",
+    dynamic="""
+{date_context}
+{memory_context}
+
+User request: "{text}"
+""",
+)
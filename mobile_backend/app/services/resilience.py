@@ -0,0 +1,161 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Awaitable, Callable, TypeVar
+
+import httpx
+import groq
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+LLM_RETRY_ATTEMPTS = int(os.environ.get("LLM_RETRY_ATTEMPTS", 3))
+LLM_RETRY_BASE_DELAY = float(os.environ.get("LLM_RETRY_BASE_DELAY", 0.5))
+LLM_RETRY_MAX_DELAY = float(os.environ.get("LLM_RETRY_MAX_DELAY", 4.0))
+LLM_BREAKER_FAILURES = int(os.environ.get("LLM_BREAKER_FAILURES", 5))
+LLM_BREAKER_RESET = float(os.environ.get("LLM_BREAKER_RESET", 30.0))
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without calling upstream while a circuit breaker is open."""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Transient upstream trouble: timeouts, dropped connections, 429 and 5xx."""
+    if isinstance(exc, (groq.APIConnectionError, groq.RateLimitError, groq.InternalServerError)):
+        return True
+    if isinstance(exc, groq.APIStatusError):
+        return exc.status_code >= 500
+    return isinstance(exc, (httpx.TransportError, asyncio.TimeoutError))
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    attempts: int = LLM_RETRY_ATTEMPTS
+    base_delay: float = LLM_RETRY_BASE_DELAY
+    max_delay: float = LLM_RETRY_MAX_DELAY
+
+    def backoff(self, attempt: int) -> float:
+        # "Full jitter": spreads retries out so callers don't stampede together
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker. After `failure_threshold` transient failures
+    it opens and rejects calls for `reset_timeout` seconds, then lets a single
+    trial call through (half-open) to decide whether to close again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = LLM_BREAKER_FAILURES, reset_timeout: float = LLM_BREAKER_RESET):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self._lock:
+            if self.state == "closed":
+                return
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            raise CircuitOpenError(f"circuit for {self.name} is {self.state}")
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != "closed":
+                logger.info("circuit %s: closed again", self.name)
+            self.state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(
+                        "circuit %s: opened after %d failures, rejecting calls for %.0fs",
+                        self.name, self._failures, self.reset_timeout
+                    )
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """A half-open trial ended without a verdict (e.g. a 400), let the next one in."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def breaker_states() -> dict[str, str]:
+    with _breakers_lock:
+        return {name: breaker.state for name, breaker in _breakers.items()}
+
+
+async def call_with_resilience(
+    name: str,
+    func: Callable[[], Awaitable[T]],
+    policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+    on_retry: Callable[[int, BaseException], None] | None = None,
+) -> T:
+    """
+    Call func() through the named circuit breaker, retrying transient
+    failures with jittered async backoff. Non-transient errors (bad request,
+    auth) are raised straight away and do not trip the breaker.
+    """
+    breaker = get_breaker(name)
+    for attempt in range(policy.attempts):
+        breaker.before_call()
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            # e.g. the losing side of a hedge; says nothing about upstream health
+            breaker.release_trial()
+            raise
+        except Exception as e:
+            if not is_retryable(e):
+                breaker.release_trial()
+                raise
+            breaker.record_failure()
+            if attempt + 1 >= policy.attempts:
+                raise
+            delay = policy.backoff(attempt)
+            logger.warning(
+                "call_with_resilience: %s attempt %d/%d failed (%s), retrying in %.2fs",
+                name, attempt + 1, policy.attempts, e, delay
+            )
+            if on_retry is not None:
+                on_retry(attempt + 1, e)
+            await asyncio.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
+    raise RuntimeError("unreachable")
@@ -1,14 +1,12 @@
 import logging
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from groq import Groq
-import os
+from app.services.llm import chat_completion, DEFAULT_MODEL
 
 logger = logging.getLogger(__name__)
-groq_client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
 
 
-def get_upcoming_suggestions(
+async def get_upcoming_suggestions(
     db: Session,
     userID: str,
     memories: list[str]
@@ -84,21 +82,12 @@ Your answer:
 """
 
     try:
-        completion = groq_client.chat.completions.create(
-            model="openai/gpt-oss-120b",
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
+        response_text = (await chat_completion(
+            prompt,
+            model=DEFAULT_MODEL,
             temperature=0.3,
             max_completion_tokens=500,
-            top_p=1,
-            stream=False,
-        )
-
-        response_text = completion.choices[0].message.content.strip()
+        )).strip()
 
         logger.info(
             "get_upcoming_suggestions: raw LLM response=%r",
@@ -0,0 +1,344 @@
+"""
+Request-scoped tracing. A span is opened per HTTP request by the middleware
+in app.main and per stage, service call and Groq attempt below it; the
+current span lives in a ContextVar, so tasks spawned inside a request
+(StageGraph stages, hedged attempts) nest under it automatically.
+
+Finished traces are written as JSON lines (TRACE_EXPORT=json) or in the
+OTLP/JSON file format (TRACE_EXPORT=otlp) that the OpenTelemetry
+collector's otlpjsonfile receiver and most trace viewers can import.
+"""
+import os
+import json
+import time
+import asyncio
+import inspect
+import secrets
+import logging
+import functools
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+# off | json | otlp
+TRACE_EXPORT = os.environ.get("TRACE_EXPORT", "off").lower()
+TRACE_EXPORT_PATH = os.environ.get("TRACE_EXPORT_PATH", "traces/spans.jsonl")
+# Traces slower than this are also logged as an indented span tree
+TRACE_SLOW_MS = float(os.environ.get("TRACE_SLOW_MS", 5000))
+# Guards against a root span that never ends (e.g. a leaked task)
+TRACE_MAX_SPANS = int(os.environ.get("TRACE_MAX_SPANS", 2000))
+TRACE_MAX_OPEN = int(os.environ.get("TRACE_MAX_OPEN", 10000))
+SERVICE_NAME = os.environ.get("TRACE_SERVICE_NAME", "qareeb-backend")
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    start_ns: int
+    end_ns: int | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"
+    error: str | None = None
+    # Spans are buffered per root: a queued job continues the request's
+    # trace id but is exported as its own tree when it finishes
+    root_id: str = ""
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 2),
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+def current_trace_id() -> str | None:
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+
+def set_attribute(key: str, value: Any) -> None:
+    """Tag the current span, if there is one (no-op outside a trace)."""
+    span = _current_span.get()
+    if span is not None:
+        span.attributes[key] = value
+
+
+def new_trace_id() -> str:
+    return secrets.token_hex(16)
+
+
+def valid_trace_id(value: str | None) -> bool:
+    """32 lowercase hex chars, not all zero (the W3C/OTLP trace id format)."""
+    return bool(value) and len(value) == 32 and all(c in "0123456789abcdef" for c in value) and value != "0" * 32
+
+
+# ─────────────────────────────────────────────
+# COLLECTION
+# ─────────────────────────────────────────────
+
+class TraceCollector:
+    """
+    Buffers finished spans per trace and hands the whole trace to the
+    exporter when its root span ends.
+    """
+
+    def __init__(self, mode: str = TRACE_EXPORT, path: str = TRACE_EXPORT_PATH):
+        self.mode = mode
+        self.path = path
+        self._open: OrderedDict[str, list[Span]] = OrderedDict()
+        # Roots already exported; late children (e.g. a cancelled hedge
+        # attempt that unwinds after the response was sent) are dropped
+        self._finished: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            if span.root_id in self._finished:
+                return
+            spans = self._open.get(span.root_id)
+            if spans is None:
+                spans = self._open[span.root_id] = []
+                if len(self._open) > TRACE_MAX_OPEN:
+                    self._open.popitem(last=False)
+            if len(spans) < TRACE_MAX_SPANS:
+                spans.append(span)
+            if span.parent_id is not None:
+                return
+            spans = self._open.pop(span.root_id)
+            self._finished[span.root_id] = None
+            if len(self._finished) > TRACE_MAX_OPEN:
+                self._finished.popitem(last=False)
+        self._finish(span, spans)
+
+    def _finish(self, root: Span, spans: list[Span]) -> None:
+        if root.duration_ms >= TRACE_SLOW_MS:
+            logger.warning(
+                "trace %s: slow %s took %.0fms\n%s",
+                root.trace_id, root.name, root.duration_ms, format_trace(spans)
+            )
+        if self.mode == "off":
+            return
+        try:
+            line = json.dumps(
+                to_otlp(spans) if self.mode == "otlp" else [s.to_dict() for s in spans],
+                default=str,
+            )
+            with self._lock:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        except Exception:
+            logger.exception("tracing: failed to export trace %s", root.trace_id)
+
+
+collector = TraceCollector()
+
+
+def format_trace(spans: list[Span]) -> str:
+    """Indented span tree, children ordered by start time."""
+    children: dict[str | None, list[Span]] = {}
+    ids = {s.span_id for s in spans}
+    for s in sorted(spans, key=lambda s: s.start_ns):
+        # Orphans (parent dropped by TRACE_MAX_SPANS) print at the top level
+        children.setdefault(s.parent_id if s.parent_id in ids else None, []).append(s)
+
+    lines = []
+
+    def walk(parent: str | None, depth: int) -> None:
+        for s in children.get(parent, []):
+            attrs = " ".join(f"{k}={v}" for k, v in s.attributes.items())
+            status = "" if s.status == "ok" else f" [{s.status}: {s.error}]"
+            lines.append(f"{'  ' * depth}{s.name} {s.duration_ms:.1f}ms{status} {attrs}".rstrip())
+            walk(s.span_id, depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines)
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: list[Span]) -> dict:
+    """One ExportTraceServiceRequest in OTLP/JSON encoding."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [{
+                    "traceId": s.trace_id,
+                    "spanId": s.span_id,
+                    **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                    "name": s.name,
+                    "kind": 2 if s.parent_id is None else 1,  # SERVER for roots, INTERNAL below
+                    "startTimeUnixNano": str(s.start_ns),
+                    "endTimeUnixNano": str(s.end_ns),
+                    "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                    "status": {"code": 2, "message": s.error or ""} if s.status == "error" else {"code": 1},
+                } for s in spans],
+            }],
+        }],
+    }
+
+
+# ─────────────────────────────────────────────
+# SPANS
+# ─────────────────────────────────────────────
+
+@contextmanager
+def span(name: str, trace_id: str | None = None, **attributes: Any) -> Iterator[Span]:
+    """
+    Open a child of the current span, or a new trace when there is none
+    (trace_id lets an incoming X-Trace-Id or a queued job continue one).
+    """
+    parent = _current_span.get()
+    span_id = secrets.token_hex(8)
+    s = Span(
+        name=name,
+        trace_id=parent.trace_id if parent else (trace_id or new_trace_id()),
+        span_id=span_id,
+        parent_id=parent.span_id if parent else None,
+        start_ns=time.time_ns(),
+        attributes=attributes,
+        root_id=parent.root_id if parent else span_id,
+    )
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.status = "cancelled" if isinstance(e, asyncio.CancelledError) else "error"
+        s.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        s.end_ns = time.time_ns()
+        _current_span.reset(token)
+        collector.add(s)
+
+
+def traced(name: str | None = None):
+    """Decorator: run the function (sync or async) inside a span named after it."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ─────────────────────────────────────────────
+# HTTP MIDDLEWARE
+# ─────────────────────────────────────────────
+
+def _route_template(route, path: str) -> str:
+    template = route.path
+    if not route.path_regex.match(path):
+        # FastAPI >= 0.140 matches included routers in place, so the matched
+        # route only knows its own path; the URL supplies the prefixes
+        depth = template.count("/")
+        template = "/".join(path.split("/")[:-depth]) + template
+    return template
+
+
+class TraceMiddleware:
+    """
+    Root span per HTTP request; continues a caller's X-Trace-Id and echoes
+    it back. Plain ASGI rather than @app.middleware("http"): call_next
+    returns once the headers are sent, which would end the root before a
+    StreamingResponse body runs and drop every span created while it
+    streams. Here the span closes after the last body chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method, path = scope["method"], scope["path"]
+        incoming = dict(scope["headers"]).get(b"x-trace-id", b"").decode("latin-1").lower()
+        with span(
+            f"{method} {path}",
+            trace_id=incoming if valid_trace_id(incoming) else None,
+            **{"http.method": method, "http.path": path},
+        ) as root:
+            async def send_with_trace_id(message):
+                if message["type"] == "http.response.start":
+                    root.set_attribute("http.status_code", message["status"])
+                    headers = [*message.get("headers", []), (b"x-trace-id", root.trace_id.encode())]
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace_id)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    # Templated path, so /status/{job_id} groups as one operation
+                    root.name = f"{method} {_route_template(route, path)}"
+
+
+# ─────────────────────────────────────────────
+# LOG CORRELATION
+# ─────────────────────────────────────────────
+
+class TraceContextFilter(logging.Filter):
+    """Adds trace_id/span_id to records ("-" outside a trace) for %(trace_id)s in formats."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        s = _current_span.get()
+        record.trace_id = s.trace_id if s else "-"
+        record.span_id = s.span_id if s else "-"
+        return True
+
+
+def install_log_correlation() -> None:
+    """Attach TraceContextFilter to the root logger's handlers."""
+    for handler in logging.getLogger().handlers:
+        if not any(isinstance(f, TraceContextFilter) for f in handler.filters):
+            handler.addFilter(TraceContextFilter())
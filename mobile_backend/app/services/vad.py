@@ -0,0 +1,165 @@
+"""
+Energy-based voice activity detection on 16 kHz mono float32 audio.
+
+Frames are VAD_FRAME_MS long. A frame is speech when its level is
+VAD_THRESHOLD_DB above the running noise floor (and above VAD_MIN_DB
+absolute). Good enough to find pauses and the end of a spoken command;
+it is not a speech/noise classifier.
+"""
+import os
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+VAD_FRAME_MS = int(os.environ.get("VAD_FRAME_MS", 30))
+VAD_THRESHOLD_DB = float(os.environ.get("VAD_THRESHOLD_DB", 12.0))
+# Frames quieter than this (dBFS) are never speech, however quiet the room
+VAD_MIN_DB = float(os.environ.get("VAD_MIN_DB", -50.0))
+# Speech shorter than this is a click or a bump, not the start of a command
+VAD_MIN_SPEECH_MS = int(os.environ.get("VAD_MIN_SPEECH_MS", 120))
+# Silence this long inside speech is a pause (a place to cut a segment)
+VAD_PAUSE_MS = int(os.environ.get("VAD_PAUSE_MS", 300))
+# Silence this long after speech ends the utterance
+VAD_END_SILENCE_MS = int(os.environ.get("VAD_END_SILENCE_MS", 800))
+
+
+def pcm16_to_float(pcm: bytes) -> np.ndarray:
+    """Little-endian signed 16-bit PCM to float32 in [-1, 1), in a single allocation."""
+    audio = np.frombuffer(pcm, dtype="<i2").astype(np.float32)
+    audio *= 1 / 32768.0
+    return audio
+
+
+def frame_levels(audio: np.ndarray, frame: int) -> np.ndarray:
+    """RMS level in dBFS of each whole frame; a trailing partial frame is ignored."""
+    n = len(audio) // frame
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[:n * frame].reshape(n, frame)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+@dataclass
+class VADEvent:
+    kind: str  # speech_start | pause | end
+    sample: int  # position in the stream, in samples
+
+
+class VoiceActivityDetector:
+    """
+    Streaming detector: feed() audio as it arrives, get back events.
+
+        speech_start  speech began at .sample
+        pause         a VAD_PAUSE_MS gap; .sample is its middle, a safe cut point
+        end           VAD_END_SILENCE_MS of silence; .sample is where speech stopped
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        frame_ms: int = VAD_FRAME_MS,
+        threshold_db: float = VAD_THRESHOLD_DB,
+        min_db: float = VAD_MIN_DB,
+        min_speech_ms: int = VAD_MIN_SPEECH_MS,
+        pause_ms: int = VAD_PAUSE_MS,
+        end_silence_ms: int = VAD_END_SILENCE_MS,
+    ):
+        self.frame = sample_rate * frame_ms // 1000
+        self.threshold_db = threshold_db
+        self.min_db = min_db
+        self._min_speech = max(1, min_speech_ms // frame_ms)
+        self._pause = max(1, pause_ms // frame_ms)
+        self._end = max(self._pause, end_silence_ms // frame_ms)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._floor: float | None = None
+        self.frames = 0
+        self.in_speech = False
+        self.heard_speech = False
+        self._speech_run = 0
+        self._silence_run = 0
+
+    def feed(self, audio: np.ndarray) -> list[VADEvent]:
+        if len(self._pending):
+            audio = np.concatenate([self._pending, audio])
+        levels = frame_levels(audio, self.frame)
+        self._pending = audio[len(levels) * self.frame:]
+
+        events = []
+        for level in levels:
+            self.frames += 1
+            if self._floor is None:
+                self._floor = float(level)
+            speech = level > max(self.min_db, self._floor + self.threshold_db)
+            if speech:
+                self._speech_run += 1
+                self._silence_run = 0
+                if not self.in_speech and self._speech_run >= self._min_speech:
+                    self.in_speech = self.heard_speech = True
+                    events.append(VADEvent("speech_start", (self.frames - self._speech_run) * self.frame))
+                continue
+
+            self._speech_run = 0
+            self._silence_run += 1
+            # Follow the room's noise down immediately and up slowly
+            self._floor = min(float(level), 0.95 * self._floor + 0.05 * float(level))
+            if not self.in_speech:
+                continue
+            silence_start = (self.frames - self._silence_run) * self.frame
+            if self._silence_run == self._pause:
+                events.append(VADEvent("pause", silence_start + self._pause * self.frame // 2))
+            if self._silence_run >= self._end:
+                self.in_speech = False
+                events.append(VADEvent("end", silence_start))
+        return events
+
+
+# ─────────────────────────────────────────────
+# WHOLE-CLIP TRIMMING
+# ─────────────────────────────────────────────
+
+# Silence kept before and after the speech so word edges survive the trim
+VAD_TRIM_PAD_MS = int(os.environ.get("VAD_TRIM_PAD_MS", 150))
+
+
+def speech_bounds(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    frame_ms: int = VAD_FRAME_MS,
+    threshold_db: float = VAD_THRESHOLD_DB,
+    min_db: float = VAD_MIN_DB,
+    min_speech_ms: int = VAD_MIN_SPEECH_MS,
+    pad_ms: int = VAD_TRIM_PAD_MS,
+) -> tuple[int, int] | None:
+    """
+    (start, end) sample range from the first to the last run of speech,
+    padded, or None if the clip is silent. The noise floor is the clip's
+    10th percentile level. A clip that never rises threshold_db above it
+    (talking throughout, or a steady hum) is kept wherever it is above
+    min_db; only a clip that stays under min_db counts as silent.
+    """
+    frame = sample_rate * frame_ms // 1000
+    levels = frame_levels(audio, frame)
+    if not len(levels):
+        return None
+    floor = float(np.percentile(levels, 10))
+    speech = levels > max(min_db, floor + threshold_db)
+    if not speech.any():
+        speech = levels > min_db
+    # Starts of min_speech_ms runs of speech frames, so clicks don't count
+    run = max(1, min_speech_ms // frame_ms)
+    starts = np.flatnonzero(np.convolve(speech, np.ones(run, dtype=int), "valid") == run)
+    if not len(starts):
+        return None
+    pad = sample_rate * pad_ms // 1000
+    return max(0, starts[0] * frame - pad), min(len(audio), (starts[-1] + run) * frame + pad)
+
+
+def trim_silence(audio: np.ndarray, **kwargs) -> np.ndarray | None:
+    """audio without leading and trailing silence (a view), or None if it is all silence."""
+    bounds = speech_bounds(audio, **kwargs)
+    return None if bounds is None else audio[bounds[0]:bounds[1]]
@@ -2,11 +2,11 @@ import os
 import logging
 import base64
 import numpy as np
-import torch
-import whisper
 from dotenv import load_dotenv
 from cryptography.fernet import Fernet
 
+from app.services.tracing import traced
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -62,13 +62,21 @@ def get_wavlm_model():
             raise RuntimeError(f"WavLM model failed to load: {e}")
     return _feature_extractor, _wavlm_model
 
-def extract_voice_embedding(audio_path: str) -> np.ndarray:
+def extract_voice_embedding(audio: str | np.ndarray) -> np.ndarray:
     """
-    Extract a normalized 512-dimensional speaker embedding from the audio file.
-    Resamples automatically to 16kHz using whisper.load_audio.
+    Extract a normalized 512-dimensional speaker embedding from an audio file
+    or from 16kHz mono float32 samples. Files are decoded and trimmed of
+    silence here; sample arrays are used as given, so callers trim them.
     """
-    # Load audio (resampled to 16kHz mono float32 array)
-    audio = whisper.load_audio(audio_path)
+    # torch is imported here so loading this module stays cheap
+    import torch
+    from app.services.audio import decode_audio, speech_only
+
+    if isinstance(audio, str):
+        # Load audio (resampled to 16kHz mono float32 array)
+        audio = speech_only(decode_audio(audio))
+        if audio is None:
+            raise ValueError("No speech in the recording")
     
     # Get lazy-loaded model & feature extractor
     feature_extractor, model = get_wavlm_model()
@@ -123,14 +131,15 @@ def decrypt_embedding(encrypted_bytes) -> np.ndarray:
     # Deserialize back to float32 numpy array
     return np.frombuffer(raw_bytes, dtype=np.float32)
 
-def verify_voice(audio_path: str, stored_encrypted_embedding: bytes, threshold: float = 0.75) -> tuple[bool, float]:
+@traced()
+def verify_voice(audio: str | np.ndarray, stored_encrypted_embedding: bytes, threshold: float = 0.75) -> tuple[bool, float]:
     """
-    Extract embedding from incoming audio file, decrypt stored embedding,
-    and compare their cosine similarity.
+    Extract embedding from incoming audio (file or samples), decrypt stored
+    embedding, and compare their cosine similarity.
     Returns (is_verified, score).
     """
     try:
-        incoming_emb = extract_voice_embedding(audio_path)
+        incoming_emb = extract_voice_embedding(audio)
         stored_emb = decrypt_embedding(stored_encrypted_embedding)
         
         # Cosine similarity is the dot product of two unit-normalized vectors
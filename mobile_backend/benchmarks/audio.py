@@ -0,0 +1,53 @@
+"""
+Synthetic audio fixtures. Whisper's cost depends on clip length and on how
+much of it is speech-like, so fixtures vary both: voiced segments are
+harmonic tones with a syllable-rate envelope, separated by low noise.
+"""
+import io
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def synth_speechlike(seconds: float, voiced_ratio: float = 0.7, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    n = int(seconds * SAMPLE_RATE)
+    t = np.arange(n) / SAMPLE_RATE
+    pitch = 120 + 30 * np.sin(2 * np.pi * 0.5 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+    # ~4 syllables per second
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None) ** 2
+    speech_mask = np.zeros(n)
+    speech_mask[: int(n * voiced_ratio)] = 1.0
+    signal = 0.3 * voiced * envelope * speech_mask + 0.01 * rng.standard_normal(n)
+    return signal.astype(np.float32)
+
+
+def to_wav_bytes(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> bytes:
+    pcm = (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+# name -> (seconds, voiced_ratio)
+FIXTURES = {
+    "short_2s": (2.0, 0.8),
+    "medium_6s": (6.0, 0.7),
+    "long_20s": (20.0, 0.5),
+    "silence_3s": (3.0, 0.0),
+}
+
+
+def fixture_wavs() -> dict[str, bytes]:
+    return {
+        name: to_wav_bytes(synth_speechlike(seconds, voiced, seed=i))
+        for i, (name, (seconds, voiced)) in enumerate(FIXTURES.items())
+    }
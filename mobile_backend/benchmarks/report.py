@@ -0,0 +1,73 @@
+"""Latency statistics, per-stage breakdown and baseline comparison."""
+import json
+
+import numpy as np
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def summarize(latencies_ms: list[float], wall_s: float, errors: int, stages: dict[str, list[float]]) -> dict:
+    values = np.asarray(latencies_ms, dtype=float)
+    summary = {
+        "requests": int(values.size + errors),
+        "errors": errors,
+        "throughput_rps": round(values.size / wall_s, 2) if wall_s > 0 else 0.0,
+        "latency_ms": {},
+        "stages_ms": {},
+    }
+    if values.size:
+        summary["latency_ms"] = {
+            "mean": round(float(values.mean()), 1),
+            **{f"p{p}": round(float(np.percentile(values, p)), 1) for p in PERCENTILES},
+            "max": round(float(values.max()), 1),
+        }
+    for stage, samples in sorted(stages.items()):
+        stage_values = np.asarray(samples, dtype=float)
+        summary["stages_ms"][stage] = {
+            "p50": round(float(np.percentile(stage_values, 50)), 1),
+            "p95": round(float(np.percentile(stage_values, 95)), 1),
+        }
+    return summary
+
+
+def print_summary(scenario: str, concurrency: int, summary: dict) -> None:
+    lat = summary["latency_ms"]
+    print(
+        f"{scenario:<16} c={concurrency:<4} n={summary['requests']:<5} err={summary['errors']:<3} "
+        f"rps={summary['throughput_rps']:<8} "
+        + (" ".join(f"p{p}={lat[f'p{p}']}" for p in PERCENTILES) if lat else "no successful requests")
+    )
+    if summary["stages_ms"]:
+        print("    stages p50/p95 ms: " + ", ".join(
+            f"{name}={s['p50']}/{s['p95']}" for name, s in summary["stages_ms"].items()
+        ))
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Regressions of the current run against a saved one: p50/p95/p99 latency
+    up, or throughput down, by more than `threshold` (a fraction).
+    """
+    regressions = []
+    for key, run in current["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if not base or not run["latency_ms"] or not base["latency_ms"]:
+            continue
+        for p in ("p50", "p95", "p99"):
+            old, new = base["latency_ms"][p], run["latency_ms"][p]
+            if old > 0 and (new - old) / old > threshold:
+                regressions.append(f"{key}: {p} {old}ms -> {new}ms (+{(new - old) / old:.0%})")
+        old, new = base["throughput_rps"], run["throughput_rps"]
+        if old > 0 and (old - new) / old > threshold:
+            regressions.append(f"{key}: throughput {old} -> {new} rps (-{(old - new) / old:.0%})")
+    return regressions
+
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save(path: str, data: dict) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
@@ -0,0 +1,59 @@
+"""
+Request mixes. Each scenario yields (method, path, kwargs) for the httpx
+client; phrases avoid UI automation, which would spawn droidrun.
+"""
+import itertools
+
+TASK_PHRASES = [
+    "remind me to submit the OS assignment on Thursday",
+    "add a task to call the dentist tomorrow",
+    "schedule a study session for the networks exam on Monday",
+    "create an urgent task to renew my passport",
+    "remind me to buy groceries on Saturday",
+]
+
+FINANCE_PHRASES = [
+    "I spent 45 on groceries today",
+    "paid 12.5 for coffee this morning",
+    "I received my salary of 3000",
+    "spent 60 on a taxi to the airport",
+    "got paid 200 for freelance work",
+]
+
+MIXED_PHRASES = TASK_PHRASES + FINANCE_PHRASES + [
+    "what's the weather like",
+    "tell me a joke",
+]
+
+
+def _text_requests(phrases: list[str], users: list[str]):
+    for i, phrase in enumerate(itertools.cycle(phrases)):
+        yield "POST", "/api/ai/text", {"json": {"text": phrase, "userID": users[i % len(users)]}}
+
+
+def _command_requests(wavs: dict[str, bytes], users: list[str]):
+    names = list(wavs)
+    for i in itertools.count():
+        name = names[i % len(names)]
+        yield "POST", "/api/ai/transcribe", {
+            "files": {"file": (f"{name}.wav", wavs[name], "audio/wav")},
+            "data": {"userID": users[i % len(users)]},
+        }
+
+
+def request_stream(scenario: str, users: list[str], wavs: dict[str, bytes] | None = None):
+    if scenario == "text_task":
+        return _text_requests(TASK_PHRASES, users)
+    if scenario == "text_finance":
+        return _text_requests(FINANCE_PHRASES, users)
+    if scenario == "text_mixed":
+        return _text_requests(MIXED_PHRASES, users)
+    if scenario == "command":
+        return _command_requests(wavs or {}, users)
+    raise ValueError(f"unknown scenario: {scenario}")
+
+
+HTTP_SCENARIOS = ("text_task", "text_finance", "text_mixed", "command")
+# Timed as one daily run over all seeded users rather than as requests
+BATCH_SCENARIOS = ("notifications",)
+SCENARIOS = HTTP_SCENARIOS + BATCH_SCENARIOS
@@ -0,0 +1,207 @@
+"""
+In-process stand-ins for the backend's external dependencies, so the
+benchmark exercises the real routers, controllers and services without
+Groq, Firebase or Postgres.
+"""
+import re
+import time
+import asyncio
+import itertools
+import threading
+from typing import Any
+
+import httpx
+from groq import AsyncGroq
+
+from app.dev import llm_standin
+from app.services import llm, notification
+
+TASK_COLUMNS = {
+    "id", "taskID", "userID", "title", "description", "status", "progressPercentage",
+    "priority", "dueDate", "created_at", "updated_at", "is_deleted",
+}
+TRANSACTION_COLUMNS = {
+    "id", "transactionID", "userID", "title", "amount", "date", "source", "description",
+    "income", "state", "category_name", "created_at", "is_deleted",
+}
+
+SAMPLE_FACTS = [
+    "has gym every Monday and Thursday at 7pm",
+    "prefers to study for exams at 8am",
+    "is preparing for an Operating Systems exam",
+    "pays rent of 500 on the first of every month",
+    "has tennis practice every Wednesday",
+    "usually buys groceries on Saturday mornings",
+    "works on the graduation project on weekends",
+    "has a weekly team meeting on Sunday at 10am",
+    "tracks coffee expenses",
+    "goes swimming on Fridays",
+]
+
+
+# ─────────────────────────────────────────────
+# POSTGRES
+# ─────────────────────────────────────────────
+
+class FakeResult:
+    def __init__(self, rows: list[dict] | None = None, rowcount: int = 0):
+        self._rows = rows or []
+        self.rowcount = rowcount or len(self._rows)
+
+    def mappings(self) -> "FakeResult":
+        return self
+
+    def all(self) -> list[dict]:
+        return self._rows
+
+    def first(self) -> dict | None:
+        return self._rows[0] if self._rows else None
+
+    def scalar(self) -> Any:
+        return next(iter(self._rows[0].values())) if self._rows else None
+
+    def scalars(self) -> "FakeResult":
+        return FakeResult([{"v": next(iter(r.values()))} for r in self._rows])
+
+
+class FakeDatabase:
+    """
+    Shared in-memory state behind FakeSession. Understands the statements the
+    AI paths issue; anything else returns an empty result and is counted in
+    `unhandled` so a new query shows up in the report instead of silently
+    skewing it. Each statement blocks for `latency_ms`, like psycopg2 does.
+    """
+
+    def __init__(self, latency_ms: float = 1.0, facts_per_user: int = 30):
+        self.latency = latency_ms / 1000
+        self.facts_per_user = facts_per_user
+        self.memories: dict[str, list[dict]] = {}
+        self.embeddings: dict[tuple[int, str], dict] = {}
+        self.rows: dict[str, list[dict]] = {"Task": [], "Transaction": [], "BackgroundJob": []}
+        self.users: list[dict] = []
+        self.statements = 0
+        self.unhandled: dict[str, int] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def seed_user(self, userID: str, fcm_token: str | None = None) -> None:
+        facts = [
+            SAMPLE_FACTS[i % len(SAMPLE_FACTS)] + ("" if i < len(SAMPLE_FACTS) else f" (note {i})")
+            for i in range(self.facts_per_user)
+        ]
+        self.memories[userID] = [
+            {"memory_id": next(self._ids), "fact": fact, "createdAt": i} for i, fact in enumerate(facts)
+        ]
+        if fcm_token:
+            self.users.append({"userID": userID, "fcm_token": fcm_token})
+
+    def session(self) -> "FakeSession":
+        return FakeSession(self)
+
+
+class FakeSession:
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+
+    def execute(self, statement, params: Any = None) -> FakeResult:
+        database = self.database
+        if database.latency:
+            time.sleep(database.latency)
+        sql = " ".join(str(statement).split())
+        with database._lock:
+            database.statements += 1
+            return self._route(sql, params or {})
+
+    def _route(self, sql: str, params: Any) -> FakeResult:
+        database = self.database
+        if "information_schema.columns" in sql:
+            columns = TASK_COLUMNS if params["table_name"] == "Task" else TRANSACTION_COLUMNS
+            return FakeResult([{"column_name": c} for c in columns])
+
+        insert = re.match(r'INSERT INTO "(Task|Transaction)"', sql)
+        if insert:
+            row = {"id": next(database._ids), **params}
+            database.rows[insert.group(1)].append(row)
+            return FakeResult([row])
+
+        if sql.startswith('INSERT INTO "BackgroundJob"'):
+            return FakeResult([{"job_id": next(database._ids)}])
+
+        if sql.startswith('INSERT INTO "Memory"'):
+            row = {"memory_id": next(database._ids), "fact": params["fact"], "createdAt": params["createdAt"]}
+            database.memories.setdefault(params["userID"], []).append(row)
+            return FakeResult([{"memory_id": row["memory_id"]}])
+
+        if sql.startswith('INSERT INTO "MemoryEmbedding"'):
+            for p in params if isinstance(params, list) else [params]:
+                database.embeddings[(p["memory_id"], p["model"])] = p
+            return FakeResult(rowcount=len(params) if isinstance(params, list) else 1)
+
+        if 'FROM "MemoryEmbedding"' in sql:
+            return FakeResult([
+                {"memory_id": key[0], "fact_hash": p["fact_hash"], "vector": p["vector"]}
+                for key, p in database.embeddings.items()
+                if p["userID"] == params["userID"] and key[1] == params["model"]
+            ])
+
+        if 'FROM "Memory"' in sql:
+            return FakeResult([dict(r) for r in database.memories.get(params.get("userID"), [])])
+
+        if 'SELECT voice_embedding FROM "User"' in sql:
+            return FakeResult([{"voice_embedding": None}])
+
+        if 'FROM "User"' in sql and "fcm_token" in sql:
+            return FakeResult(list(database.users))
+
+        if re.search(r'FROM "(Task|Transaction)"', sql):
+            return FakeResult([])
+
+        key = sql[:60]
+        database.unhandled[key] = database.unhandled.get(key, 0) + 1
+        return FakeResult([])
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+# ─────────────────────────────────────────────
+# GROQ
+# ─────────────────────────────────────────────
+
+def install_llm_standin(latency_ms: float, error_rate: float = 0.0, seed: int = 7) -> None:
+    """
+    Route this loop's Groq client to the stand-in app through an in-memory
+    ASGI transport: the real SDK, retries and streaming code run, no sockets.
+    """
+    llm_standin.config.latency_ms = latency_ms
+    llm_standin.config.jitter_ms = latency_ms * 0.2
+    llm_standin.config.token_delay_ms = 0
+    llm_standin.config.error_rate = error_rate
+    llm_standin._rng.seed(seed)
+
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=llm_standin.app))
+    client = AsyncGroq(api_key="bench", base_url="http://llm-standin", http_client=http_client, max_retries=0)
+    llm._clients[asyncio.get_running_loop()] = (client, asyncio.Semaphore(llm.LLM_MAX_CONCURRENCY))
+
+
+# ─────────────────────────────────────────────
+# FCM
+# ─────────────────────────────────────────────
+
+def install_fcm_standin(latency_ms: float) -> list[dict]:
+    """Replace the Firebase send with a fixed-latency recorder; returns the sent log."""
+    sent: list[dict] = []
+
+    def send_push_notification(fcm_token: str, title: str, body: str, data: dict = None) -> bool:
+        time.sleep(latency_ms / 1000)
+        sent.append({"token": fcm_token, "title": title, "body": body})
+        return True
+
+    notification.send_push_notification = send_push_notification
+    return sent
@@ -0,0 +1,13 @@
+"""
+Run the offline Groq stand-in (app/dev/llm_standin.py).
+Start the backend with GROQ_BASE_URL=http://localhost:8100 to use it.
+"""
+import os
+import uvicorn
+
+if __name__ == "__main__":
+    uvicorn.run(
+        "app.dev.llm_standin:app",
+        host="127.0.0.1",
+        port=int(os.environ.get("STANDIN_PORT", 8100)),
+    )
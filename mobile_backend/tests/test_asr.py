@@ -0,0 +1,296 @@
+import sys
+import os
+import time
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+
+# Set python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import health
+from app.services import asr
+from app.services.asr import ASRBatcher, ASRBusyError, ASRModelManager, ASRTimeoutError, ASRWorkerPool
+from app.services.asr_engines import create_engine, log_mel_batch
+from app.services.metrics import ASR_REJECTED
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class TestASRModelManager(unittest.TestCase):
+
+    def test_concurrent_callers_share_one_load(self):
+        loads = []
+
+        def loader(name, download_root):
+            loads.append(name)
+            time.sleep(0.1)
+            return object()
+
+        manager = ASRModelManager("tiny", loader=loader)
+        models = []
+        threads = [threading.Thread(target=lambda: models.append(manager.get())) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(loads, ["tiny"])
+        self.assertEqual(len({id(m) for m in models}), 1)
+        self.assertTrue(manager.ready)
+        self.assertIsNotNone(manager.status()["load_seconds"])
+
+    def test_failed_load_reports_and_retries(self):
+        attempts = []
+
+        def loader(name, download_root):
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise OSError("download failed")
+            return "model"
+
+        manager = ASRModelManager("tiny", loader=loader)
+        with self.assertRaises(RuntimeError):
+            manager.get()
+        self.assertEqual(manager.state, "failed")
+        self.assertIn("download failed", manager.error)
+
+        self.assertEqual(manager.get(), "model")
+        self.assertEqual(manager.state, "ready")
+
+    def test_warmup_does_not_block(self):
+        release = threading.Event()
+
+        def loader(name, download_root):
+            release.wait(2)
+            return "model"
+
+        manager = ASRModelManager("tiny", loader=loader)
+        started = time.perf_counter()
+        manager.warmup()
+        manager.warmup()
+        self.assertLess(time.perf_counter() - started, 0.05)
+        self.assertFalse(manager.ready)
+
+        release.set()
+        manager._thread.join(2)
+        self.assertTrue(manager.ready)
+
+
+class TestASRWorkerPool(unittest.IsolatedAsyncioTestCase):
+    """Real worker processes, but running stdlib functions instead of Whisper."""
+
+    def make_pool(self, **kwargs) -> ASRWorkerPool:
+        pool = ASRWorkerPool(
+            workers=1, start_method="spawn", initializer=int, initargs=(), ready_check=os.getpid, **kwargs
+        )
+        self.addCleanup(pool.shutdown)
+        return pool
+
+    async def test_runs_in_another_process(self):
+        pool = self.make_pool(queue_size=2, timeout=30)
+        pid = await pool.run(os.getpid)
+        self.assertNotEqual(pid, os.getpid())
+        self.assertTrue(pool.ready)
+        self.assertEqual(pool.status()["in_flight"], 0)
+
+    async def test_rejects_when_queue_is_full(self):
+        pool = self.make_pool(queue_size=1, timeout=30)
+        running = asyncio.ensure_future(pool.run(time.sleep, 0.5))
+        await asyncio.sleep(0)
+        with self.assertRaises(ASRBusyError):
+            await pool.run(os.getpid)
+        await running
+        self.assertIsInstance(await pool.run(os.getpid), int)
+
+    async def test_timeout(self):
+        pool = self.make_pool(queue_size=2, timeout=0.2)
+        await pool.run(os.getpid)  # don't count worker startup against the timeout
+        rejected = ASR_REJECTED.value(reason="timeout")
+        with self.assertRaises(ASRTimeoutError):
+            await pool.run(time.sleep, 1, weight=2)
+        self.assertEqual(ASR_REJECTED.value(reason="timeout"), rejected + 2)
+        # The worker is still decoding, so its slots stay taken until it finishes
+        self.assertEqual(pool.status()["in_flight"], 2)
+        with self.assertRaises(ASRBusyError):
+            await pool.run(os.getpid)
+        for _ in range(200):
+            if pool.status()["in_flight"] == 0:
+                break
+            await asyncio.sleep(0.05)
+        self.assertEqual(pool.status()["in_flight"], 0)
+        self.assertIsInstance(await pool.run(os.getpid), int)
+
+    async def test_cancelled_caller_keeps_the_slot_until_the_worker_is_done(self):
+        pool = self.make_pool(queue_size=1, timeout=30)
+        await pool.run(os.getpid)
+        caller = asyncio.ensure_future(pool.run(time.sleep, 0.5))
+        await asyncio.sleep(0.1)
+        caller.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await caller
+        self.assertEqual(pool.status()["in_flight"], 1)
+        with self.assertRaises(ASRBusyError):
+            await pool.run(os.getpid)
+        for _ in range(200):
+            if pool.status()["in_flight"] == 0:
+                break
+            await asyncio.sleep(0.05)
+        self.assertEqual(pool.status()["in_flight"], 0)
+
+
+class TestASRBatcher(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrent_requests_share_a_batch(self):
+        batches = []
+
+        async def run_batch(paths):
+            batches.append(paths)
+            return [p.upper() for p in paths]
+
+        batcher = ASRBatcher(run_batch, max_batch=3, window_ms=20)
+        results = await asyncio.gather(*(batcher.submit(p) for p in ("a", "b", "c", "d")))
+
+        self.assertEqual(results, ["A", "B", "C", "D"])
+        self.assertEqual(batches, [["a", "b", "c"], ["d"]])
+
+    async def test_window_flushes_partial_batch(self):
+        batcher = ASRBatcher(lambda paths: asyncio.sleep(0, [len(paths)] * len(paths)), max_batch=8, window_ms=10)
+        self.assertEqual(await asyncio.wait_for(batcher.submit("a"), 1), 1)
+
+    async def test_errors_reach_the_right_callers(self):
+        async def run_batch(paths):
+            return [ValueError(p) if p == "bad" else p for p in paths]
+
+        batcher = ASRBatcher(run_batch, max_batch=2, window_ms=10)
+        good, bad = await asyncio.gather(batcher.submit("good"), batcher.submit("bad"), return_exceptions=True)
+        self.assertEqual(good, "good")
+        self.assertIsInstance(bad, ValueError)
+
+        async def failing(paths):
+            raise ASRBusyError("full")
+
+        batcher = ASRBatcher(failing, max_batch=2, window_ms=10)
+        results = await asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True)
+        self.assertTrue(all(isinstance(r, ASRBusyError) for r in results))
+
+
+class TestLogMelBatch(unittest.TestCase):
+
+    def test_matches_whisper_per_clip(self):
+        try:
+            import torch
+            import whisper
+        except ImportError:
+            self.skipTest("whisper not installed")
+        rng = np.random.default_rng(0)
+        clips = [
+            whisper.pad_or_trim(torch.from_numpy(rng.normal(0, scale, n).astype(np.float32)))
+            for scale, n in ((0.01, 16000), (0.5, 48000))
+        ]
+        batched = log_mel_batch(torch.stack(clips))
+        for clip, mel in zip(clips, batched):
+            torch.testing.assert_close(mel, whisper.log_mel_spectrogram(clip), rtol=1e-4, atol=1e-4)
+
+
+class TestEngines(unittest.TestCase):
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            create_engine("nope", "base", None, "en")
+
+    def test_word_error_rate(self):
+        self.assertEqual(word_error_rate("Add 50 to groceries.", "add 50 to groceries"), 0)
+        self.assertEqual(word_error_rate("a b c d", "a x c"), 0.5)
+
+
+def _words(text: str) -> list[str]:
+    return "".join(c for c in text.lower() if c.isalnum() or c.isspace()).split()
+
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    ref, hyp = _words(reference), _words(hypothesis)
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1] / max(len(ref), 1)
+
+
+class TestEngineParity(unittest.TestCase):
+    """
+    The int8 engine against openai-whisper on recorded commands. Needs ffmpeg,
+    faster-whisper and both models (downloaded, or under ASR_MODEL_DIR).
+    """
+
+    MAX_WER = 0.15
+
+    @classmethod
+    def setUpClass(cls):
+        model = os.environ.get("ASR_MODEL", "base")
+        root = os.environ.get("ASR_MODEL_DIR") or None
+        try:
+            cls.reference = create_engine("whisper", model, root, "en")
+            cls.candidate = create_engine("faster-whisper", model, root, "en", compute_type="int8")
+        except Exception as e:
+            raise unittest.SkipTest(f"engines unavailable: {e}")
+
+    def test_transcripts_match_reference(self):
+        clips = sorted(f for f in os.listdir(FIXTURES) if f.endswith((".mp3", ".wav")))
+        self.assertTrue(clips)
+        for name in clips:
+            with self.subTest(clip=name):
+                audio = self.reference.load_audio(os.path.join(FIXTURES, name))
+                expected = self.reference.transcribe(audio)
+                actual = self.candidate.transcribe(audio)
+                self.assertLessEqual(word_error_rate(expected, actual), self.MAX_WER, f"{expected!r} vs {actual!r}")
+
+
+class TestReadiness(unittest.TestCase):
+
+    def setUp(self):
+        self._model, self._pool = asr.asr_model, asr.asr_pool
+        asr.asr_pool = None
+        app = FastAPI()
+        app.include_router(health.router, prefix="/api")
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        asr.asr_model, asr.asr_pool = self._model, self._pool
+
+    def test_instance_ready_while_asr_loads(self):
+        asr.asr_model = ASRModelManager("tiny", loader=lambda name, root: "model")
+        self.assertEqual(self.client.get("/api/health").status_code, 200)
+
+        response = self.client.get("/api/health/ready")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["asr"]["state"], "unloaded")
+
+    def test_asr_not_ready_until_loaded(self):
+        asr.asr_model = ASRModelManager("tiny", loader=lambda name, root: "model")
+        with mock.patch.object(asr, "ASR_LOAD_MODE", "background"):
+            response = self.client.get("/api/health/ready/asr")
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response.json()["asr"]["state"], "unloaded")
+
+            asr.asr_model.get()
+            response = self.client.get("/api/health/ready/asr")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["status"], "ready")
+
+    def test_lazy_asr_is_ready_before_loading(self):
+        asr.asr_model = ASRModelManager("tiny", loader=lambda name, root: "model")
+        with mock.patch.object(asr, "ASR_LOAD_MODE", "lazy"):
+            response = self.client.get("/api/health/ready/asr")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["asr"]["state"], "unloaded")
+
+if __name__ == "__main__":
+    unittest.main()
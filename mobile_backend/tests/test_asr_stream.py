@@ -0,0 +1,116 @@
+import sys
+import os
+import asyncio
+import unittest
+from unittest import mock
+import numpy as np
+
+# Set python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# app.database builds an engine at import; nothing here connects to it
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg2://qareeb@localhost/qareeb_test")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.controllers import ai as controller
+from app.database import get_db
+from app.routers import ai as ai_router
+from app.services.asr_stream import StreamingTranscriber
+from test_vad import RATE, noise, tone
+
+
+def pcm(audio: np.ndarray) -> bytes:
+    return (audio * 32767).astype("<i2").tobytes()
+
+
+class TestStreamingTranscriber(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.segments = []
+
+        async def transcribe(audio):
+            self.segments.append(len(audio) / RATE)
+            n = len(self.segments)
+            await asyncio.sleep(0.01)
+            return f"part{n}"
+
+        self.transcriber = StreamingTranscriber(transcribe, min_segment_ms=1000)
+
+    async def feed(self, audio: np.ndarray, chunk: int = 3201):
+        data = pcm(audio)
+        for start in range(0, len(data), chunk):  # odd sizes split samples
+            self.transcriber.feed(data[start:start + chunk])
+            await asyncio.sleep(0)
+
+    async def test_segments_decode_while_streaming(self):
+        await self.feed(np.concatenate([noise(1.0), tone(1.5), noise(0.4), tone(1.0), noise(1.0)]))
+        self.assertTrue(self.transcriber.ended)
+        # Both segments went out at pauses, before the end-of-speech silence was over
+        self.assertEqual(len(self.segments), 2)
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.transcriber.partial_text(), "part1 part2")
+
+        self.assertEqual(await self.transcriber.finish(), "part1 part2")
+        self.assertEqual(len(self.segments), 2)
+        first, last = self.segments
+        # Leading silence skipped, cuts in the middle of each pause
+        self.assertAlmostEqual(first, 0.2 + 1.5 + 0.15, delta=0.1)
+        self.assertAlmostEqual(last, 0.25 + 1.0 + 0.15, delta=0.1)
+
+    async def test_short_pauses_do_not_split(self):
+        await self.feed(np.concatenate([noise(0.5), tone(0.5), noise(0.4), tone(0.5), noise(1.0)]))
+        self.assertEqual(await self.transcriber.finish(), "part1")
+        self.assertAlmostEqual(self.segments[0], 0.2 + 1.4 + 0.15, delta=0.1)
+
+    async def test_silence_is_not_transcribed(self):
+        await self.feed(noise(2.0))
+        self.assertFalse(self.transcriber.ended)
+        self.assertEqual(await self.transcriber.finish(), "")
+        self.assertEqual(self.segments, [])
+
+    async def test_max_duration_ends_utterance(self):
+        transcriber = StreamingTranscriber(lambda audio: asyncio.sleep(0, "text"), max_seconds=1.0)
+        transcriber.feed(pcm(np.concatenate([noise(0.3), tone(1.0)])))
+        self.assertTrue(transcriber.ended)
+        self.assertEqual(await transcriber.finish(), "text")
+
+
+
+class TestStreamProtocol(unittest.TestCase):
+
+    def setUp(self):
+        app = FastAPI()
+        app.include_router(ai_router.router, prefix="/api")
+        app.dependency_overrides[get_db] = lambda: None
+        self.client = TestClient(app)
+        patch = mock.patch.object(controller, "ASR_STREAM_IDLE_SECONDS", 0.2)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def assert_closed_idle(self, ws):
+        self.assertEqual(ws.receive_json()["type"], "error")
+        self.assertEqual(ws.receive()["code"], 1008)
+
+    def test_no_start_message(self):
+        with self.client.websocket_connect("/api/ai/transcribe/stream") as ws:
+            self.assert_closed_idle(ws)
+
+    def test_start_message_must_be_an_object(self):
+        for start in ([], "x", 1):
+            with self.subTest(start=start), self.client.websocket_connect("/api/ai/transcribe/stream") as ws:
+                ws.send_json(start)
+                self.assertEqual(ws.receive_json()["type"], "error")
+                closed = ws.receive()
+                self.assertEqual((closed["code"], closed["reason"]), (1003, "start message must be a JSON object"))
+
+    def test_silent_client_after_start(self):
+        with self.client.websocket_connect("/api/ai/transcribe/stream") as ws:
+            ws.send_json({"userID": "u1"})
+            self.assertEqual(ws.receive_json(), {"type": "ready"})
+            ws.send_bytes(pcm(noise(0.1)))
+            self.assert_closed_idle(ws)
+
+
+if __name__ == "__main__":
+    unittest.main()
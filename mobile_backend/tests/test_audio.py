@@ -0,0 +1,53 @@
+import sys
+import os
+import io
+import wave
+import shutil
+import unittest
+import numpy as np
+
+# Set python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.audio import decode_audio, speech_only
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def wav_bytes(samples: np.ndarray, rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(rate)
+        out.writeframes(samples.astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+@unittest.skipIf(shutil.which("ffmpeg") is None, "ffmpeg not installed")
+class TestDecodeAudio(unittest.TestCase):
+
+    def test_bytes_are_decoded_through_a_pipe(self):
+        samples = (np.sin(np.arange(16000) / 10) * 10000).astype(np.int16)
+        audio = decode_audio(wav_bytes(samples))
+        self.assertEqual(audio.dtype, np.float32)
+        np.testing.assert_allclose(audio, samples / 32768.0, atol=1e-6)
+
+    def test_resamples_to_16k(self):
+        audio = decode_audio(wav_bytes(np.zeros(8000, dtype=np.int16), rate=8000))
+        self.assertAlmostEqual(len(audio), 16000, delta=16)
+
+    def test_bytes_match_file(self):
+        path = os.path.join(FIXTURES, "command_ae7ea243.mp3")
+        with open(path, "rb") as f:
+            from_bytes = decode_audio(f.read())
+        np.testing.assert_array_equal(from_bytes, decode_audio(path))
+        self.assertIsNotNone(speech_only(from_bytes))
+
+    def test_garbage_raises(self):
+        with self.assertRaises(ValueError):
+            decode_audio(b"not audio at all")
+
+
+if __name__ == "__main__":
+    unittest.main()
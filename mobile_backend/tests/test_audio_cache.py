@@ -0,0 +1,119 @@
+import sys
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+# Set python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.audio_cache import AudioResultCache, audio_key
+from app.controllers import ai as controller
+
+
+class _Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAudioResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = _Clock()
+
+    def test_least_recently_used_is_evicted(self):
+        cache = AudioResultCache(max_entries=2, ttl=60, directory=None, clock=self.clock)
+        cache.put("a", "one")
+        cache.put("b", "two")
+        cache.get("a")
+        cache.put("c", "three")
+        self.assertEqual(cache.get("a"), "one")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "three")
+
+    def test_entries_expire(self):
+        cache = AudioResultCache(max_entries=8, ttl=60, directory=None, clock=self.clock)
+        cache.put("a", 0.91)
+        self.clock.now += 59
+        self.assertEqual(cache.get("a"), 0.91)
+        self.clock.now += 2
+        self.assertIsNone(cache.get("a"))
+
+    def test_disabled(self):
+        cache = AudioResultCache(max_entries=0, ttl=60, directory=None, clock=self.clock)
+        cache.put("a", "one")
+        self.assertIsNone(cache.get("a"))
+
+    def test_disk_tier_outlives_the_process_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            AudioResultCache(8, 60, directory, self.clock).put(audio_key(b"clip"), "add 20 to coffee")
+            fresh = AudioResultCache(8, 60, directory, self.clock)
+            self.assertEqual(fresh.get(audio_key(b"clip")), "add 20 to coffee")
+
+            self.clock.now += 61
+            self.assertIsNone(AudioResultCache(8, 60, directory, self.clock).get(audio_key(b"clip")))
+            self.assertEqual(sum(len(files) for _, _, files in os.walk(directory)), 0)
+
+    def test_sweep_removes_expired_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = AudioResultCache(8, 60, directory, self.clock)
+            cache.put(audio_key(b"old"), "old")
+            self.clock.now += 30
+            cache.put(audio_key(b"new"), "new")
+            self.clock.now += 40
+            self.assertEqual(cache.sweep(), 1)
+            self.assertEqual(AudioResultCache(8, 60, directory, self.clock).get(audio_key(b"new")), "new")
+
+
+class _Upload:
+
+    def __init__(self, content):
+        self.content = content
+        self.content_type = "audio/mpeg"
+
+    async def read(self):
+        return self.content
+
+
+class TestRepeatedUpload(unittest.IsolatedAsyncioTestCase):
+
+    async def test_retry_skips_decode_and_transcription(self):
+        cache = AudioResultCache(8, 60, directory=None)
+        calls = {"decode": 0, "transcribe": 0}
+
+        def decode(content):
+            calls["decode"] += 1
+            return np.full(16000, 0.1, dtype=np.float32)
+
+        async def transcribe(speech):
+            calls["transcribe"] += 1
+            return "add 20 to coffee"
+
+        async def verify(clip, userID, db):
+            return None
+
+        async def run_command(text, userID, db, lap):
+            return {"status": "success", "transcription": text}
+
+        with mock.patch.object(controller, "audio_cache", cache), \
+                mock.patch.object(controller, "decode_audio", decode), \
+                mock.patch.object(controller, "transcribe_async", transcribe), \
+                mock.patch.object(controller, "_verify_speaker", verify), \
+                mock.patch.object(controller, "_run_command", run_command):
+            first = await controller.process_command_controller(_Upload(b"clip"), "u1", None)
+            second = await controller.process_command_controller(_Upload(b"clip"), "u1", None)
+            await controller.process_command_controller(_Upload(b"other clip"), "u1", None)
+
+        self.assertEqual(first["transcription"], second["transcription"])
+        self.assertNotIn("decode", second["metadata"]["timings_ms"])
+        self.assertEqual(calls, {"decode": 2, "transcribe": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
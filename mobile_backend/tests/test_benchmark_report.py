@@ -0,0 +1,66 @@
+import sys
+import os
+import unittest
+
+# Set python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.report import compare, summarize
+from benchmarks.standins import FakeDatabase
+
+
+class TestSummarize(unittest.TestCase):
+
+    def test_percentiles_and_throughput(self):
+        summary = summarize([float(i) for i in range(1, 101)], wall_s=2.0, errors=3, stages={"intent": [5.0, 15.0]})
+        self.assertEqual(summary["requests"], 103)
+        self.assertEqual(summary["throughput_rps"], 50.0)
+        self.assertAlmostEqual(summary["latency_ms"]["p50"], 50.5)
+        self.assertAlmostEqual(summary["latency_ms"]["p99"], 99.0, places=0)
+        self.assertEqual(summary["latency_ms"]["max"], 100.0)
+        self.assertEqual(summary["stages_ms"]["intent"]["p50"], 10.0)
+
+    def test_all_errors_has_no_latency(self):
+        summary = summarize([], wall_s=1.0, errors=5, stages={})
+        self.assertEqual(summary["latency_ms"], {})
+        self.assertEqual(summary["throughput_rps"], 0.0)
+
+
+class TestCompare(unittest.TestCase):
+
+    def _run(self, p50, rps):
+        return {"results": {"text_task@4": {
+            "throughput_rps": rps,
+            "latency_ms": {"p50": p50, "p95": p50 * 2, "p99": p50 * 3},
+        }}}
+
+    def test_within_threshold(self):
+        self.assertEqual(compare(self._run(105, 19), self._run(100, 20), threshold=0.10), [])
+
+    def test_latency_and_throughput_regressions(self):
+        regressions = compare(self._run(130, 10), self._run(100, 20), threshold=0.10)
+        self.assertEqual(len(regressions), 4)
+        self.assertTrue(any("throughput" in line for line in regressions))
+
+    def test_unmatched_keys_are_ignored(self):
+        current = {"results": {"text_finance@1": self._run(500, 1)["results"]["text_task@4"]}}
+        self.assertEqual(compare(current, self._run(100, 20), threshold=0.10), [])
+
+
+class TestFakeDatabase(unittest.TestCase):
+
+    def test_memory_insert_and_select(self):
+        database = FakeDatabase(latency_ms=0, facts_per_user=3)
+        database.seed_user("u1")
+        session = database.session()
+        session.execute('INSERT INTO "Memory" ("userId", fact, "createdAt") VALUES (:userID, :fact, :createdAt)',
+                        {"userID": "u1", "fact": "likes tea", "createdAt": 9})
+        facts = [r["fact"] for r in session.execute('SELECT fact FROM "Memory" WHERE "userId" = :userID',
+                                                     {"userID": "u1"}).mappings().all()]
+        self.assertEqual(len(facts), 4)
+        self.assertEqual(facts[-1], "likes tea")
+        self.assertEqual(database.unhandled, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
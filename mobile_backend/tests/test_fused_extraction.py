@@ -0,0 +1,80 @@
+import sys
+import os
+import unittest
+from unittest import mock
+
+# Set python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services import ai
+
+
+class TestResolveIntent(unittest.IsolatedAsyncioTestCase):
+    """Fused intent + extraction with a stubbed completion, and its fallback to two-step."""
+
+    def setUp(self):
+        self.prompts = []
+        patches = [
+            mock.patch.object(ai, "AI_FUSED_EXTRACTION", True),
+            # Keep the local classifier out of the way so every request reaches the LLM
+            mock.patch.object(ai, "classify_intent_locally", lambda text: ("UNKNOWN", 0.0)),
+            mock.patch.object(ai, "chat_completion", self.two_step_intent),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def two_step_intent(self, prompt, **kwargs):
+        self.prompts.append("intent")
+        return "TASK_TRACKER"
+
+    def fused_reply(self, reply):
+        async def chat_completion_json(prompt, **kwargs):
+            self.prompts.append("fused")
+            if isinstance(reply, Exception):
+                raise reply
+            return reply
+        return mock.patch.object(ai, "chat_completion_json", chat_completion_json)
+
+    async def test_fused_task_is_prefetched(self):
+        reply = {"intent": "task_tracker", "task": {"title": "Dentist", "dueDate": "2026-10-20"}}
+        with self.fused_reply(reply):
+            intent, prefetched = await ai.resolve_intent("remind me about the dentist on tuesday")
+        self.assertEqual(intent, "TASK_TRACKER")
+        self.assertEqual(prefetched, {"title": "Dentist", "dueDate": "2026-10-20"})
+        self.assertEqual(self.prompts, ["fused"])
+
+    async def test_fused_finance_is_prefetched(self):
+        reply = {"intent": "FINANCE", "finance": {"amount": 20, "income": False, "category_name": "Food"}}
+        with self.fused_reply(reply):
+            intent, prefetched = await ai.resolve_intent("spent 20 on lunch")
+        self.assertEqual(intent, "FINANCE")
+        self.assertEqual(prefetched["amount"], 20.0)
+        self.assertEqual(self.prompts, ["fused"])
+
+    async def test_invalid_payload_keeps_intent_without_prefetch(self):
+        reply = {"intent": "FINANCE", "finance": {"amount": "a lot"}}
+        with self.fused_reply(reply):
+            self.assertEqual(await ai.resolve_intent("spent a lot"), ("FINANCE", None))
+        self.assertEqual(self.prompts, ["fused"])
+
+    async def test_unknown_intent_falls_back_to_two_step(self):
+        with self.fused_reply({"intent": "WEATHER", "task": {"title": "x"}}):
+            self.assertEqual(await ai.resolve_intent("what's the weather"), ("TASK_TRACKER", None))
+        self.assertEqual(self.prompts, ["fused", "intent"])
+
+    async def test_malformed_reply_falls_back_to_two_step(self):
+        for reply in (["not", "an", "object"], ValueError("unparseable JSON")):
+            self.prompts.clear()
+            with self.subTest(reply=reply), self.fused_reply(reply):
+                self.assertEqual(await ai.resolve_intent("add a task"), ("TASK_TRACKER", None))
+                self.assertEqual(self.prompts, ["fused", "intent"])
+
+    async def test_fused_mode_off_is_two_step(self):
+        with mock.patch.object(ai, "AI_FUSED_EXTRACTION", False), self.fused_reply({"intent": "FINANCE"}):
+            self.assertEqual(await ai.resolve_intent("add a task"), ("TASK_TRACKER", None))
+        self.assertEqual(self.prompts, ["intent"])
+
+
+if __name__ == "__main__":
+    unittest.main()
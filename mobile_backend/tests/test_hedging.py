@@ -0,0 +1,160 @@
+import sys
+import os
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+# Set python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services import hedging, llm
+from app.services.hedging import LatencyTracker, hedged_request, latency_operation
+
+
+class TestLatencyTracker(unittest.TestCase):
+
+    def test_percentiles_need_enough_samples(self):
+        tracker = LatencyTracker(window=100)
+        for i in range(hedging.HEDGE_MIN_SAMPLES - 1):
+            tracker.record("m", 1.0)
+        self.assertIsNone(tracker.percentile("m", 0.95))
+
+        tracker.record("m", 1.0)
+        self.assertEqual(tracker.percentile("m", 0.95), 1.0)
+
+    def test_window_drops_old_samples(self):
+        tracker = LatencyTracker(window=hedging.HEDGE_MIN_SAMPLES)
+        for _ in range(hedging.HEDGE_MIN_SAMPLES):
+            tracker.record("m", 10.0)
+        for _ in range(hedging.HEDGE_MIN_SAMPLES):
+            tracker.record("m", 0.1)
+        self.assertEqual(tracker.percentile("m", 0.95), 0.1)
+
+    def test_operations_are_tracked_separately(self):
+        tracker = LatencyTracker(window=100)
+        for _ in range(hedging.HEDGE_MIN_SAMPLES):
+            tracker.record("m", 0.2, "classify_intent")
+            tracker.record("m", 3.0, "extract_task")
+        self.assertEqual(tracker.percentile("m", 0.95, "classify_intent"), 0.2)
+        self.assertEqual(tracker.percentile("m", 0.95, "extract_task"), 3.0)
+        self.assertIsNone(tracker.percentile("m", 0.95))
+
+    def test_lower_bounds_only_count_in_the_tail(self):
+        tracker = LatencyTracker(window=100)
+        tracker.record_lower_bound("m", 0.5)  # no history yet: kept
+        for _ in range(3):
+            tracker.record("m", 1.0)
+        tracker.record_lower_bound("m", 0.1)  # cancelled early: says nothing
+        tracker.record_lower_bound("m", 4.0)
+        self.assertEqual(sorted(tracker._samples[("m", "completion")]), [0.5, 1.0, 1.0, 1.0, 4.0])
+
+
+class TestHedgedRequest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self._delay = hedging.HEDGE_DEFAULT_DELAY
+        hedging.HEDGE_DEFAULT_DELAY = 0.05
+        self.calls = []
+
+    def tearDown(self):
+        hedging.HEDGE_DEFAULT_DELAY = self._delay
+
+    async def test_fast_primary_does_not_hedge(self):
+        async def attempt(model):
+            self.calls.append(model)
+            return model
+
+        self.assertEqual(await hedged_request(attempt, "primary", "backup"), "primary")
+        self.assertEqual(self.calls, ["primary"])
+
+    async def test_slow_primary_is_hedged_and_cancelled(self):
+        primary_cancelled = asyncio.Event()
+
+        async def attempt(model):
+            self.calls.append(model)
+            if model == "primary":
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    primary_cancelled.set()
+                    raise
+            return model
+
+        self.assertEqual(await hedged_request(attempt, "primary", "backup"), "backup")
+        self.assertEqual(self.calls, ["primary", "backup"])
+        await asyncio.sleep(0)
+        self.assertTrue(primary_cancelled.is_set())
+
+    async def test_attempts_run_under_the_operation_name(self):
+        async def attempt(model):
+            self.calls.append((model, latency_operation.get()))
+            if model == "primary":
+                await asyncio.sleep(5)
+            return model
+
+        await hedged_request(attempt, "primary", "backup", name="extract_task")
+        self.assertEqual(self.calls, [("primary", "extract_task"), ("backup", "extract_task")])
+        self.assertEqual(latency_operation.get(), "completion")
+
+    async def test_invalid_backup_does_not_win(self):
+        async def attempt(model):
+            if model == "primary":
+                await asyncio.sleep(0.15)
+                return "primary"
+            raise ValueError("invalid JSON")
+
+        self.assertEqual(await hedged_request(attempt, "primary", "backup"), "primary")
+
+    async def test_failed_primary_falls_back(self):
+        async def attempt(model):
+            if model == "primary":
+                raise RuntimeError("boom")
+            return model
+
+        self.assertEqual(await hedged_request(attempt, "primary", "backup"), "backup")
+
+    async def test_both_failing_raises(self):
+        async def attempt(model):
+            await asyncio.sleep(0.1)
+            raise ValueError(model)
+
+        with self.assertRaises(ValueError):
+            await hedged_request(attempt, "primary", "backup")
+
+
+
+class _SlowPrimaryClient:
+    """Stands in for AsyncGroq: "primary" never answers in time, "backup" answers at once."""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, **kwargs):
+        if model == "primary":
+            await asyncio.sleep(5)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=model))])
+
+
+class TestLatencyRecording(unittest.IsolatedAsyncioTestCase):
+
+    async def test_losing_primary_is_recorded_under_the_operation(self):
+        tracker = LatencyTracker(window=100)
+        client = (_SlowPrimaryClient(), asyncio.Semaphore(4))
+        with mock.patch.object(llm, "latency_tracker", tracker), \
+                mock.patch.object(llm, "_get_client", lambda: client), \
+                mock.patch.object(hedging, "HEDGE_DEFAULT_DELAY", 0.05):
+            async def attempt(model):
+                return await llm.chat_completion(f"prompt for {model}", model=model)
+
+            self.assertEqual(await hedged_request(attempt, "primary", "backup", name="extract_task"), "backup")
+            await asyncio.sleep(0)
+
+        [primary] = tracker._samples[("primary", "extract_task")]
+        self.assertGreaterEqual(primary, 0.05)  # at least the hedge delay it lost after
+        self.assertEqual(len(tracker._samples[("backup", "extract_task")]), 1)
+        self.assertNotIn(("primary", "completion"), tracker._samples)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import sys
+import os
+import json
+import asyncio
+import unittest
+from unittest import mock
+
+# Set python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services import intent_classifier
+from app.services.intent_classifier import IntentClassifier, INTENT_LOCAL_THRESHOLD
+
+
+class TestIntentClassifier(unittest.TestCase):
+
+    def setUp(self):
+        self.classifier = IntentClassifier()
+
+    def test_rules_are_confident_on_clear_commands(self):
+        label, confidence = self.classifier.predict("I spent 50 EGP on lunch")
+        self.assertEqual(label, "FINANCE")
+        self.assertGreaterEqual(confidence, INTENT_LOCAL_THRESHOLD)
+
+        label, confidence = self.classifier.predict("Remind me about the dentist appointment tomorrow")
+        self.assertEqual(label, "TASK_TRACKER")
+        self.assertGreaterEqual(confidence, INTENT_LOCAL_THRESHOLD)
+
+        label, confidence = self.classifier.predict("open whatsapp")
+        self.assertEqual(label, "UI_AUTOMATION")
+        self.assertGreaterEqual(confidence, INTENT_LOCAL_THRESHOLD)
+
+    def test_ambiguous_text_falls_through(self):
+        _, confidence = self.classifier.predict("what do you think about that?")
+        self.assertLess(confidence, INTENT_LOCAL_THRESHOLD)
+
+        # Competing evidence (money + schedule) should not be trusted locally
+        _, confidence = self.classifier.predict("pay the rent tomorrow at 5")
+        self.assertLess(confidence, INTENT_LOCAL_THRESHOLD)
+
+    def test_uses_last_user_line_of_conversation(self):
+        text = "User: open youtube\nAssistant: Done.\nUser: I paid 20 dollars for coffee"
+        label, _ = self.classifier.predict(text)
+        self.assertEqual(label, "FINANCE")
+
+    def test_trained_model_learns_from_logged_prompts(self):
+        samples = (
+            [("log my coffee with sara", "FINANCE")] * 20
+            + [("add padel with omar", "TASK_TRACKER")] * 20
+        )
+        self.classifier.fit(samples)
+        self.assertTrue(self.classifier.is_trained)
+
+        label, confidence = self.classifier.predict("add padel with omar")
+        self.assertEqual(label, "TASK_TRACKER")
+        self.assertGreater(confidence, 0.5)
+
+    def test_unknown_labels_are_ignored_during_training(self):
+        self.classifier.fit([("hello", "CHATBOT"), ("hi", None)])
+        self.assertEqual(self.classifier.trained_rows, 0)
+        self.assertFalse(self.classifier.is_trained)
+
+    def test_classes_without_training_rows_keep_their_rules(self):
+        samples = (
+            [("log my coffee with sara", "FINANCE")] * 20
+            + [("add padel with omar", "TASK_TRACKER")] * 20
+        )
+        self.classifier.fit(samples)
+        label, confidence = self.classifier.predict("open whatsapp")
+        self.assertEqual(label, "UI_AUTOMATION")
+        self.assertGreaterEqual(confidence, INTENT_LOCAL_THRESHOLD)
+
+
+class _Rows:
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, statement, params):
+        return self
+
+    def mappings(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class TestTraining(unittest.TestCase):
+
+    def test_only_llm_labels_are_learned(self):
+        llm = json.dumps({"intent_source": "llm"})
+        local = json.dumps({"intent_source": "local"})
+        rows = (
+            [{"user_message": "add padel with omar", "intent_detected": "TASK_TRACKER", "metadata": llm}] * 20
+            + [{"user_message": "log my coffee with sara", "intent_detected": "FINANCE", "metadata": llm}] * 10
+            + [{"user_message": "open padel app", "intent_detected": "TASK_TRACKER", "metadata": local}] * 50
+            + [{"user_message": "synced from the phone", "intent_detected": "FINANCE", "metadata": "not json"}]
+        )
+        classifier = IntentClassifier()
+        with mock.patch.object(intent_classifier, "intent_classifier", classifier):
+            self.assertEqual(intent_classifier.train_intent_classifier(_Rows(rows)), 30)
+
+
+class TestIntentSource(unittest.IsolatedAsyncioTestCase):
+
+    async def test_source_set_in_one_stage_is_seen_by_a_sibling(self):
+        intent_classifier.track_intent_source()
+        decided = asyncio.Event()
+
+        async def classify():
+            intent_classifier.note_intent_source("llm")
+            decided.set()
+
+        async def dispatch():
+            await decided.wait()
+            return intent_classifier.current_intent_source()
+
+        _, source = await asyncio.gather(asyncio.create_task(classify()), asyncio.create_task(dispatch()))
+        self.assertEqual(source, "llm")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,240 @@
+import sys
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+
+# Set python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, text as sql_text
+from sqlalchemy.orm import sessionmaker
+
+# The queue relies on Postgres (FOR UPDATE SKIP LOCKED). Point TEST_DATABASE_URL
+# at a scratch database, or install pgserver to get a throwaway one.
+_server = None
+_engine = None
+
+
+def setUpModule():
+    global _server, _engine
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        try:
+            import pgserver
+        except ImportError:
+            raise unittest.SkipTest("needs TEST_DATABASE_URL or the pgserver package")
+        _server = pgserver.get_server(tempfile.mkdtemp(prefix="qareeb_pg_"), cleanup_mode="delete")
+        url = _server.get_uri().replace("postgresql://", "postgresql+psycopg2://", 1)
+    # app.database builds its engine at import; the tests use their own
+    os.environ.setdefault("DATABASE_URL", url)
+    _engine = create_engine(url)
+
+    from app.database import Base
+    from app.models.job import BackgroundJob, JobDeadLetter
+    Base.metadata.create_all(bind=_engine, tables=[BackgroundJob.__table__, JobDeadLetter.__table__])
+    with _engine.begin() as conn:
+        conn.execute(sql_text('''
+            CREATE TABLE IF NOT EXISTS "Prompts" (
+                prompt_id bigserial primary key, "userId" text not null,
+                user_message text not null, qareeb_response text not null,
+                prompt_type text, module text, intent_detected text, created_at bigint not null,
+                metadata text
+            )
+        '''))
+
+
+def tearDownModule():
+    if _engine is not None:
+        _engine.dispose()
+    if _server is not None:
+        _server.cleanup()
+
+
+class JobQueueTestCase(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        from app.services import jobs
+        self.jobs = jobs
+        self.Session = sessionmaker(bind=_engine, autocommit=False, autoflush=False)
+        with _engine.begin() as conn:
+            conn.execute(sql_text('TRUNCATE "BackgroundJob", "JobDeadLetter", "Prompts"'))
+        self.db = self.Session()
+        self.addCleanup(self.db.close)
+
+    def handler(self, name, func):
+        patch = mock.patch.dict(self.jobs.JOB_HANDLERS, {name: func})
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def rows(self, table='"BackgroundJob"'):
+        with _engine.connect() as conn:
+            return [dict(r) for r in conn.execute(sql_text(f"SELECT * FROM {table} ORDER BY 1")).mappings()]
+
+    def set_row(self, job_id, **values):
+        assignments = ", ".join(f"{k} = :{k}" for k in values)
+        with _engine.begin() as conn:
+            conn.execute(sql_text(f'UPDATE "BackgroundJob" SET {assignments} WHERE job_id = :job_id'),
+                         {"job_id": job_id, **values})
+
+
+class TestClaim(JobQueueTestCase):
+
+    async def test_enqueue_then_claim_once(self):
+        job_id = self.jobs.enqueue_job(self.db, "noop", {"a": 1})
+        job = self.jobs._claim_job(self.db)
+        self.assertEqual((job["job_id"], job["status"], job["attempts"]), (job_id, "running", 1))
+        self.assertEqual(json.loads(job["payload"])["a"], 1)
+        self.assertIsNone(self.jobs._claim_job(self.db))
+
+    async def test_waits_for_run_after(self):
+        job_id = self.jobs.enqueue_job(self.db, "noop", {})
+        self.set_row(job_id, run_after=self.jobs._now_ms() + 60_000)
+        self.assertIsNone(self.jobs._claim_job(self.db))
+
+    async def test_enqueue_error_is_raised_and_rolled_back(self):
+        with self.assertRaises(Exception):
+            self.jobs.enqueue_job(self.db, None, {})  # name is NOT NULL
+        # The session is usable again afterwards
+        self.assertIsNotNone(self.jobs.enqueue_job(self.db, "noop", {}))
+
+    async def test_uncommitted_enqueue_follows_the_callers_transaction(self):
+        self.jobs.enqueue_job(self.db, "noop", {}, commit=False)
+        self.db.rollback()
+        self.assertEqual(self.rows(), [])
+
+
+class TestRun(JobQueueTestCase):
+
+    async def test_success_deletes_the_job(self):
+        seen = []
+
+        async def handle(db, payload):
+            seen.append(payload)
+        self.handler("ok", handle)
+
+        self.jobs.enqueue_job(self.db, "ok", {"x": 2})
+        await self.jobs._run_job(self.Session, self.jobs._claim_job(self.db))
+        self.assertEqual(seen, [{"x": 2}])
+        self.assertEqual(self.rows(), [])
+
+    async def test_failure_retries_with_backoff(self):
+        async def handle(db, payload):
+            raise RuntimeError("groq down")
+        self.handler("flaky", handle)
+
+        job_id = self.jobs.enqueue_job(self.db, "flaky", {})
+        for attempt in (1, 2):
+            before = self.jobs._now_ms()
+            await self.jobs._run_job(self.Session, self.jobs._claim_job(self.db))
+            [row] = self.rows()
+            self.assertEqual((row["job_id"], row["status"], row["attempts"]), (job_id, "pending", attempt))
+            self.assertIn("groq down", row["last_error"])
+            delay_ms = self.jobs.JOB_RETRY_BASE * 2 ** (attempt - 1) * 1000
+            self.assertGreaterEqual(row["run_after"], before + delay_ms)
+            self.assertIsNone(self.jobs._claim_job(self.db))  # not before the backoff
+            self.set_row(job_id, run_after=0)
+
+    async def test_last_attempt_goes_to_dead_letter(self):
+        async def handle(db, payload):
+            raise ValueError("bad payload")
+        self.handler("doomed", handle)
+
+        job_id = self.jobs.enqueue_job(self.db, "doomed", {}, max_attempts=2)
+        for _ in range(2):
+            self.set_row(job_id, run_after=0)
+            await self.jobs._run_job(self.Session, self.jobs._claim_job(self.db))
+        self.assertEqual(self.rows(), [])
+        [dead] = self.rows('"JobDeadLetter"')
+        self.assertEqual((dead["job_id"], dead["name"], dead["attempts"]), (job_id, "doomed", 2))
+        self.assertIn("bad payload", dead["last_error"])
+
+    async def test_unknown_handler_fails_the_job(self):
+        self.jobs.enqueue_job(self.db, "nobody_handles_this", {})
+        await self.jobs._run_job(self.Session, self.jobs._claim_job(self.db))
+        self.assertIn("LookupError", self.rows()[0]["last_error"])
+
+    async def test_cancelled_job_is_requeued(self):
+        started = asyncio.Event()
+
+        async def handle(db, payload):
+            started.set()
+            await asyncio.Event().wait()
+        self.handler("slow", handle)
+
+        job_id = self.jobs.enqueue_job(self.db, "slow", {})
+        task = asyncio.create_task(self.jobs._run_job(self.Session, self.jobs._claim_job(self.db)))
+        await started.wait()
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        [row] = self.rows()
+        self.assertEqual((row["job_id"], row["status"], row["attempts"]), (job_id, "pending", 0))
+
+
+class TestRecovery(JobQueueTestCase):
+
+    async def test_stale_running_jobs_are_requeued(self):
+        stale = self.jobs.enqueue_job(self.db, "noop", {})
+        live = self.jobs.enqueue_job(self.db, "noop", {})
+        self.jobs._claim_job(self.db)
+        self.jobs._claim_job(self.db)
+        old = self.jobs._now_ms() - int(self.jobs.JOB_STALE_AFTER * 1000) - 1000
+        self.set_row(stale, updated_at=old)
+
+        self.jobs._recover_stale_jobs(self.db)
+        status = {row["job_id"]: row["status"] for row in self.rows()}
+        self.assertEqual(status, {stale: "pending", live: "running"})
+
+    async def test_worker_recovers_periodically(self):
+        job_id = self.jobs.enqueue_job(self.db, "noop", {})
+        self.jobs._claim_job(self.db)
+        self.set_row(job_id, updated_at=0)
+        ran = asyncio.Event()
+
+        async def handle(db, payload):
+            ran.set()
+        self.handler("noop", handle)
+
+        with mock.patch.object(self.jobs, "_wakeup", asyncio.Event()), \
+                mock.patch.object(self.jobs, "_last_recovery", 0.0):
+            worker = asyncio.create_task(self.jobs._worker(self.Session, 0))
+            try:
+                await asyncio.wait_for(ran.wait(), timeout=5)
+            finally:
+                worker.cancel()
+                await asyncio.gather(worker, return_exceptions=True)
+
+
+class TestInteractionJobs(JobQueueTestCase):
+
+    def setUp(self):
+        super().setUp()
+        from app.services import ai
+        self.ai = ai
+        self.payload = {"userID": "u1", "user_message": "spent 20 on lunch",
+                        "qareeb_response": "Recorded", "module": "FINANCE", "intent_source": "llm"}
+
+    async def test_learning_job_is_queued_with_the_prompt(self):
+        await self.ai._save_interaction_job(self.db, dict(self.payload))
+        [prompt] = self.rows('"Prompts"')
+        self.assertEqual(json.loads(prompt["metadata"]), {"intent_source": "llm"})
+        self.assertEqual([row["name"] for row in self.rows()], ["learn_from_interaction"])
+
+    async def test_failed_save_queues_nothing_and_raises(self):
+        with _engine.begin() as conn:
+            conn.execute(sql_text('ALTER TABLE "Prompts" RENAME TO "PromptsAway"'))
+        try:
+            with self.assertRaises(Exception):
+                await self.ai._save_interaction_job(self.db, dict(self.payload))
+        finally:
+            self.db.rollback()
+            with _engine.begin() as conn:
+                conn.execute(sql_text('ALTER TABLE "PromptsAway" RENAME TO "Prompts"'))
+        self.assertEqual(self.rows(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import sys
+import os
+import unittest
+
+# Set python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.models.task import TaskRecord
+from app.services.json_stream import JSONStreamParser, parse_json
+
+
+class TestParseJson(unittest.TestCase):
+
+    def test_skips_prose_and_code_fence(self):
+        text = 'Here you go:\n```json\n{"title": "Gym", "tags": ["a", "b"]}\n```\nAnything else?'
+        self.assertEqual(parse_json(text), {"title": "Gym", "tags": ["a", "b"]})
+
+    def test_drops_trailing_commas(self):
+        self.assertEqual(parse_json('{"a": [1, 2,], "b": {"c": "x,}"},}'), {"a": [1, 2], "b": {"c": "x,}"}})
+
+    def test_closes_truncated_output(self):
+        self.assertEqual(parse_json('{"a": 1, "b": "cut off'), {"a": 1, "b": "cut off"})
+        self.assertEqual(parse_json('{"a": 1, "b": {"c": [1, 2'), {"a": 1, "b": {"c": [1, 2]}})
+        self.assertEqual(parse_json('["one", "tw'), ["one", "tw"])
+
+    def test_truncated_mid_key_keeps_complete_members(self):
+        self.assertEqual(parse_json('{"a": 1, "b'), {"a": 1})
+        self.assertEqual(parse_json('{"a": 1, "b": tr'), {"a": 1})
+
+    def test_no_json_raises(self):
+        with self.assertRaises(ValueError):
+            parse_json("I could not find anything.")
+
+
+class TestStreaming(unittest.TestCase):
+
+    def test_done_as_soon_as_object_closes(self):
+        parser = JSONStreamParser()
+        chunks = ['{"ti', 'tle": "Gy', 'm"', '}', ' and some explanation', ' nobody needs']
+        finished_at = next(i for i, chunk in enumerate(chunks) if parser.feed(chunk))
+        self.assertEqual(finished_at, 3)
+        self.assertEqual(parser.result(), {"title": "Gym"})
+
+    def test_fields_validated_as_they_close(self):
+        parser = JSONStreamParser(TaskRecord)
+        parser.feed('{"title": "Gym", ')
+        self.assertEqual(parser.fields, {"title": "Gym"})
+        with self.assertRaises(ValueError):
+            parser.feed('"progressPercentage": 250, "priority"')
+
+    def test_unknown_fields_are_not_validated(self):
+        parser = JSONStreamParser(TaskRecord)
+        self.assertTrue(parser.feed('{"extra": {"x": 1}, "title": "Gym"}'))
+        self.assertEqual(parser.result(), {"extra": {"x": 1}, "title": "Gym"})
+
+
+if __name__ == "__main__":
+    unittest.main()
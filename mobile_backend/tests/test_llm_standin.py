@@ -0,0 +1,61 @@
+import sys
+import os
+import json
+import tempfile
+import unittest
+
+# Set python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.dev.llm_standin import respond
+from app.models.task import TaskRecord
+from app.services.cassette import Cassette, CassetteMissError, cassette_key
+from app.services.prompts import render_prompt, _date_context_for
+from datetime import date
+
+DATES = _date_context_for(date(2026, 10, 18))
+
+
+class TestStandinAnswers(unittest.TestCase):
+
+    def test_intent(self):
+        self.assertEqual(respond(render_prompt("intent", text="open whatsapp")), "UI_AUTOMATION")
+        self.assertEqual(respond(render_prompt("intent", text="what is the meaning of life")), "UNKNOWN")
+
+    def test_task_extraction_is_schema_valid(self):
+        prompt = render_prompt("task_extraction", date_context=DATES, memory_context="", text="gym on friday")
+        task = TaskRecord(**json.loads(respond(prompt)))
+        self.assertEqual(task.dueDate, "2026-10-23")
+
+    def test_fused_finance(self):
+        prompt = render_prompt("fused_extraction", date_context=DATES, memory_context="", text="I spent 25 on lunch")
+        data = json.loads(respond(prompt))
+        self.assertEqual(data["intent"], "FINANCE")
+        self.assertEqual(data["finance"]["amount"], 25.0)
+        self.assertIsNone(data["task"])
+
+
+class TestCassette(unittest.TestCase):
+
+    def test_record_then_replay(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "llm.jsonl")
+            key = cassette_key("m", "prompt", temperature=0)
+            Cassette(path, "record").record(key, "m", "answer")
+
+            replay = Cassette(path, "replay")
+            self.assertEqual(replay.lookup(key), "answer")
+            with self.assertRaises(CassetteMissError):
+                replay.lookup(cassette_key("m", "other prompt", temperature=0))
+            self.assertIsNone(Cassette(path, "replay_or_record").lookup(cassette_key("m", "other", temperature=0)))
+
+    def test_key_ignores_todays_date(self):
+        self.assertEqual(
+            cassette_key("m", "Today's date is 2026-10-18 (Sunday). gym on Monday"),
+            cassette_key("m", "Today's date is 2026-10-19 (Monday). gym on Monday"),
+        )
+        self.assertNotEqual(cassette_key("m", "gym on Monday"), cassette_key("m", "gym on Tuesday"))
+
+
+if __name__ == "__main__":
+    unittest.main()
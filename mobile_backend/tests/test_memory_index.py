@@ -0,0 +1,174 @@
+import sys
+import os
+import socket
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+
+# Set python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services import embeddings
+from app.services.embeddings import hash_embed
+from app.services.memory_index import (
+    top_k_indices, take_within_budget, estimate_tokens, near_duplicate_mask, duplicate_threshold, fact_specifics,
+)
+
+
+def _normalise(matrix):
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+class TestHashEmbedding(unittest.TestCase):
+
+    def test_related_fact_ranks_first(self):
+        facts = [
+            "has tennis practice every Wednesday",
+            "prefers to study for exams at 8am",
+            "pays rent on the first of the month",
+        ]
+        matrix = _normalise(hash_embed(facts))
+        query = _normalise(hash_embed(["remind me about my exam study session"]))[0]
+        self.assertEqual(top_k_indices(matrix @ query, 1)[0], 1)
+
+    def test_vectors_are_stable(self):
+        # Stored vectors are only reusable if hashing doesn't depend on the process
+        np.testing.assert_array_equal(hash_embed(["gym on weekdays"]), hash_embed(["gym on weekdays"]))
+
+
+class TestEmbeddingOffLoop(unittest.IsolatedAsyncioTestCase):
+
+    async def test_model_encode_does_not_block_the_loop(self):
+        released = threading.Event()
+
+        class SlowModel:
+            def encode(self, texts, convert_to_numpy=True):
+                # Only returns if the loop kept running while this encoded
+                if not released.wait(timeout=5):
+                    raise AssertionError("event loop was blocked by encode")
+                return np.ones((len(texts), 4), dtype=np.float32)
+
+        async def release():
+            released.set()
+
+        with mock.patch.object(embeddings, "_model", SlowModel()), \
+                mock.patch.object(embeddings, "_model_tag", "st:slow"):
+            matrix, _ = await asyncio.gather(embeddings.embed_texts_async(["gym on monday"]), release())
+        self.assertEqual(matrix.shape, (1, 4))
+        self.assertAlmostEqual(float(np.linalg.norm(matrix[0])), 1.0, places=5)
+
+    async def test_tag_lookup_waits_for_the_load_off_the_loop(self):
+        loaded = threading.Event()
+
+        def load_model():
+            # Stands in for the warmup thread still loading SentenceTransformer
+            if not loaded.wait(timeout=5):
+                raise AssertionError("event loop was blocked by the model load")
+            embeddings._model_tag = "st:slow"
+
+        async def finish_load():
+            loaded.set()
+
+        with mock.patch.object(embeddings, "_load_model", load_model), \
+                mock.patch.object(embeddings, "_model_tag", None):
+            tag, _ = await asyncio.gather(embeddings.embedding_model_tag_async(), finish_load())
+        self.assertEqual(tag, "st:slow")
+
+
+class TestSelection(unittest.TestCase):
+
+    def test_top_k_orders_best_first(self):
+        scores = np.array([0.1, 0.9, 0.5, 0.7])
+        self.assertEqual(list(top_k_indices(scores, 2)), [1, 3])
+        self.assertEqual(list(top_k_indices(scores, 10)), [1, 3, 2, 0])
+
+    def test_budget_skips_facts_that_do_not_fit(self):
+        long_fact = "x" * 400
+        facts = ["short one", long_fact, "short two"]
+        budget = 2 * (estimate_tokens("short one") + 1)
+        self.assertEqual(take_within_budget(facts, budget), ["short one", "short two"])
+
+
+class TestNearDuplicates(unittest.TestCase):
+
+    def setUp(self):
+        self.existing = _normalise(hash_embed([
+            "goes to the gym every Monday",
+            "has tennis every Wednesday",
+        ]))
+
+    def test_restated_fact_is_dropped(self):
+        candidates = _normalise(hash_embed(["Goes to the gym every Monday.", "pays rent on the first"]))
+        mask = near_duplicate_mask(candidates, self.existing, 0.9)
+        self.assertEqual(list(mask), [True, False])
+
+    def test_similar_but_different_fact_is_kept(self):
+        candidates = _normalise(hash_embed(["has tennis every Thursday"]))
+        self.assertFalse(near_duplicate_mask(candidates, self.existing, 0.9)[0])
+
+    def test_duplicates_within_batch_keep_first(self):
+        candidates = _normalise(hash_embed(["studies at 8am", "pays rent on the first", "Studies at 8am"]))
+        mask = near_duplicate_mask(candidates, np.zeros((0, 0), dtype=np.float32), 0.9)
+        self.assertEqual(list(mask), [False, False, True])
+
+    def test_different_days_or_numbers_are_never_duplicates(self):
+        self.assertEqual(fact_specifics("User goes to gym Mondays"), fact_specifics("gym every Monday"))
+        same_vector = _normalise(np.ones((1, 8), dtype=np.float32))
+        existing = ["has tennis every Wednesday"]
+        for fact, duplicate in (("has tennis every Thursday", False), ("Has tennis on Wednesdays", True),
+                                ("saves 200 a month", False)):
+            with self.subTest(fact=fact):
+                mask = near_duplicate_mask(same_vector, same_vector, 0.9, [fact], existing)
+                self.assertEqual(bool(mask[0]), duplicate)
+
+
+def _sentence_model_reachable() -> bool:
+    """Weights already cached, or the Hub reachable to download them."""
+    from huggingface_hub import try_to_load_from_cache
+    if isinstance(try_to_load_from_cache(f"sentence-transformers/{embeddings.EMBEDDING_MODEL}", "config.json"), str):
+        return True
+    try:
+        socket.create_connection(("huggingface.co", 443), timeout=3).close()
+        return True
+    except OSError:
+        return False
+
+
+class TestShippedBackendDedupe(unittest.TestCase):
+    """Paraphrases are dropped with the embedding backend the app ships with."""
+
+    @classmethod
+    def setUpClass(cls):
+        if embeddings.EMBEDDING_BACKEND == "hash":
+            raise unittest.SkipTest("EMBEDDING_BACKEND=hash")
+        try:
+            import sentence_transformers  # noqa: F401  (a requirement; its absence is an install problem)
+        except ImportError as e:
+            raise AssertionError("sentence-transformers is in requirements.txt but not installed") from e
+        if not _sentence_model_reachable():
+            raise unittest.SkipTest(f"{embeddings.EMBEDDING_MODEL} weights not cached and the Hub is unreachable")
+        if not embeddings.embedding_model_tag().startswith("st:"):
+            raise unittest.SkipTest("sentence model failed to load")
+
+    def mask(self, candidates, existing):
+        vectors = embeddings.embed_texts(candidates + existing)
+        return near_duplicate_mask(
+            vectors[:len(candidates)], vectors[len(candidates):], duplicate_threshold(), candidates, existing
+        )
+
+    def test_paraphrase_is_rejected(self):
+        self.assertTrue(self.mask(["User has gym every Monday"], ["User goes to gym Mondays"])[0])
+
+    def test_different_facts_are_kept(self):
+        mask = self.mask(
+            ["User has gym every Tuesday", "User pays rent on the first of the month"],
+            ["User goes to gym Mondays"],
+        )
+        self.assertEqual(list(mask), [False, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import sys
+import os
+import unittest
+
+# Set python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.hedging import hedged_request
+from app.services.metrics import (
+    LLM_FALLBACKS,
+    STAGE_SECONDS,
+    Counter,
+    Histogram,
+    render_metrics,
+)
+from app.services.pipeline import StageGraph
+
+
+class TestMetricTypes(unittest.TestCase):
+
+    def test_counter_renders_labels(self):
+        counter = Counter("test_requests_total", "Requests.", ("route",))
+        counter.inc(route="/a")
+        counter.inc(2, route='/b"quoted"')
+        text = counter.render()
+        self.assertIn("# TYPE test_requests_total counter", text)
+        self.assertIn('test_requests_total{route="/a"} 1', text)
+        self.assertIn('test_requests_total{route="/b\\"quoted\\""} 2', text)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("test_latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+        for seconds in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(seconds, stage="x")
+        text = histogram.render()
+        self.assertIn('test_latency_seconds_bucket{stage="x",le="0.1"} 2', text)
+        self.assertIn('test_latency_seconds_bucket{stage="x",le="1"} 3', text)
+        self.assertIn('test_latency_seconds_bucket{stage="x",le="+Inf"} 4', text)
+        self.assertIn('test_latency_seconds_count{stage="x"} 4', text)
+        self.assertIn('test_latency_seconds_sum{stage="x"} 3.65', text)
+
+    def test_wrong_labels_rejected(self):
+        counter = Counter("test_labels_total", "Labels.", ("a",))
+        with self.assertRaises(ValueError):
+            counter.inc(b="x")
+
+    def test_duplicate_name_rejected(self):
+        Counter("test_dup_total", "Dup.")
+        with self.assertRaises(ValueError):
+            Counter("test_dup_total", "Dup.")
+
+    def test_histogram_time_records_on_error(self):
+        histogram = Histogram("test_timed_seconds", "Timed.", ("stage",))
+        with self.assertRaises(RuntimeError):
+            with histogram.time(stage="boom"):
+                raise RuntimeError("x")
+        self.assertEqual(histogram.count(stage="boom"), 1)
+
+
+class TestInstrumentation(unittest.IsolatedAsyncioTestCase):
+
+    async def test_stage_graph_observes_each_stage(self):
+        async def stage():
+            return 1
+
+        before = STAGE_SECONDS.count(pipeline="metrics_test", stage="a")
+        await StageGraph("metrics_test").add("a", stage).run()
+        self.assertEqual(STAGE_SECONDS.count(pipeline="metrics_test", stage="a"), before + 1)
+        self.assertIn('pipeline="metrics_test",stage="total"', render_metrics())
+
+    async def test_failed_primary_counts_fallback(self):
+        async def attempt(model):
+            if model == "primary":
+                raise RuntimeError("boom")
+            return model
+
+        before = LLM_FALLBACKS.value(operation="metrics_test", reason="primary_failed")
+        self.assertEqual(await hedged_request(attempt, "primary", "backup", name="metrics_test"), "backup")
+        self.assertEqual(LLM_FALLBACKS.value(operation="metrics_test", reason="primary_failed"), before + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import sys
+import os
+import asyncio
+import unittest
+
+# Set python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.pipeline import StageGraph
+
+
+class TestStageGraph(unittest.IsolatedAsyncioTestCase):
+
+    async def test_independent_stages_run_concurrently(self):
+        started = {"a": asyncio.Event(), "b": asyncio.Event()}
+
+        async def stage(name, other):
+            started[name].set()
+            # Only returns if the other stage is running at the same time
+            await asyncio.wait_for(started[other].wait(), timeout=5)
+            return name
+
+        graph = (
+            StageGraph("test")
+            .add("a", lambda: stage("a", "b"))
+            .add("b", lambda: stage("b", "a"))
+        )
+        results = await graph.run()
+
+        self.assertEqual(results, {"a": "a", "b": "b"})
+        self.assertEqual(set(graph.timings), {"a", "b", "total"})
+
+    async def test_dependency_results_are_passed_in(self):
+        async def first():
+            return 2
+
+        async def second(first):
+            return first * 10
+
+        graph = StageGraph("test").add("first", first).add("second", second, deps=("first",))
+        results = await graph.run()
+        self.assertEqual(results["second"], 20)
+
+    async def test_failure_cancels_other_stages(self):
+        cancelled = asyncio.Event()
+
+        async def boom():
+            raise ValueError("boom")
+
+        async def long_running():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        graph = StageGraph("test").add("boom", boom).add("long", long_running)
+        with self.assertRaises(ValueError):
+            await graph.run()
+        await asyncio.sleep(0)
+        self.assertTrue(cancelled.is_set())
+
+    def test_unknown_dependency_rejected(self):
+        async def stage(missing):
+            return missing
+
+        with self.assertRaises(ValueError):
+            StageGraph("test").add("stage", stage, deps=("missing",))
+
+
+if __name__ == "__main__":
+    unittest.main()
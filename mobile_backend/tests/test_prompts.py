@@ -0,0 +1,46 @@
+import sys
+import os
+import unittest
+from datetime import date
+
+# Set python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.prompts import PROMPTS, PromptTemplate, _date_context_for, render_prompt
+
+
+class TestPromptTemplate(unittest.TestCase):
+
+    def test_static_prefix_is_shared_across_renders(self):
+        first = render_prompt("task_extraction", date_context="D1", memory_context="", text="gym monday")
+        second = render_prompt("task_extraction", date_context="D2", memory_context="M", text="pay rent")
+        static = PROMPTS["task_extraction"].static
+        self.assertTrue(first.startswith(static))
+        self.assertTrue(second.startswith(static))
+        self.assertTrue(first.rstrip().endswith('User request: "gym monday"'))
+
+    def test_user_text_with_braces_is_not_formatted(self):
+        template = PromptTemplate("t", static='Output {"a": 1}', dynamic="Text: {text}")
+        self.assertEqual(template.render(text="{oops}"), 'Output {"a": 1}\n\nText: {oops}\n')
+
+    def test_stats_count_tokens(self):
+        template = PromptTemplate("t", static="x" * 40, dynamic="{text}")
+        template.render(text="y" * 40)
+        stats = template.stats()
+        self.assertEqual(stats["renders"], 1)
+        self.assertGreater(stats["last_tokens"], stats["static_tokens"])
+
+
+class TestDateContext(unittest.TestCase):
+
+    def test_upcoming_weekdays(self):
+        # 2026-10-18 is a Sunday, so "This Sunday" is a week out
+        block = _date_context_for(date(2026, 10, 18))
+        self.assertIn("Today's date is 2026-10-18 (Sunday).", block)
+        self.assertIn("This Monday: 2026-10-19", block)
+        self.assertIn("This Sunday: 2026-10-25", block)
+        self.assertIs(block, _date_context_for(date(2026, 10, 18)))
+
+
+if __name__ == "__main__":
+    unittest.main()
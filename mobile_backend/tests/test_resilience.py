@@ -0,0 +1,96 @@
+import sys
+import os
+import asyncio
+import unittest
+
+# Set python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import httpx
+
+from app.services import resilience
+from app.services.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, call_with_resilience
+
+NO_WAIT = RetryPolicy(attempts=3, base_delay=0, max_delay=0)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker("m", failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_half_open_allows_single_trial(self):
+        breaker = CircuitBreaker("m", failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        breaker.before_call()
+        self.assertEqual(breaker.state, "half_open")
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+        breaker.before_call()
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker("m", failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+
+
+class TestCallWithResilience(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        resilience._breakers.clear()
+        self.calls = 0
+
+    async def test_retries_transient_failure(self):
+        retries = []
+
+        async def func():
+            self.calls += 1
+            if self.calls < 3:
+                raise httpx.ConnectError("reset")
+            return "ok"
+
+        result = await call_with_resilience("m", func, NO_WAIT, on_retry=lambda n, e: retries.append(n))
+        self.assertEqual(result, "ok")
+        self.assertEqual(retries, [1, 2])
+        self.assertEqual(resilience.breaker_states(), {"m": "closed"})
+
+    async def test_non_retryable_raises_immediately(self):
+        async def func():
+            self.calls += 1
+            raise ValueError("bad request")
+
+        with self.assertRaises(ValueError):
+            await call_with_resilience("m", func, NO_WAIT)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(resilience.breaker_states(), {"m": "closed"})
+
+    async def test_open_circuit_fails_fast(self):
+        resilience._breakers["m"] = CircuitBreaker("m", failure_threshold=2, reset_timeout=60)
+
+        async def func():
+            self.calls += 1
+            raise asyncio.TimeoutError()
+
+        # The breaker opens mid-retry, so the third attempt never reaches upstream
+        with self.assertRaises(CircuitOpenError):
+            await call_with_resilience("m", func, NO_WAIT)
+        self.assertEqual(self.calls, 2)
+
+        with self.assertRaises(CircuitOpenError):
+            await call_with_resilience("m", func, NO_WAIT)
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+import sys
+import os
+import json
+import asyncio
+import unittest
+from unittest import mock
+
+# Set python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# app.database builds an engine at import; nothing here connects to it
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg2://qareeb@localhost/qareeb_test")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.controllers import ai as controller
+from app.database import get_db
+from app.routers import ai as ai_router
+from app.services.events import emit_event
+
+
+class _Session:
+
+    def close(self):
+        pass
+
+
+def _parse_sse(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+async def _no_suggestion(userID, db, memories):
+    return None
+
+
+async def _resolve_intent(text, memory_context=""):
+    for delta in ("TASK", "_TRACKER"):
+        emit_event("token", {"model": "stub", "delta": delta})
+    return "TASK_TRACKER", None
+
+
+async def _handle_task(text, userID, db, prefetched=None):
+    emit_event("extraction", {"module": "TASK_TRACKER", "data": {"title": "Gym"}})
+    emit_event("db_write", {"table": "Task", "title": "Gym"})
+    return {"success": True, "data": {"title": "Gym"}}
+
+
+class TestTextStream(unittest.TestCase):
+
+    def setUp(self):
+        app = FastAPI()
+        app.include_router(ai_router.router, prefix="/api")
+        app.dependency_overrides[get_db] = lambda: _Session()
+        self.client = TestClient(app)
+        patches = [
+            mock.patch.object(ai_router, "SessionLocal", _Session),
+            mock.patch.object(controller, "AI_FUSED_EXTRACTION", False),
+            mock.patch.object(controller, "get_user_memories", lambda db, userID: ["has gym on Mondays"]),
+            mock.patch.object(controller, "handle_suggestion_check", _no_suggestion),
+            mock.patch.object(controller, "resolve_intent", _resolve_intent),
+            mock.patch.object(controller, "handle_task_tracker_service", _handle_task),
+            mock.patch.dict(controller.pending_suggestions, clear=True),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.request = {"text": "gym on friday", "userID": "u1"}
+
+    def test_events_then_result_matching_text_endpoint(self):
+        response = self.client.post("/api/ai/text/stream", json=self.request)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+        events = _parse_sse(response.text)
+        kinds = [kind for kind, _ in events]
+
+        self.assertEqual(kinds[0], "accepted")
+        self.assertEqual(kinds[-1], "result")
+        self.assertEqual(kinds.count("result"), 1)
+        tokens = [data["delta"] for kind, data in events if kind == "token"]
+        self.assertEqual(tokens, ["TASK", "_TRACKER"])
+        # Tokens come from inside the intent stage, before it finishes and before dispatch writes
+        stages = [data["name"] for kind, data in events if kind == "stage"]
+        self.assertEqual(set(stages), {"memories", "suggestion", "intent", "dispatch"})
+        intent_done = next(i for i, (kind, data) in enumerate(events) if kind == "stage" and data["name"] == "intent")
+        self.assertLess(kinds.index("token"), intent_done)
+        self.assertLess(kinds.index("intent"), kinds.index("extraction"))
+        self.assertLess(kinds.index("extraction"), kinds.index("db_write"))
+        self.assertLess(kinds.index("db_write"), kinds.index("result"))
+
+        streamed = events[-1][1]
+        blocking = self.client.post("/api/ai/text", json=self.request).json()
+        streamed.pop("metadata")
+        blocking.pop("metadata")
+        self.assertEqual(streamed, blocking)
+        self.assertEqual(streamed["status"], "success")
+
+    def test_controller_exception_ends_with_error_event(self):
+        async def broken(text, userID, db):
+            raise RuntimeError("database went away")
+
+        with mock.patch.object(controller, "process_text_controller", broken):
+            response = self.client.post("/api/ai/text/stream", json=self.request)
+        events = _parse_sse(response.text)
+        self.assertEqual([kind for kind, _ in events], ["accepted", "error"])
+        self.assertEqual(events[-1][1], {"status": "error", "message": "database went away"})
+
+
+
+class TestTextStreamLifecycle(unittest.IsolatedAsyncioTestCase):
+    """The pipeline behind the stream stops with its client and can't pile up events."""
+
+    def setUp(self):
+        self.cancelled = asyncio.Event()
+        self.intent_started = asyncio.Event()
+        patches = [
+            mock.patch.object(controller, "AI_FUSED_EXTRACTION", False),
+            mock.patch.object(controller, "get_user_memories", lambda db, userID: []),
+            mock.patch.object(controller, "handle_suggestion_check", _no_suggestion),
+            mock.patch.object(controller, "handle_task_tracker_service", _handle_task),
+            mock.patch.object(controller, "STREAM_DISCONNECT_POLL", 0.01),
+            mock.patch.dict(controller.pending_suggestions, clear=True),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def hanging_intent(self, text, memory_context=""):
+        self.intent_started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            self.cancelled.set()
+            raise
+
+    async def test_disconnected_client_cancels_the_pipeline(self):
+        async def is_disconnected():
+            return self.intent_started.is_set()
+
+        with mock.patch.object(controller, "resolve_intent", self.hanging_intent):
+            chunks = [chunk async for chunk in controller.stream_text_controller("gym", "u1", _Session, is_disconnected)]
+            await asyncio.wait_for(self.cancelled.wait(), timeout=5)
+        kinds = [kind for kind, _ in _parse_sse("".join(chunks))]
+        self.assertEqual(kinds[0], "accepted")
+        self.assertNotIn("result", kinds)
+
+    async def test_closing_the_stream_cancels_the_pipeline(self):
+        with mock.patch.object(controller, "resolve_intent", self.hanging_intent):
+            stream = controller.stream_text_controller("gym", "u1", _Session)
+            await stream.__anext__()
+            await asyncio.wait_for(self.intent_started.wait(), timeout=5)
+            await stream.aclose()
+            await asyncio.wait_for(self.cancelled.wait(), timeout=5)
+
+    async def test_progress_events_are_bounded_but_the_result_is_kept(self):
+        async def chatty_intent(text, memory_context=""):
+            for _ in range(50):
+                emit_event("token", {"model": "stub", "delta": "x"})
+            return "TASK_TRACKER", None
+
+        with mock.patch.object(controller, "resolve_intent", chatty_intent), \
+                mock.patch.object(controller, "STREAM_MAX_PENDING_EVENTS", 5):
+            stream = controller.stream_text_controller("gym", "u1", _Session)
+            chunks = [await stream.__anext__()]
+            await asyncio.sleep(0.05)  # the pipeline finishes while nobody reads
+            chunks += [chunk async for chunk in stream]
+        kinds = [kind for kind, _ in _parse_sse("".join(chunks))]
+        self.assertLessEqual(len(kinds), 1 + 5 + 1)
+        self.assertEqual(kinds[-1], "result")
+
+
+if __name__ == "__main__":
+    unittest.main()
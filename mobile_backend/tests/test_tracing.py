@@ -0,0 +1,216 @@
+import sys
+import os
+import json
+import asyncio
+import logging
+import tempfile
+import unittest
+from unittest import mock
+
+# Set python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# app.database builds an engine at import; nothing here connects to it
+os.environ.setdefault("DATABASE_URL", "postgresql+psycopg2://qareeb@localhost/qareeb_test")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.services import tracing
+from app.services.pipeline import StageGraph
+from app.controllers import ai as controller
+from app.routers import ai as ai_router
+from app.services.tracing import (
+    TraceCollector,
+    TraceContextFilter,
+    TraceMiddleware,
+    current_trace_id,
+    set_attribute,
+    span,
+    to_otlp,
+    traced,
+    valid_trace_id,
+)
+
+
+class TracingTestCase(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self._collector = tracing.collector
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "spans.jsonl")
+        tracing.collector = TraceCollector(mode="json", path=self.path)
+
+    def tearDown(self):
+        tracing.collector = self._collector
+        self.tmp.cleanup()
+
+    def exported(self) -> list[list[dict]]:
+        with open(self.path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+
+class TestSpans(TracingTestCase):
+
+    async def test_children_share_trace_and_nest(self):
+        @traced()
+        async def child():
+            set_attribute("model", "m")
+            return current_trace_id()
+
+        with span("root", userID="u1") as root:
+            trace_id = await child()
+
+        self.assertEqual(trace_id, root.trace_id)
+        [trace] = self.exported()
+        by_name = {s["name"]: s for s in trace}
+        self.assertEqual(by_name["TestSpans.test_children_share_trace_and_nest.<locals>.child"]["parent_id"], root.span_id)
+        self.assertEqual(by_name["root"]["attributes"], {"userID": "u1"})
+
+    async def test_stage_graph_stages_nest_under_caller(self):
+        async def stage():
+            return current_trace_id()
+
+        with span("request") as root:
+            results = await StageGraph("test").add("a", stage).add("b", stage).run()
+
+        self.assertEqual(results, {"a": root.trace_id, "b": root.trace_id})
+        [trace] = self.exported()
+        stages = [s for s in trace if s["name"] in ("a", "b")]
+        self.assertEqual({s["parent_id"] for s in stages}, {root.span_id})
+        self.assertEqual(stages[0]["attributes"], {"pipeline": "test"})
+
+    async def test_error_status_recorded(self):
+        with self.assertRaises(ValueError):
+            with span("root"):
+                with span("failing"):
+                    raise ValueError("bad")
+        failing = next(s for s in self.exported()[0] if s["name"] == "failing")
+        self.assertEqual(failing["status"], "error")
+        self.assertIn("bad", failing["error"])
+
+    async def test_late_child_of_exported_trace_is_dropped(self):
+        started = asyncio.Event()
+
+        async def straggler():
+            with span("straggler"):
+                started.set()
+                await asyncio.sleep(5)
+
+        with span("root"):
+            task = asyncio.ensure_future(straggler())
+            await started.wait()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+        [trace] = self.exported()
+        self.assertEqual([s["name"] for s in trace], ["root"])
+
+    async def test_continued_trace_exports_separately(self):
+        with span("request") as request:
+            pass
+        with span("job", trace_id=request.trace_id):
+            with span("job step"):
+                pass
+        first, second = self.exported()
+        self.assertEqual({s["trace_id"] for s in first + second}, {request.trace_id})
+        self.assertEqual(sorted(s["name"] for s in second), ["job", "job step"])
+
+
+class _Session:
+
+    def close(self):
+        pass
+
+
+class TestTraceMiddleware(TracingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        app = FastAPI()
+        app.include_router(ai_router.router, prefix="/api")
+        app.add_middleware(TraceMiddleware)
+        self.client = TestClient(app)
+
+        @traced("resolve_intent")
+        async def resolve_intent(text, memory_context=""):
+            await asyncio.sleep(0.01)
+            return "UNKNOWN", None
+
+        async def no_suggestion(userID, db, memories):
+            return None
+
+        patches = [
+            mock.patch.object(ai_router, "SessionLocal", _Session),
+            mock.patch.object(controller, "AI_FUSED_EXTRACTION", False),
+            mock.patch.object(controller, "get_user_memories", lambda db, userID: []),
+            mock.patch.object(controller, "handle_suggestion_check", no_suggestion),
+            mock.patch.object(controller, "resolve_intent", resolve_intent),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_streamed_body_spans_stay_in_the_request_trace(self):
+        incoming = "0af7651916cd43dd8448eb211c80319c"
+        response = self.client.post(
+            "/api/ai/text/stream", json={"text": "hello", "userID": "u1"}, headers={"X-Trace-Id": incoming}
+        )
+        self.assertIn("event: result", response.text)
+        self.assertEqual(response.headers["x-trace-id"], incoming)
+
+        [trace] = self.exported()
+        by_name = {s["name"]: s for s in trace}
+        root = by_name["POST /api/ai/text/stream"]
+        self.assertIsNone(root["parent_id"])
+        self.assertEqual(root["attributes"]["http.status_code"], 200)
+        # All of this runs while the body streams, after the headers went out
+        for name in ("process_text_controller", "intent", "resolve_intent"):
+            self.assertIn(name, by_name)
+        self.assertEqual(by_name["process_text_controller"]["parent_id"], root["span_id"])
+        self.assertEqual({s["trace_id"] for s in trace}, {incoming})
+        end = lambda s: s["start_ns"] + s["duration_ms"] * 1e6
+        self.assertGreaterEqual(end(root), end(by_name["process_text_controller"]) - 1e6)
+
+    def test_root_is_named_after_the_route_template(self):
+        self.client.get("/api/ai/status/abc123")
+        [trace] = self.exported()
+        self.assertIn("GET /api/ai/status/{job_id}", [s["name"] for s in trace])
+
+
+class TestExportFormats(unittest.TestCase):
+
+    def test_otlp_structure(self):
+        collected = []
+        collector = TraceCollector(mode="off")
+        collector._finish = lambda root, spans: collected.extend(spans)
+        original, tracing.collector = tracing.collector, collector
+        try:
+            with span("root", count=3, ok=True):
+                with span("child"):
+                    pass
+        finally:
+            tracing.collector = original
+
+        otlp = to_otlp(collected)
+        spans = otlp["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        root = next(s for s in spans if s["name"] == "root")
+        child = next(s for s in spans if s["name"] == "child")
+        self.assertEqual(child["parentSpanId"], root["spanId"])
+        self.assertNotIn("parentSpanId", root)
+        self.assertIn({"key": "count", "value": {"intValue": "3"}}, root["attributes"])
+        self.assertIn({"key": "ok", "value": {"boolValue": True}}, root["attributes"])
+
+    def test_trace_id_validation(self):
+        self.assertTrue(valid_trace_id("0af7651916cd43dd8448eb211c80319c"))
+        self.assertFalse(valid_trace_id("0" * 32))
+        self.assertFalse(valid_trace_id("not-a-trace-id"))
+        self.assertFalse(valid_trace_id(None))
+
+    def test_log_filter_adds_ids(self):
+        record = logging.LogRecord("x", logging.INFO, __file__, 1, "msg", (), None)
+        TraceContextFilter().filter(record)
+        self.assertEqual(record.trace_id, "-")
+
+
+if __name__ == "__main__":
+    unittest.main()
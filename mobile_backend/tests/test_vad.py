@@ -0,0 +1,83 @@
+import sys
+import os
+import unittest
+import numpy as np
+
+# Set python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.vad import VoiceActivityDetector, frame_levels, pcm16_to_float, speech_bounds, trim_silence
+
+RATE = 16000
+
+
+def tone(seconds: float, amplitude: float = 0.3) -> np.ndarray:
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def noise(seconds: float, amplitude: float = 0.001) -> np.ndarray:
+    return np.random.default_rng(0).normal(0, amplitude, int(RATE * seconds)).astype(np.float32)
+
+
+class TestVAD(unittest.TestCase):
+
+    def test_frame_levels(self):
+        levels = frame_levels(np.concatenate([np.zeros(480), np.full(480, 0.5)]), 480)
+        self.assertEqual(len(levels), 2)
+        self.assertLess(levels[0], -150)
+        self.assertAlmostEqual(levels[1], 20 * np.log10(0.5), places=3)
+
+    def test_pcm16_to_float(self):
+        pcm = np.array([0, 16384, -32768], dtype="<i2").tobytes()
+        np.testing.assert_allclose(pcm16_to_float(pcm), [0.0, 0.5, -1.0])
+
+    def test_speech_pause_and_end(self):
+        audio = np.concatenate([noise(0.5), tone(1.0), noise(0.4), tone(0.5), noise(1.0)])
+        vad = VoiceActivityDetector()
+        # Arbitrary chunk sizes must not change the result
+        events = []
+        for start in range(0, len(audio), 1234):
+            events += vad.feed(audio[start:start + 1234])
+
+        self.assertEqual([e.kind for e in events], ["speech_start", "pause", "pause", "end"])
+        self.assertAlmostEqual(events[0].sample / RATE, 0.5, delta=0.05)
+        # First pause cut lands inside the 0.4 s gap
+        self.assertTrue(1.5 < events[1].sample / RATE < 1.9)
+        self.assertAlmostEqual(events[3].sample / RATE, 2.4, delta=0.05)
+        self.assertFalse(vad.in_speech)
+        self.assertTrue(vad.heard_speech)
+
+    def test_clicks_and_silence_are_not_speech(self):
+        audio = np.concatenate([noise(0.5), tone(0.05), noise(1.0)])
+        vad = VoiceActivityDetector()
+        self.assertEqual(vad.feed(audio), [])
+        self.assertFalse(vad.heard_speech)
+
+
+class TestTrimSilence(unittest.TestCase):
+
+    def test_trims_to_speech_with_padding(self):
+        audio = np.concatenate([noise(1.0), tone(0.5), noise(0.3), tone(0.5), noise(2.0)])
+        start, end = speech_bounds(audio, pad_ms=100)
+        self.assertAlmostEqual(start / RATE, 0.9, delta=0.04)
+        self.assertAlmostEqual(end / RATE, 2.4, delta=0.04)
+
+        trimmed = trim_silence(audio, pad_ms=100)
+        self.assertEqual(len(trimmed), end - start)
+        self.assertTrue(np.shares_memory(trimmed, audio))
+
+    def test_silence_is_rejected(self):
+        self.assertIsNone(trim_silence(noise(2.0)))
+        self.assertIsNone(trim_silence(np.zeros(RATE, dtype=np.float32)))
+        self.assertIsNone(trim_silence(np.zeros(10, dtype=np.float32)))
+        # A lone click is not speech
+        self.assertIsNone(trim_silence(np.concatenate([noise(1.0), tone(0.03), noise(1.0)])))
+
+    def test_continuous_sound_is_kept(self):
+        audio = tone(2.0)
+        self.assertEqual(speech_bounds(audio), (0, len(audio)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import sys
+import os
+import asyncio
+import unittest
+from unittest import mock
+
+# Set python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.controllers import ai as controller
+
+
+class TestTranscribeAndVerify(unittest.IsolatedAsyncioTestCase):
+    """Ordering is driven by events rather than sleeps, so nothing depends on timing."""
+
+    def setUp(self):
+        self.events = []
+        self.laps = []
+        self.release_transcription = asyncio.Event()
+        self.transcribed = asyncio.Event()
+
+    async def transcribe(self):
+        self.events.append("transcribe:start")
+        try:
+            await self.release_transcription.wait()
+        except asyncio.CancelledError:
+            self.events.append("transcribe:cancelled")
+            raise
+        self.events.append("transcribe:done")
+        self.transcribed.set()
+        return "add 20 to coffee"
+
+    def verifier(self, verdict, before_verdict=None):
+        async def verify(speech, userID, db):
+            self.events.append("verify:start")
+            await asyncio.sleep(0)  # let a concurrent transcription start
+            if before_verdict is not None:
+                await before_verdict()
+            self.events.append("verify:done")
+            return verdict
+        return mock.patch.object(controller, "_verify_speaker", verify)
+
+    async def run_mode(self, mode, verdict, before_verdict=None):
+        with mock.patch.object(controller, "VOICE_VERIFY_MODE", mode), self.verifier(verdict, before_verdict):
+            # A mode that waits on a transcription nobody releases fails here instead of hanging
+            return await asyncio.wait_for(
+                controller._transcribe_and_verify(self.transcribe, None, "u1", None, self.laps.append), timeout=5
+            )
+
+    async def test_parallel_overlaps(self):
+        async def release():
+            self.release_transcription.set()
+
+        text, rejected = await self.run_mode("parallel", (True, 0.9), release)
+        self.assertEqual(text, "add 20 to coffee")
+        self.assertIsNone(rejected)
+        # The transcription was already running while the speaker check was
+        self.assertLess(self.events.index("transcribe:start"), self.events.index("verify:done"))
+        self.assertEqual(self.laps, ["verify", "transcribe"])
+
+    async def test_parallel_failed_verification_cancels_transcription(self):
+        text, rejected = await self.run_mode("parallel", (False, 0.3))
+        await asyncio.sleep(0)
+        self.assertIsNone(text)
+        self.assertEqual(rejected["status"], "auth_failed")
+        self.assertEqual(
+            self.events, ["verify:start", "transcribe:start", "verify:done", "transcribe:cancelled"]
+        )
+
+    async def test_parallel_keeps_finished_transcription(self):
+        self.release_transcription.set()
+        text, rejected = await self.run_mode("parallel", (False, 0.3), self.transcribed.wait)
+        self.assertEqual(rejected["transcription"], "add 20 to coffee")
+        self.assertNotIn("transcribe:cancelled", self.events)
+
+    async def test_verify_first_skips_transcription(self):
+        text, rejected = await self.run_mode("verify_first", (False, 0.3))
+        self.assertIsNone(text)
+        self.assertIsNotNone(rejected)
+        self.assertEqual(self.events, ["verify:start", "verify:done"])
+
+    async def test_sequential_and_unenrolled(self):
+        self.release_transcription.set()
+        text, rejected = await self.run_mode("sequential", None)
+        self.assertEqual(text, "add 20 to coffee")
+        self.assertIsNone(rejected)
+        self.assertEqual(self.events, ["transcribe:start", "transcribe:done", "verify:start", "verify:done"])
+        self.assertEqual(self.laps, ["transcribe", "verify"])
+
+
+if __name__ == "__main__":
+    unittest.main()